@@ -0,0 +1,76 @@
+"""
+Tiempo de arranque en frío del núcleo del simulador
+
+Importa nequiTestAPI en intérpretes nuevos y calcula la mediana del tiempo de
+importación (sin contar el arranque del propio intérprete). También comprueba
+que importar el núcleo no carga dependencias pesadas. Termina con código 1 si
+se supera el objetivo o si alguna dependencia pesada se carga en la importación.
+
+Uso:
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --target-ms 30 --runs 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Módulos que el núcleo no debe cargar al importarse
+HEAVY_MODULES = ("numpy", "matplotlib", "tabulate", "colorama")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+{module}.FinancialLoadTestSimulator()._calculate_results(1000, {{"balance": 100}})
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure(module="nequiTestAPI", runs=15):
+    """
+    Importa el módulo en `runs` intérpretes nuevos
+
+    Returns:
+        tuple: (lista de tiempos en segundos, módulos pesados cargados)
+    """
+    times = []
+    loaded = set()
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", _PROBE.format(module=module)], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        probe = json.loads(output)
+        times.append(probe["seconds"])
+        loaded |= {name for name in probe["modules"] if name.split(".")[0] in HEAVY_MODULES}
+    return times, sorted({name.split(".")[0] for name in loaded})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el tiempo de importación del núcleo del simulador")
+    parser.add_argument("--module", default="nequiTestAPI")
+    parser.add_argument("--runs", type=int, default=15)
+    parser.add_argument("--target-ms", type=float, default=50.0, help="Mediana máxima admitida en milisegundos")
+    args = parser.parse_args(argv)
+
+    times, heavy = measure(args.module, args.runs)
+    median_ms = statistics.median(times) * 1000
+    print(f"{args.module}: mediana {median_ms:.1f} ms, mínimo {min(times) * 1000:.1f} ms "
+          f"({args.runs} arranques, objetivo {args.target_ms:.0f} ms)")
+
+    failed = False
+    if heavy:
+        print(f"Dependencias pesadas cargadas al importar: {', '.join(heavy)}")
+        failed = True
+    if median_ms > args.target_ms:
+        print("Objetivo de arranque superado")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""
+Benchmarks de regresión de los caminos críticos del simulador
+
+Mide, para 1.000, 10.000, 20.000 y 100.000 usuarios:
+
+- model: una ejecución del modelo escalar (_calculate_results) con las cachés
+  de predicciones vacías, es decir, el cálculo del modelo
+- batch: un barrido vectorizado de BATCH_POINTS puntos hasta ese número de
+  usuarios, también con las cachés vacías
+- model-hit y batch-hit: lo mismo repitiendo el punto o la malla anteriores,
+  que el modelo responde desde su caché
+- display: la salida en consola (_display_results), redirigida a memoria
+- save: la serialización a JSON (save_results)
+- render: el gráfico en PNG sin interfaz (plot_results con archivo)
+
+Cada caso se repite hasta ocupar --min-time segundos y se queda el mejor de
+--repeat rondas (como timeit/asv). Con --save-baseline los tiempos se guardan
+en un JSON; en las siguientes ejecuciones se comparan con él y el script
+termina con código 1 si algún caso es más lento que baseline × --threshold.
+
+Los tiempos se normalizan con un bucle de calibración en Python puro
+guardado junto a la línea base, de modo que una máquina de CI más lenta o
+más rápida que la que guardó la línea base no produce falsos positivos.
+
+Uso:
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --threshold 1.5
+    python benchmarks/run_benchmarks.py --cases model,batch --sizes 20000 --format json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import models  # noqa: E402
+from nequiTestAPI import FinancialLoadTestSimulator  # noqa: E402
+
+SIZES = (1000, 10000, 20000, 100000)
+BATCH_POINTS = 10000
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DISTRIBUTION = {"auth": 20, "balance": 20, "p2p": 40, "qr": 15, "withdrawal": 5}
+
+
+def _calibrate():
+    """Tiempo de una carga fija en Python puro (referencia de la velocidad de la máquina)"""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        total = 0
+        for i in range(200000):
+            total += i * i % 7
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _time(function, min_time, repeat):
+    """Mejor tiempo por llamada de `repeat` rondas de al menos `min_time` segundos"""
+    function()  # Calentamiento: importaciones perezosas, cachés y figura
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / repeat or number >= 1 << 20:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def build_cases(sizes, workdir):
+    """Casos de benchmark: nombre → función sin argumentos"""
+    import numpy as np
+
+    cases = {}
+    for users in sizes:
+        simulator = FinancialLoadTestSimulator()
+        simulator.results = simulator._calculate_results(users, DISTRIBUTION)
+        grid = np.linspace(1, users, BATCH_POINTS).astype(np.int64)
+        json_file = os.path.join(workdir, f"results_{users}.json")
+        png_file = os.path.join(workdir, f"results_{users}.png")
+
+        def display(simulator=simulator):
+            with contextlib.redirect_stdout(io.StringIO()):
+                simulator._display_results()
+
+        def save(simulator=simulator, json_file=json_file):
+            with contextlib.redirect_stdout(io.StringIO()):
+                simulator.save_results(json_file)
+
+        def model(simulator=simulator, users=users):
+            models.clear_caches()
+            simulator._calculate_results(users, DISTRIBUTION)
+
+        def batch(simulator=simulator, grid=grid):
+            models.clear_caches()
+            simulator.calculate_results_batch(grid, DISTRIBUTION, seed=0)
+
+        # Sin vaciar las cachés: tras el calentamiento el modelo responde desde ellas
+        cases[f"model[{users}]"] = model
+        cases[f"model-hit[{users}]"] = lambda simulator=simulator, users=users: \
+            simulator._calculate_results(users, DISTRIBUTION)
+        cases[f"batch[{users}]"] = batch
+        cases[f"batch-hit[{users}]"] = lambda simulator=simulator, grid=grid: \
+            simulator.calculate_results_batch(grid, DISTRIBUTION, seed=0)
+        cases[f"display[{users}]"] = display
+        cases[f"save[{users}]"] = save
+        cases[f"render[{users}]"] = lambda simulator=simulator, png_file=png_file: simulator.plot_results(png_file)
+    return cases
+
+
+def _format_time(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("µs", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de regresión del simulador")
+    parser.add_argument("--cases", default="model,model-hit,batch,batch-hit,display,save,render",
+                        help="Familias de casos separadas por comas")
+    parser.add_argument("--sizes", default=",".join(map(str, SIZES)), help="Usuarios separados por comas")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Segundos mínimos medidos por caso")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Archivo JSON de la línea base")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda los tiempos como nueva línea base")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="Falla si un caso tarda más que la línea base por este factor")
+    parser.add_argument("--format", choices=["table", "json"], default="table")
+    args = parser.parse_args(argv)
+
+    families = set(args.cases.split(","))
+    sizes = [int(size) for size in args.sizes.split(",")]
+    calibration = _calibrate()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = {name: function for name, function in build_cases(sizes, workdir).items()
+                 if name.split("[")[0] in families}
+        timings = {name: _time(function, args.min_time, args.repeat) for name, function in cases.items()}
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = []
+    regressions = []
+    for name, seconds in timings.items():
+        item = {"case": name, "seconds": seconds}
+        if baseline and name in baseline["timings"]:
+            # Cociente normalizado por la velocidad relativa de las dos máquinas
+            ratio = (seconds / calibration) / (baseline["timings"][name] / baseline["calibration"])
+            item["ratio"] = ratio
+            if ratio > args.threshold:
+                regressions.append(name)
+        report.append(item)
+
+    if args.format == "json":
+        print(json.dumps({"calibration": calibration, "threshold": args.threshold, "cases": report,
+                          "regressions": regressions}, indent=4))
+    else:
+        for item in report:
+            ratio = f"x{item['ratio']:.2f}" if "ratio" in item else "-"
+            mark = "  REGRESIÓN" if item["case"] in regressions else ""
+            print(f"{item['case']:<18}{_format_time(item['seconds']):>12}{ratio:>10}{mark}")
+        if baseline is None and not args.save_baseline:
+            print(f"Sin línea base en {args.baseline}; use --save-baseline para crearla")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "calibration": calibration, "timings": timings}, f, indent=4)
+        print(f"Línea base guardada en {args.baseline}", file=sys.stderr)
+
+    if regressions:
+        print(f"{len(regressions)} casos superan la línea base por más de x{args.threshold}: "
+              f"{', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
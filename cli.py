@@ -0,0 +1,779 @@
+"""
+Interfaz de línea de comandos no interactiva del simulador
+
+Ejemplos:
+    python cli.py list-apis
+    python cli.py run normal high extreme --repeat 1000 --format jsonl --output runs.jsonl
+    python cli.py run --users 5000 --distribution auth=10,balance=30,p2p=40,qr=15,withdrawal=5
+    python cli.py run --users 5000000 --engine population --format summary
+    python cli.py run high extreme --engine workflows --flows flows.json
+    python cli.py --cache-dir .cache/ run extreme --seed 42 --engine events --format summary
+    python cli.py sweep --scenario extreme --users 1000:40000:1000 --format csv
+    python cli.py sweep --scenario extreme --users 1000:100000:100 --plot plots/extreme --output sweep.csv
+    python cli.py run extreme --repeat 100 --quiet --plot-dir plots/
+    python cli.py capacity --scenarios normal,high,extreme --users 1000:100000:1 --api p2p --limit 15 --workers 8
+    python cli.py capacity --scenarios normal,high,extreme --api p2p --limit 15 --search
+    python cli.py load extreme --base-url http://127.0.0.1:8080 --rate 20000 --duration 30
+    python cli.py load normal --stub --format summary
+    python cli.py load extreme --stub --workers 4 --duration 30 --format summary
+    python cli.py coordinator extreme --base-url http://10.0.0.5:8080 --workers 8 --listen 0.0.0.0:7070
+    python cli.py worker --coordinator 10.0.0.2:7070
+    python cli.py timeseries extreme --profile ramp:ramp_up=60,steady=300,ramp_down=60 --format csv
+    python cli.py timeseries high --profile soak:duration=86400 --format jsonl --output soak.jsonl
+    python cli.py replay access.log.gz --speed 10 --output replay.csv
+    python cli.py replay access.log --engine http --stub --speed 2 --format summary
+    python cli.py run extreme --repeat 1000 --quiet --store history/
+    python cli.py history --store history/ --scenario extreme --since 7d --where "p2p.error_rate > 10"
+    python cli.py fit-model --store history/ --output queueing.json
+    python cli.py --model queueing.json capacity --scenarios normal,high,extreme --api p2p --limit 15 --search
+    python cli.py --metrics-file metrics.json --profile-dir profiles/ --trace-memory run extreme --repeat 10 -q
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+
+import instrumentation
+import sweep
+from models import QueueingModel, runs_to_columns, save_model
+from nequiTestAPI import ENGINES, FinancialLoadTestSimulator
+from result_cache import DEFAULT_MAX_BYTES, ResultCache
+from results_store import ResultsStore
+
+# Ejecuciones por segmento del histórico al usar run --store
+STORE_BATCH = 10000
+
+# Usuarios por defecto de capacity: malla completa o extremos de la bisección (--search)
+CAPACITY_GRID = "1000:1000000:1000"
+CAPACITY_RANGE = (1, 1_000_000)
+
+
+def parse_distribution(text, apis):
+    """
+    Convierte "auth=10,balance=30,..." en un dict de porcentajes
+
+    Las APIs omitidas quedan en 0 y la suma debe ser 100.
+    """
+    distribution = {api: 0 for api in apis}
+    for item in text.split(","):
+        try:
+            api, percentage = item.split("=")
+            percentage = int(percentage)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Formato no válido '{item}'. Use api=porcentaje")
+        if api not in apis:
+            raise argparse.ArgumentTypeError(f"API desconocida '{api}'. Disponibles: {', '.join(apis)}")
+        if percentage < 0:
+            raise argparse.ArgumentTypeError("El porcentaje no puede ser negativo.")
+        distribution[api] = percentage
+
+    total = sum(distribution.values())
+    if total != 100:
+        raise argparse.ArgumentTypeError(f"La suma debe ser 100%. Total actual: {total}%")
+    return distribution
+
+
+def parse_users(text):
+    """Convierte "inicio:fin[:paso]" (fin inclusive) o "a,b,c" en una lista de usuarios"""
+    try:
+        if ":" in text:
+            start, stop, *step = (int(part) for part in text.split(":"))
+            return list(range(start, stop + 1, step[0] if step else 1))
+        return [int(part) for part in text.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Rango de usuarios no válido '{text}'. Use inicio:fin[:paso] o a,b,c")
+
+
+def _summary_line(label, results):
+    """Resumen de una ejecución en una línea"""
+    return (f"{label}\tusuarios={results['total_users']}\ttiempo_medio={results['avg_response_time']:.2f}s\t"
+            f"error={results['avg_error_rate']:.2f}%\tcpu={results['system_metrics']['cpu']:.1f}%\t"
+            f"memoria={results['system_metrics']['memory']:.1f}%"
+            + (f"\tamplificacion=x{results['retry_amplification']:.2f}" if "retry_amplification" in results else ""))
+
+
+def cmd_list_apis(simulator, args):
+    """Lista las APIs disponibles"""
+    if args.format == "json":
+        print(json.dumps(simulator.apis, indent=2, ensure_ascii=False))
+    else:
+        simulator.print_apis()
+    return 0
+
+
+def cmd_list_scenarios(simulator, args):
+    """Lista los escenarios predefinidos"""
+    if args.format == "json":
+        print(json.dumps(simulator.scenarios, indent=2, ensure_ascii=False))
+    else:
+        simulator.print_scenarios()
+    return 0
+
+
+def cmd_run(simulator, args):
+    """Ejecuta uno o varios escenarios, opcionalmente repetidos, en un único proceso"""
+    for key in args.scenarios:
+        if key not in simulator.scenarios:
+            print(f"Escenario no válido '{key}'. Use {', '.join(simulator.scenarios)}.", file=sys.stderr)
+            return 2
+
+    # Sin escenarios se ejecuta la configuración personalizada
+    runs = [(key, {"scenario_key": key}) for key in args.scenarios]
+    if not runs:
+        distribution = parse_distribution(args.distribution, simulator.apis) if args.distribution else None
+        runs = [("custom", {"custom_users": args.users, "custom_distribution": distribution})]
+
+    if args.flows:
+        with open(args.flows, encoding="utf-8") as f:
+            flows = json.load(f)
+        runs = [(label, {**params, "flows": flows}) for label, params in runs]
+
+    if args.output and args.format == "table":
+        print("--output requiere --format json, jsonl o summary", file=sys.stderr)
+        return 2
+
+    table = args.format == "table" and not args.quiet
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+    collected = []
+    store = ResultsStore(args.store, simulator.apis) if args.store else None
+    pending = []
+    # Una sola figura Agg para todas las ejecuciones (matplotlib sólo se importa si se pide)
+    renderer = None
+    if args.plot_dir:
+        import plotting
+        renderer = plotting.ReportRenderer(simulator.apis, dpi=args.dpi)
+        os.makedirs(args.plot_dir, exist_ok=True)
+
+    try:
+        for label, params in runs:
+            for index in range(args.repeat):
+                # Cada repetición usa su propia semilla derivada de --seed
+                seed = None if args.seed is None else args.seed + index
+                try:
+                    results = simulator.run_simulation(engine=args.engine, verbose=table, seed=seed, **params)
+                except ValueError as exc:
+                    print(f"No se pudo ejecutar la simulación: {exc}", file=sys.stderr)
+                    return 2
+                record = {"scenario": label, **results}
+
+                if renderer is not None:
+                    with instrumentation.phase("plot"):
+                        renderer.render(results, os.path.join(args.plot_dir, f"{label}_{index:05d}.png"))
+
+                # El histórico se escribe por lotes: un segmento cada STORE_BATCH ejecuciones
+                if store is not None:
+                    pending.append(record)
+                    if len(pending) >= STORE_BATCH:
+                        store.append(pending)
+                        pending = []
+
+                if output and args.format == "jsonl":
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                elif output and args.format == "summary":
+                    output.write(_summary_line(label, results) + "\n")
+                elif args.format == "json":
+                    collected.append(record)
+
+                if args.quiet or table:
+                    continue
+                if args.format == "jsonl":
+                    print(json.dumps(record, ensure_ascii=False))
+                elif args.format == "summary":
+                    print(_summary_line(label, results))
+
+        if args.format == "json":
+            if output:
+                json.dump(collected, output, indent=4, ensure_ascii=False)
+            elif not args.quiet:
+                print(json.dumps(collected, indent=4, ensure_ascii=False))
+    finally:
+        # Las ejecuciones ya completadas llegan al histórico aunque una posterior falle
+        if pending:
+            store.append(pending)
+        if output:
+            output.close()
+    return 0
+
+
+def cmd_sweep(simulator, args):
+    """Evalúa el modelo para una lista de usuarios con el motor vectorizado"""
+    if args.distribution:
+        distribution = parse_distribution(args.distribution, simulator.apis)
+    else:
+        distribution = simulator.scenarios[args.scenario]["distribution"]
+
+    batch = simulator.calculate_results_batch(args.users, distribution, seed=args.seed)
+
+    # Columnas: usuarios, métricas globales y tiempo/error por API
+    columns = {
+        "users": batch["total_users"],
+        "avg_response_time": batch["avg_response_time"],
+        "avg_error_rate": batch["avg_error_rate"],
+        "cpu": batch["cpu"],
+        "memory": batch["memory"],
+    }
+    for api in batch["apis"]:
+        columns[f"{api}_response_time"] = batch["response_time"][api]
+        columns[f"{api}_error_rate"] = batch["error_rate"][api]
+
+    if args.plot:
+        import plotting
+
+        # Curvas frente a usuarios y mapas de calor por API; con --plot sin --output no se imprime la tabla
+        directory = os.path.dirname(args.plot)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        plotting.plot_sweep(batch, simulator.apis, f"{args.plot}_curves.png", dpi=args.dpi)
+        plotting.plot_heatmap(batch, simulator.apis, f"{args.plot}_error_heatmap.png", dpi=args.dpi)
+        plotting.plot_heatmap(batch, simulator.apis, f"{args.plot}_latency_heatmap.png",
+                              metric="response_time", dpi=args.dpi)
+        if not args.output:
+            return 0
+
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump({name: values.tolist() for name, values in columns.items()}, output)
+            output.write("\n")
+        else:
+            writer = csv.writer(output)
+            writer.writerow(columns)
+            writer.writerows(zip(*(values.tolist() for values in columns.values())))
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+def cmd_capacity(simulator, args):
+    """Busca en qué número de usuarios cada distribución supera el límite de la métrica"""
+    distributions = {}
+    for key in args.scenarios.split(","):
+        if key not in simulator.scenarios:
+            print(f"Escenario no válido '{key}'. Use {', '.join(simulator.scenarios)}.", file=sys.stderr)
+            return 2
+        distributions[key] = simulator.scenarios[key]["distribution"]
+    for i, text in enumerate(args.distribution or [], 1):
+        distributions[f"custom{i}"] = parse_distribution(text, simulator.apis)
+
+    if args.users is None:
+        args.users = list(CAPACITY_RANGE) if args.search else parse_users(CAPACITY_GRID)
+
+    if args.search:
+        low, high = min(args.users), max(args.users)
+        report = sweep.find_thresholds(distributions, workers=args.workers, api=args.api, metric=args.metric,
+                                       limit=args.limit, low=low, high=high, seed=args.seed or 0,
+                                       replicates=args.replicates, model=simulator.model.to_dict())
+    else:
+        report = sweep.run_sweep(args.users, distributions, api=args.api, metric=args.metric, limit=args.limit,
+                                 seed=args.seed, workers=args.workers, chunk_size=args.chunk_size,
+                                 model=simulator.model.to_dict())
+
+    if args.format == "json":
+        print(json.dumps(report, indent=4, ensure_ascii=False))
+        return 0
+
+    rows = report.items() if args.search else report["distributions"].items()
+    for name, item in rows:
+        users = item["users"] if args.search else item["first_crossing_users"]
+        crossing = f"{users:,} usuarios" if users is not None else "no se alcanza"
+        print(f"{name}\t{args.api}.{args.metric} > {args.limit}: {crossing}")
+    return 0
+
+
+def _load_target(simulator, args):
+    """Usuarios, distribución y URL de la carga HTTP; arranca el servidor simulado con --stub"""
+    import mock_server
+
+    if args.scenario not in simulator.scenarios:
+        raise ValueError(f"Escenario no válido '{args.scenario}'. Use {', '.join(simulator.scenarios)}.")
+    users = args.users or simulator.scenarios[args.scenario]["users"]
+    distribution = simulator.scenarios[args.scenario]["distribution"]
+    if args.distribution:
+        distribution = parse_distribution(args.distribution, simulator.apis)
+
+    if args.stub:
+        stub, base_url = mock_server.start_process()
+        return users, distribution, base_url, stub
+    if not args.base_url:
+        raise ValueError("Indique --base-url o use --stub para el servidor simulado local.")
+    return users, distribution, args.base_url, None
+
+
+def _print_interval(row):
+    """Progreso de la carga distribuida, una línea por intervalo en stderr"""
+    print(f"t={row['t']:>7.1f}s\tpeticiones={row['requests']:,}\tcompletadas/s={row['throughput']:,.0f}\t"
+          f"errores={row['errors']:,}\tp50={row['p50']:.3f}s\tp99={row['p99']:.3f}s", file=sys.stderr)
+
+
+def _print_load_results(simulator, args, results):
+    simulator.results = results
+    if args.format == "json":
+        print(json.dumps(results, indent=4, ensure_ascii=False))
+    elif args.format == "summary":
+        print(_summary_line(args.scenario, results) + f"\tpeticiones/s={results['throughput']:,.0f}")
+    else:
+        simulator._display_results()
+
+
+def _address(text, default_port):
+    host, _, port = text.rpartition(":") if ":" in text else (text, "", "")
+    return host, int(port) if port else default_port
+
+
+def cmd_load(simulator, args):
+    """Envía peticiones HTTP reales siguiendo la distribución del escenario"""
+    import load_generator
+
+    try:
+        users, distribution, base_url, stub = _load_target(simulator, args)
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 2
+
+    options = {"connections": args.connections, "max_pending": args.max_pending, "timeout": args.timeout}
+    try:
+        if args.workers > 1:
+            import distributed
+            results = distributed.run_local(simulator.apis, base_url, users, distribution, workers=args.workers,
+                                            rate=args.rate, duration=args.duration, seed=args.seed,
+                                            on_interval=None if args.format == "json" else _print_interval,
+                                            interval=args.interval, **options)
+        else:
+            generator = load_generator.HttpLoadGenerator(simulator.apis, base_url, **options)
+            results = generator.run_sync(users, distribution, rate=args.rate, duration=args.duration,
+                                         seed=args.seed)
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.join()
+
+    _print_load_results(simulator, args, results)
+    return 0
+
+
+def cmd_coordinator(simulator, args):
+    """Espera a los trabajadores remotos, los arranca a la vez y combina sus métricas"""
+    import asyncio
+    import distributed
+
+    try:
+        users, distribution, base_url, stub = _load_target(simulator, args)
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 2
+
+    host, port = _address(args.listen, distributed.DEFAULT_PORT)
+    coordinator = distributed.Coordinator(simulator.apis, host=host, port=port, workers=args.workers,
+                                          interval=args.interval, connections=args.connections,
+                                          max_pending=args.max_pending, timeout=args.timeout)
+
+    async def run():
+        await coordinator.start()
+        print(f"Coordinador escuchando en {host}:{coordinator.port}; esperando {args.workers} trabajadores",
+              file=sys.stderr)
+        return await coordinator.run(base_url, users, distribution, rate=args.rate, duration=args.duration,
+                                     seed=args.seed, on_interval=None if args.format == "json" else _print_interval)
+
+    try:
+        results = asyncio.run(run())
+    except RuntimeError as exc:
+        print(str(exc), file=sys.stderr)
+        return 1
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.join()
+
+    _print_load_results(simulator, args, results)
+    return 0
+
+
+def cmd_worker(simulator, args):
+    """Genera la parte de la carga que le asigne el coordinador"""
+    import asyncio
+    import distributed
+
+    host, port = _address(args.coordinator, distributed.DEFAULT_PORT)
+    try:
+        results = asyncio.run(distributed.run_worker(host, port, name=args.name))
+    except (OSError, RuntimeError) as exc:
+        print(f"Trabajador detenido: {exc}", file=sys.stderr)
+        return 1
+    print(f"Trabajador terminado: {results['total_requests']:,} peticiones, "
+          f"{results['throughput']:,.0f} peticiones/s", file=sys.stderr)
+    return 0
+
+
+def cmd_timeseries(simulator, args):
+    """Emite los resultados por segundo de un perfil de carga sin acumularlos en memoria"""
+    if args.scenario not in simulator.scenarios:
+        print(f"Escenario no válido '{args.scenario}'. Use {', '.join(simulator.scenarios)}.", file=sys.stderr)
+        return 2
+
+    try:
+        buckets = simulator.stream_simulation(scenario_key=args.scenario, profile=args.profile, seed=args.seed)
+        first = next(buckets)
+    except ValueError as exc:
+        print(str(exc), file=sys.stderr)
+        return 2
+
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "jsonl":
+            output.write(json.dumps(first) + "\n")
+            for item in buckets:
+                output.write(json.dumps(item) + "\n")
+        else:
+            apis = list(first["response_time"])
+            writer = csv.writer(output)
+            writer.writerow(["t", "phase", "users", "avg_response_time", "avg_error_rate", "cpu", "memory"]
+                            + [f"{api}_{metric}" for api in apis for metric in ("response_time", "error_rate")])
+            for item in itertools.chain([first], buckets):
+                writer.writerow([item["t"], item["phase"], item["users"], item["avg_response_time"],
+                                 item["avg_error_rate"], item["system_metrics"]["cpu"], item["system_metrics"]["memory"]]
+                                + [item[metric][api] for api in apis for metric in ("response_time", "error_rate")])
+    finally:
+        if args.output:
+            output.close()
+    return 0
+
+
+def cmd_replay(simulator, args):
+    """Reproduce un log de acceso con el modelo (serie por intervalo) o con peticiones HTTP reales"""
+    import replay
+
+    if args.speed <= 0:
+        print("--speed debe ser positivo", file=sys.stderr)
+        return 2
+    model_formats = ("csv", "jsonl")
+    if args.format and (args.format in model_formats) != (args.engine == "model"):
+        print(f"El formato '{args.format}' no está disponible con el motor {args.engine}", file=sys.stderr)
+        return 2
+    reader = replay.TraceReader(args.log, simulator.apis)
+
+    if args.engine == "http":
+        stub = None
+        base_url = args.base_url
+        if args.stub:
+            import mock_server
+            stub, base_url = mock_server.start_process()
+        elif not base_url:
+            print("Indique --base-url o use --stub para el servidor simulado local.", file=sys.stderr)
+            return 2
+        try:
+            results = replay.replay_http(simulator.apis, reader, base_url, speed=args.speed, seed=args.seed,
+                                         connections=args.connections, timeout=args.timeout)
+        finally:
+            if stub is not None:
+                stub.terminate()
+                stub.join()
+        simulator.results = results
+        if args.format == "json":
+            print(json.dumps(results, indent=4, ensure_ascii=False))
+        elif args.format == "summary":
+            print(_summary_line(args.log, results) + f"\tpeticiones/s={results['throughput']:,.0f}")
+        else:
+            simulator._display_results()
+        return 0
+
+    output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    apis = list(simulator.apis)
+    try:
+        writer = None
+        for item in replay.replay_model(simulator, reader, speed=args.speed, bucket=args.bucket, seed=args.seed):
+            if args.format == "jsonl":
+                output.write(json.dumps(item) + "\n")
+                continue
+            if writer is None:
+                writer = csv.writer(output)
+                writer.writerow(["t", "rate", "users", "avg_response_time", "avg_error_rate", "cpu", "memory"]
+                                + [f"{api}_{metric}" for api in apis
+                                   for metric in ("requests", "response_time", "error_rate")])
+            writer.writerow([item["t"], item["rate"], item["users"], item["avg_response_time"],
+                             item["avg_error_rate"], item["system_metrics"]["cpu"], item["system_metrics"]["memory"]]
+                            + [item[metric][api] for api in apis for metric in ("requests", "response_time", "error_rate")])
+    finally:
+        if args.output:
+            output.close()
+    stats = reader.stats
+    print(f"{stats['lines']:,} líneas: {stats['matched']:,} reconocidas, {stats['unmatched']:,} sin API, "
+          f"{stats['malformed']:,} mal formadas", file=sys.stderr)
+    return 0
+
+
+def cmd_history(simulator, args):
+    """Consulta el histórico de ejecuciones"""
+    store = ResultsStore(args.store, simulator.apis)
+    try:
+        rows = store.query(scenario=args.scenario, engine=args.engine, since=args.since, until=args.until,
+                           where=args.where, columns=args.columns.split(",") if args.columns else None)
+    except (ValueError, KeyError) as exc:
+        print(f"Consulta no válida: {exc}", file=sys.stderr)
+        return 2
+
+    names = rows.dtype.names
+    if args.format == "json":
+        print(json.dumps([{name: row[name].item() if name != "timestamp" else str(row[name]) for name in names}
+                          for row in rows[:args.limit]], indent=4, ensure_ascii=False))
+    else:
+        writer = csv.writer(sys.stdout)
+        writer.writerow(names)
+        for row in rows[:args.limit]:
+            writer.writerow([row[name] for name in names])
+    print(f"{len(rows)} ejecuciones encontradas", file=sys.stderr)
+    return 0
+
+
+def _read_runs(filename):
+    """Lee ejecuciones guardadas por run --output (json o jsonl)"""
+    with open(filename, encoding="utf-8") as f:
+        if filename.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        runs = json.load(f)
+    return runs if isinstance(runs, list) else [runs]
+
+
+def cmd_fit_model(simulator, args):
+    """Ajusta el modelo de colas a ejecuciones medidas (histórico o archivo de resultados)"""
+    if args.store:
+        try:
+            runs = ResultsStore(args.store, simulator.apis).query(scenario=args.scenario, engine=args.engine,
+                                                                  since=args.since, where=args.where)
+        except (ValueError, KeyError) as exc:
+            print(f"Consulta no válida: {exc}", file=sys.stderr)
+            return 2
+    else:
+        runs = _read_runs(args.input)
+
+    try:
+        observations = runs_to_columns(runs, simulator.apis)
+        model = QueueingModel.fit(observations, think_time=args.think_time)
+    except ValueError as exc:
+        print(f"No se pudo ajustar el modelo: {exc}", file=sys.stderr)
+        return 2
+
+    # Error cuadrático medio del ajuste por API (sin variación aleatoria)
+    import numpy as np
+
+    prediction = model.predict(np.asarray(observations["total_users"], dtype=np.int64),
+                               observations["distribution"], observations["apis"])
+    for i, api in enumerate(observations["apis"]):
+        if api not in model.params["apis"]:
+            continue
+        used = observations["distribution"][:, i] > 0
+        rmse_time = np.sqrt(np.mean((prediction["response_time"][used, i] - observations["response_time"][api][used]) ** 2))
+        rmse_error = np.sqrt(np.mean((prediction["error_rate"][used, i] - observations["error_rate"][api][used]) ** 2))
+        print(f"{api}\tejecuciones={int(used.sum())}\trmse_tiempo={rmse_time:.3f}s\trmse_error={rmse_error:.3f}%",
+              file=sys.stderr)
+
+    if args.output:
+        save_model(model, args.output)
+    else:
+        print(json.dumps(model.to_dict(), indent=4))
+    return 0
+
+
+def _add_load_arguments(parser):
+    """Opciones comunes de la carga HTTP (un proceso, varios locales o distribuida)"""
+    parser.add_argument("scenario", nargs="?", default="normal", help="Escenario del que tomar usuarios y distribución")
+    parser.add_argument("--base-url", default=None, help="URL base del servicio, por ejemplo http://127.0.0.1:8080")
+    parser.add_argument("--stub", action="store_true", help="Arranca el servidor simulado local y lo usa como destino")
+    parser.add_argument("--users", type=int, default=None)
+    parser.add_argument("--distribution", default=None, help="Distribución personalizada: auth=10,balance=30,...")
+    parser.add_argument("--rate", type=float, default=None, help="Peticiones por segundo (por defecto usuarios / 5s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos de generación de carga")
+    parser.add_argument("--connections", type=int, default=256,
+                        help="Conexiones keep-alive concurrentes (por trabajador)")
+    parser.add_argument("--max-pending", type=int, default=10000, help="Peticiones en espera antes de descartarse")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--interval", type=float, default=1.0, help="Segundos entre métricas de los trabajadores")
+    parser.add_argument("--format", choices=["table", "summary", "json"], default="table")
+
+
+def build_parser():
+    """Construye el parser de argumentos con sus subcomandos"""
+    parser = argparse.ArgumentParser(description="Simulador de pruebas de carga para aplicaciones financieras")
+    parser.add_argument("--model", default=None,
+                        help="Modelo de rendimiento: piecewise (por defecto), queueing o un JSON de fit-model")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Guarda las métricas de instrumentación al terminar (.prom: Prometheus; otro: JSON OTLP)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Expone /metrics en formato Prometheus mientras dura el comando")
+    parser.add_argument("--profile-dir", default=None, help="Guarda un perfil de cProfile por ejecución")
+    parser.add_argument("--trace-memory", action="store_true", help="Registra el pico de memoria por ejecución")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Caché en disco de resultados de ejecuciones y barridos con semilla")
+    parser.add_argument("--cache-memory", type=int, default=DEFAULT_MAX_BYTES // 2 ** 20,
+                        help="MB máximos de la caché en memoria")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_apis = subparsers.add_parser("list-apis", help="Lista las APIs disponibles")
+    list_apis.add_argument("--format", choices=["table", "json"], default="table")
+    list_apis.set_defaults(handler=cmd_list_apis)
+
+    list_scenarios = subparsers.add_parser("list-scenarios", help="Lista los escenarios predefinidos")
+    list_scenarios.add_argument("--format", choices=["table", "json"], default="table")
+    list_scenarios.set_defaults(handler=cmd_list_scenarios)
+
+    run = subparsers.add_parser("run", help="Ejecuta escenarios sin interacción")
+    run.add_argument("scenarios", nargs="*", help="Claves de escenarios (normal, high, extreme)")
+    run.add_argument("--users", type=int, default=None, help="Usuarios de la configuración personalizada")
+    run.add_argument("--distribution", default=None, help="Distribución personalizada: auth=10,balance=30,...")
+    run.add_argument("--engine", choices=ENGINES, default="model",
+                     help="population: --users son usuarios registrados (admite millones); "
+                          "workflows: flujos de varios pasos con reintentos")
+    run.add_argument("--flows", default=None, help="Archivo JSON con la lista de flujos del motor workflows")
+    run.add_argument("--repeat", type=int, default=1, help="Repeticiones de cada escenario")
+    run.add_argument("--seed", type=int, default=None,
+                     help="Semilla de la primera repetición (las siguientes usan seed+1, seed+2...)")
+    run.add_argument("--format", choices=["table", "summary", "json", "jsonl"], default="table")
+    run.add_argument("--output", default=None, help="Archivo donde guardar los resultados (json/jsonl/summary)")
+    run.add_argument("-q", "--quiet", action="store_true", help="No imprime resultados por consola")
+    run.add_argument("--store", default=None, help="Directorio del histórico donde anexar las ejecuciones")
+    run.add_argument("--plot-dir", default=None, help="Directorio donde guardar un gráfico PNG por ejecución")
+    run.add_argument("--dpi", type=int, default=100, help="Resolución de los gráficos")
+    run.set_defaults(handler=cmd_run)
+
+    sweep = subparsers.add_parser("sweep", help="Barrido de usuarios con el motor vectorizado")
+    sweep.add_argument("--scenario", default="extreme", help="Escenario del que tomar la distribución")
+    sweep.add_argument("--distribution", default=None, help="Distribución personalizada: auth=10,balance=30,...")
+    sweep.add_argument("--users", type=parse_users, required=True, help="inicio:fin[:paso] o lista a,b,c")
+    sweep.add_argument("--seed", type=int, default=None)
+    sweep.add_argument("--format", choices=["csv", "json"], default="csv")
+    sweep.add_argument("--output", default=None)
+    sweep.add_argument("--plot", default=None, help="Prefijo de los gráficos: <prefijo>_curves.png y mapas de calor")
+    sweep.add_argument("--dpi", type=int, default=100, help="Resolución de los gráficos")
+    sweep.set_defaults(handler=cmd_sweep, predefined_scenario=True)
+
+    capacity = subparsers.add_parser("capacity", help="Umbral de saturación por distribución (barrido paralelo)")
+    capacity.add_argument("--scenarios", default="normal,high,extreme", help="Escenarios separados por comas")
+    capacity.add_argument("--distribution", action="append", help="Distribución adicional: auth=10,balance=30,...")
+    capacity.add_argument("--users", type=parse_users, default=None,
+                          help="Malla inicio:fin[:paso] (con --search sólo se usan sus extremos). Por defecto "
+                               f"{CAPACITY_GRID} o, con --search, el intervalo {CAPACITY_RANGE[0]}-{CAPACITY_RANGE[1]}")
+    capacity.add_argument("--api", default="p2p")
+    capacity.add_argument("--metric", default="error_rate",
+                          choices=["error_rate", "response_time", "avg_error_rate", "avg_response_time", "cpu", "memory"])
+    capacity.add_argument("--limit", type=float, default=15.0)
+    capacity.add_argument("--seed", type=int, default=None)
+    capacity.add_argument("--workers", type=int, default=None, help="Procesos trabajadores (por defecto, uno por núcleo)")
+    capacity.add_argument("--chunk-size", type=int, default=50000)
+    capacity.add_argument("--search", action="store_true", help="Búsqueda por bisección en lugar de malla completa")
+    capacity.add_argument("--replicates", type=int, default=16, help="Réplicas promediadas por punto en --search")
+    capacity.add_argument("--format", choices=["text", "json"], default="text")
+    capacity.set_defaults(handler=cmd_capacity)
+
+    load = subparsers.add_parser("load", help="Carga HTTP real contra un servicio (o el servidor simulado)")
+    _add_load_arguments(load)
+    load.add_argument("--workers", type=int, default=1,
+                      help="Procesos generadores locales coordinados (más de uno usa el modo distribuido)")
+    load.set_defaults(handler=cmd_load, predefined_scenario=True)
+
+    coordinator = subparsers.add_parser("coordinator", help="Reparte la carga HTTP entre trabajadores remotos")
+    _add_load_arguments(coordinator)
+    coordinator.add_argument("--workers", type=int, required=True, help="Trabajadores que se esperan")
+    coordinator.add_argument("--listen", default="0.0.0.0", help="Dirección de escucha host[:puerto] (puerto 7070)")
+    coordinator.set_defaults(handler=cmd_coordinator, predefined_scenario=True)
+
+    worker = subparsers.add_parser("worker", help="Trabajador de generación de carga de un coordinador")
+    worker.add_argument("--coordinator", default="127.0.0.1", help="Dirección del coordinador host[:puerto] (puerto 7070)")
+    worker.add_argument("--name", default=None, help="Nombre del trabajador en los resultados")
+    worker.set_defaults(handler=cmd_worker)
+
+    timeseries = subparsers.add_parser("timeseries", help="Resultados por segundo siguiendo un perfil de carga")
+    timeseries.add_argument("scenario", nargs="?", default="normal")
+    timeseries.add_argument("--profile", default=None,
+                            help="tipo:clave=valor,... con tipo ramp, step, spike o soak (por defecto ramp)")
+    timeseries.add_argument("--seed", type=int, default=None)
+    timeseries.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    timeseries.add_argument("--output", default=None)
+    timeseries.set_defaults(handler=cmd_timeseries, predefined_scenario=True)
+
+    replay_parser = subparsers.add_parser("replay", help="Reproduce un log de acceso (texto o gzip)")
+    replay_parser.add_argument("log", help="Log de acceso en formato común o combinado")
+    replay_parser.add_argument("--engine", choices=["model", "http"], default="model",
+                               help="model: métricas por intervalo con el modelo; http: peticiones reales")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="Factor de aceleración de la traza")
+    replay_parser.add_argument("--bucket", type=float, default=1.0, help="Segundos por intervalo (motor model)")
+    replay_parser.add_argument("--base-url", default=None, help="URL base del servicio (motor http)")
+    replay_parser.add_argument("--stub", action="store_true", help="Usa el servidor simulado local (motor http)")
+    replay_parser.add_argument("--connections", type=int, default=256)
+    replay_parser.add_argument("--timeout", type=float, default=30.0)
+    replay_parser.add_argument("--seed", type=int, default=None)
+    replay_parser.add_argument("--format", choices=["csv", "jsonl", "table", "summary", "json"], default=None,
+                               help="csv o jsonl con el motor model (csv por defecto); table, summary o json con http")
+    replay_parser.add_argument("--output", default=None)
+    replay_parser.set_defaults(handler=cmd_replay)
+
+    history = subparsers.add_parser("history", help="Consulta el histórico de ejecuciones")
+    history.add_argument("--store", required=True, help="Directorio del histórico")
+    history.add_argument("--scenario", default=None)
+    history.add_argument("--engine", default=None)
+    history.add_argument("--since", default=None, help="7d, 24h, 30m o fecha ISO")
+    history.add_argument("--until", default=None)
+    history.add_argument("--where", default=None, help='Condiciones, por ejemplo "p2p.error_rate > 10 and cpu >= 90"')
+    history.add_argument("--columns", default=None, help="Columnas separadas por comas")
+    history.add_argument("--limit", type=int, default=None, help="Máximo de filas a mostrar")
+    history.add_argument("--format", choices=["csv", "json"], default="csv")
+    history.set_defaults(handler=cmd_history)
+
+    fit_model = subparsers.add_parser("fit-model", help="Ajusta el modelo de colas a ejecuciones medidas")
+    source = fit_model.add_mutually_exclusive_group(required=True)
+    source.add_argument("--store", help="Directorio del histórico")
+    source.add_argument("--input", help="Resultados de run --output (json o jsonl)")
+    fit_model.add_argument("--scenario", default=None, help="Sólo ejecuciones de este escenario (con --store)")
+    fit_model.add_argument("--engine", default=None)
+    fit_model.add_argument("--since", default=None, help="7d, 24h, 30m o fecha ISO")
+    fit_model.add_argument("--where", default=None)
+    fit_model.add_argument("--think-time", type=float, default=5.0, help="Tiempo de reflexión de los usuarios")
+    fit_model.add_argument("--output", default=None, help="Archivo JSON donde guardar el modelo")
+    fit_model.set_defaults(handler=cmd_fit_model)
+
+    return parser
+
+
+def main(argv=None):
+    """Punto de entrada de la CLI. Devuelve el código de salida"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        simulator = FinancialLoadTestSimulator(model=args.model)
+    except (OSError, ValueError) as exc:
+        parser.error(f"Modelo no válido '{args.model}': {exc}")
+    if args.cache_dir:
+        try:
+            simulator.cache = ResultCache(args.cache_dir, max_bytes=args.cache_memory * 2 ** 20)
+        except (OSError, ValueError) as exc:
+            parser.error(f"Caché no válida '{args.cache_dir}': {exc}")
+    server = None
+    if args.metrics_file or args.metrics_port or args.profile_dir or args.trace_memory:
+        instrumentation.enable(profile_dir=args.profile_dir, trace_memory=args.trace_memory)
+        if args.metrics_port:
+            server = instrumentation.serve(args.metrics_port)
+    try:
+        # history y fit-model filtran por la etiqueta guardada (por ejemplo "custom"), no por un escenario
+        if getattr(args, "predefined_scenario", False) and args.scenario not in simulator.scenarios:
+            parser.error(f"Escenario no válido '{args.scenario}'. Use {', '.join(simulator.scenarios)}.")
+        return args.handler(simulator, args)
+    except argparse.ArgumentTypeError as exc:
+        parser.error(str(exc))
+    finally:
+        stats = simulator.cache.stats() if simulator.cache is not None else None
+        if stats and stats["hits"] + stats["misses"]:
+            print(f"caché: aciertos={stats['hits']} (memoria={stats['memory_hits']} disco={stats['disk_hits']}) "
+                  f"fallos={stats['misses']} tasa={stats['hit_rate']}%", file=sys.stderr)
+        if args.metrics_file:
+            instrumentation.write_metrics(args.metrics_file)
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8")
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+Presentación en consola del simulador: tablas, colores y menú interactivo
+
+Se separa del núcleo (nequiTestAPI.py) para que importar el simulador no
+cargue tabulate ni colorama; el núcleo importa este módulo sólo cuando
+tiene que imprimir algo.
+"""
+from colorama import Fore, init
+from tabulate import tabulate
+
+# Inicializar colorama para colores en consola
+init(autoreset=True)
+
+
+def print_error(message):
+    """Muestra un mensaje de error en rojo"""
+    print(Fore.RED + message)
+
+
+def print_success(message):
+    """Muestra un mensaje de confirmación en verde"""
+    print(Fore.GREEN + message)
+
+
+def print_run_start(simulator, users, distribution, scenario=None):
+    """
+    Muestra los parámetros de una simulación antes de ejecutarla
+    
+    Args:
+        simulator (FinancialLoadTestSimulator): Simulador con las APIs
+        users (int): Número de usuarios concurrentes
+        distribution (dict): Distribución de peticiones por API
+        scenario (dict): Escenario predefinido (None en configuraciones personalizadas)
+    """
+    print(Fore.GREEN + "\nIniciando simulación de carga...")
+    if scenario:
+        print(f"Utilizando escenario: {scenario['name']}")
+    else:
+        print(f"Utilizando configuración personalizada: {users} usuarios")
+    
+    # Mostrar detalles de la prueba
+    print(f"Número de usuarios concurrentes: {users}")
+    print("Distribución de peticiones:")
+    for api, percentage in distribution.items():
+        if percentage > 0:
+            print(f"  - {simulator.apis[api]['name']}: {percentage}%")
+    print("\nEjecutando prueba de carga... ", end="", flush=True)
+
+
+def print_header(simulator):
+    """Muestra el encabezado del simulador"""
+    print(Fore.CYAN + "\n" + "="*80)
+    print(Fore.CYAN + " "*20 + "SIMULADOR DE PRUEBAS DE CARGA PARA APLICACIONES FINANCIERAS")
+    print(Fore.CYAN + " "*30 + "Caso de estudio: Nequi")
+    print(Fore.CYAN + "="*80 + "\n")
+
+
+def print_apis(simulator):
+    """Muestra las APIs disponibles para pruebas"""
+    print(Fore.YELLOW + "\nAPIs disponibles para pruebas:")
+    headers = ["Clave", "Nombre", "Ruta", "Método"]
+    table_data = []
+
+    for key, api in simulator.apis.items():
+        table_data.append([key, api["name"], api["path"], api["method"]])
+
+    print(tabulate(table_data, headers=headers, tablefmt="pretty"))
+
+
+def print_scenarios(simulator):
+    """Muestra los escenarios predefinidos"""
+    print(Fore.YELLOW + "\nEscenarios predefinidos:")
+    headers = ["Clave", "Nombre", "Usuarios", "Distribución de APIs"]
+    table_data = []
+
+    for key, scenario in simulator.scenarios.items():
+        distribution_str = ", ".join([f"{simulator.apis[api]['name'].split(' ')[0]}: {pct}%" 
+                                     for api, pct in scenario["distribution"].items() if pct > 0])
+        table_data.append([key, scenario["name"], scenario["users"], distribution_str])
+
+    print(tabulate(table_data, headers=headers, tablefmt="pretty"))
+
+
+def display_results(simulator):
+    """Muestra los resultados de la simulación en formato tabular y recomendaciones"""
+    if not simulator.results:
+        print(Fore.RED + "\nNo hay resultados disponibles. Ejecute una simulación primero.")
+        return
+
+    print(Fore.GREEN + "\n" + "="*80)
+    print(Fore.GREEN + " "*30 + "RESULTADOS DE LA SIMULACIÓN")
+    print(Fore.GREEN + "="*80)
+
+    # Mostrar métricas generales
+    print(Fore.CYAN + "\nMétricas generales:")
+    general_data = [
+        ["Usuarios concurrentes", f"{simulator.results['total_users']:,}"],
+        ["Tiempo medio de respuesta", f"{simulator.results['avg_response_time']:.2f} segundos"],
+        ["Tasa de error global", f"{simulator.results['avg_error_rate']:.2f}%"],
+        ["Uso de CPU", f"{simulator.results['system_metrics']['cpu']:.1f}%"],
+        ["Uso de memoria", f"{simulator.results['system_metrics']['memory']:.1f}%"],
+    ]
+    print(tabulate(general_data, tablefmt="pretty"))
+    
+    # Mostrar la población simulada (sólo con el motor de población)
+    population = simulator.results.get("population")
+    if population:
+        print(Fore.CYAN + "\nPoblación simulada:")
+        population_data = [
+            ["Usuarios registrados", f"{population['size']:,}"],
+            ["Usuarios en sesión (media / pico)", f"{population['active_mean']:,.0f} / {population['active_peak']:,}"],
+            ["Sesiones iniciadas", f"{population['sessions_started']:,}"],
+            ["Renovaciones de token", f"{population['token_refreshes']:,}"],
+            ["Monto transferido (P2P)", f"${population['transferred']:,}"],
+            ["Memoria del estado", f"{population['memory_bytes'] / 2 ** 20:.0f} MB"],
+        ]
+        print(tabulate(population_data, tablefmt="pretty"))
+
+    # Mostrar tiempos de respuesta por API
+    print(Fore.CYAN + "\nTiempos de respuesta por API:")
+    rt_data = []
+    for api, rt in simulator.results["response_time"].items():
+        if simulator.results["distribution"].get(api, 0) > 0:
+            rt_data.append([simulator.apis[api]["name"], f"{rt:.2f} segundos"])
+    print(tabulate(rt_data, headers=["API", "Tiempo de respuesta"], tablefmt="pretty"))
+
+    # Mostrar percentiles de latencia (sólo en la simulación por eventos)
+    if simulator.results.get("percentiles"):
+        print(Fore.CYAN + "\nPercentiles de latencia por API:")
+        pct_data = []
+        for api, pct in simulator.results["percentiles"].items():
+            if simulator.results["distribution"].get(api, 0) > 0:
+                pct_data.append([simulator.apis[api]["name"]] + [f"{value:.2f}s" for value in pct.values()])
+        pct_headers = ["API"] + [name.upper() for name in next(iter(simulator.results["percentiles"].values()))]
+        print(tabulate(pct_data, headers=pct_headers, tablefmt="pretty"))
+
+    # Mostrar flujos de varios pasos (sólo con el motor de flujos)
+    flows = simulator.results.get("flows")
+    if flows:
+        print(Fore.CYAN + "\nFlujos de transacciones (latencia extremo a extremo):")
+        flow_data = []
+        for name, flow in flows.items():
+            pct = flow["percentiles"]
+            flow_data.append([name, f"{flow['started']:,}", f"{flow['success_rate']:.2f}%", f"{flow['retries']:,}",
+                              f"x{flow['retry_amplification']:.2f}"] + [f"{value:.2f}s" for value in pct.values()])
+        flow_headers = ["Flujo", "Iniciados", "Éxito", "Reintentos", "Amplificación"] + \
+            [name.upper() for name in next(iter(flows.values()))["percentiles"]]
+        print(tabulate(flow_data, headers=flow_headers, tablefmt="pretty"))
+        print(f"Amplificación global por reintentos: x{simulator.results['retry_amplification']:.2f}")
+
+    # Mostrar tasa de error por API
+    print(Fore.CYAN + "\nTasa de error por API:")
+    er_data = []
+    for api, er in simulator.results["error_rate"].items():
+        if simulator.results["distribution"].get(api, 0) > 0:
+            er_data.append([simulator.apis[api]["name"], f"{er:.2f}%"])
+    print(tabulate(er_data, headers=["API", "Tasa de error"], tablefmt="pretty"))
+
+    # Mostrar errores detectados
+    if simulator.results["errors"]:
+        print(Fore.RED + "\nErrores detectados:")
+        error_data = []
+        for error in simulator.results["errors"]:
+            api = error["api"]
+            error_data.append([
+                simulator.apis[api]["name"],
+                error["code"],
+                error["message"]
+            ])
+        print(tabulate(error_data, headers=["API", "Código", "Mensaje"], tablefmt="pretty"))
+
+    # Mostrar diagnóstico
+    print(Fore.CYAN + "\nDiagnóstico:")
+    if simulator.results["avg_error_rate"] < 5:
+        print(Fore.GREEN + "✓ El sistema funciona de manera óptima bajo esta carga.")
+    elif simulator.results["avg_error_rate"] < 15:
+        print(Fore.YELLOW + "⚠ El sistema muestra signos de degradación. Se recomienda optimizar las APIs con mayor tasa de error.")
+    else:
+        print(Fore.RED + "✗ ¡Sistema sobrecargado! Se requiere implementar throttling inteligente, priorización de transacciones " +
+              "y escalado horizontal inmediato.")
+
+    # Mostrar recomendaciones
+    show_recommendations(simulator)
+
+
+def show_recommendations(simulator):
+    """Muestra recomendaciones basadas en los resultados de la simulación"""
+    if not simulator.results:
+        return
+
+    print(Fore.CYAN + "\nRecomendaciones para mejorar el rendimiento:")
+
+    recommendations = []
+
+    # Recomendaciones basadas en tasa de error
+    if simulator.results["avg_error_rate"] > 8:
+        recommendations.append("Optimizar API de Transferencias: Las transferencias P2P muestran tiempos " +
+                             "de respuesta elevados. Implemente caché para operaciones recurrentes y optimice " +
+                             "consultas a base de datos.")
+
+    # Recomendaciones basadas en CPU
+    if simulator.results["system_metrics"]["cpu"] > 75:
+        recommendations.append("Escalar Horizontalmente: El uso de CPU supera el 75%. Implemente auto-scaling " +
+                             "para añadir más nodos durante picos de demanda.")
+
+    # Recomendaciones basadas en errores específicos
+    has_429 = any(e["code"] == 429 for e in simulator.results["errors"])
+    has_500_503 = any(e["code"] in [500, 503] for e in simulator.results["errors"])
+
+    if has_429:
+        recommendations.append("Revisar Políticas de Rate Limiting: Los errores 429 (Too Many Requests) indican " +
+                             "que las políticas de limitación de tasa actuales son demasiado restrictivas para " +
+                             "el volumen de usuarios.")
+
+    if has_500_503:
+        recommendations.append("Implementar Degradación Controlada: Los errores 503 y 500 sugieren fallos completos. " +
+                             "Implemente circuit breakers y estrategias de degradación controlada para mantener " +
+                             "funcionalidades críticas operativas.")
+
+    # Recomendación para caso óptimo
+    if simulator.results["avg_error_rate"] < 5:
+        recommendations.append("Monitoreo Continuo: El sistema muestra buen rendimiento. Se recomienda implementar " +
+                             "un sistema de monitoreo continuo para detectar cambios en los patrones de uso y " +
+                             "anticipar futuros picos.")
+
+    # Mostrar recomendaciones
+    for i, rec in enumerate(recommendations, 1):
+        print(f"{i}. {rec}")
+
+
+def ask_engine():
+    """
+    Pide el motor de simulación hasta que sea uno de los admitidos
+
+    Returns:
+        str: Motor elegido ("model" si se pulsa Enter)
+    """
+    from nequiTestAPI import ENGINES
+
+    while True:
+        engine = input(f"Motor de simulación ({'/'.join(ENGINES)}) [model]: ").strip().lower() or "model"
+        if engine in ENGINES:
+            return engine
+        print(Fore.RED + f"Motor no válido. Use {', '.join(ENGINES)}.")
+
+
+def ask_seed():
+    """
+    Pide una semilla opcional; con semilla la ejecución es reproducible y se reutiliza desde la caché
+
+    Returns:
+        int | None: Semilla introducida o None para una ejecución aleatoria
+    """
+    while True:
+        text = input("Semilla (Enter = aleatoria): ").strip()
+        if not text:
+            return None
+        try:
+            return int(text)
+        except ValueError:
+            print(Fore.RED + "Ingrese un número entero válido.")
+
+
+def interactive_menu(simulator):
+    """Menú interactivo para la simulación de pruebas de carga"""
+    print_header(simulator)
+
+    while True:
+        print(Fore.CYAN + "\nOpciones disponibles:")
+        print("1. Ver APIs disponibles")
+        print("2. Ver escenarios predefinidos")
+        print("3. Ejecutar escenario predefinido")
+        print("4. Ejecutar configuración personalizada")
+        print("5. Graficar resultados")
+        print("6. Guardar resultados")
+        print("0. Salir")
+
+        choice = input("\nSeleccione una opción (0-6): ")
+
+        if choice == '1':
+            print_apis(simulator)
+        elif choice == '2':
+            print_scenarios(simulator)
+        elif choice == '3':
+            print_scenarios(simulator)
+            scenario_key = input("\nIngrese la clave del escenario (normal, high, extreme): ").lower()
+            if scenario_key in simulator.scenarios:
+                simulator.run_simulation(scenario_key=scenario_key, engine=ask_engine(), seed=ask_seed())
+            else:
+                print(Fore.RED + "Escenario no válido. Use 'normal', 'high' o 'extreme'.")
+        elif choice == '4':
+            try:
+                users = int(input("\nIngrese número de usuarios concurrentes: "))
+                print("\nIngrese distribución de peticiones (porcentaje para cada API, debe sumar 100):")
+
+                custom_distribution = {}
+                total_percentage = 0
+
+                for api in simulator.apis:
+                    while True:
+                        try:
+                            percentage = int(input(f"{simulator.apis[api]['name']}: "))
+                            if percentage < 0:
+                                print(Fore.RED + "El porcentaje no puede ser negativo.")
+                                continue
+
+                            if total_percentage + percentage > 100:
+                                print(Fore.RED + f"El total supera 100%. Quedan {100 - total_percentage}% disponibles.")
+                                continue
+
+                            custom_distribution[api] = percentage
+                            total_percentage += percentage
+                            break
+                        except ValueError:
+                            print(Fore.RED + "Ingrese un número entero válido.")
+
+                if total_percentage != 100:
+                    print(Fore.RED + f"La suma debe ser 100%. Total actual: {total_percentage}%")
+                else:
+                    simulator.run_simulation(custom_users=users, custom_distribution=custom_distribution,
+                                             seed=ask_seed())
+
+            except ValueError:
+                print(Fore.RED + "Entrada no válida. Ingrese números enteros.")
+        elif choice == '5':
+            simulator.plot_results()
+        elif choice == '6':
+            filename = input("\nIngrese nombre de archivo (o presione Enter para usar el predeterminado): ")
+            if not filename:
+                filename = 'load_test_results.json'
+            simulator.save_results(filename)
+        elif choice == '0':
+            print(Fore.GREEN + "\n¡Gracias por usar el simulador de pruebas de carga!")
+            break
+        else:
+            print(Fore.RED + "Opción no válida. Intente de nuevo.")
@@ -0,0 +1,371 @@
+"""
+Generación de carga distribuida: un coordinador y varios trabajadores
+
+Un solo proceso de Python no alcanza la carga de producción de Nequi, así que
+el coordinador reparte los usuarios y la tasa de un escenario entre N
+trabajadores (procesos locales o en otras máquinas) que ejecutan cada uno un
+HttpLoadGenerator contra el mismo servicio.
+
+Protocolo (TCP): cada mensaje es un objeto JSON precedido de su longitud en
+4 bytes big-endian.
+
+    trabajador → coordinador  {"type": "hello", "name", "sent"}
+    coordinador → trabajador  {"type": "welcome", "id", "time"}
+    coordinador → trabajador  {"type": "start", "start_at", "users", "rate", ...}
+    trabajador → coordinador  {"type": "delta", "index", "requests", "statuses",
+                               "client_errors", "histograms"}   (uno por intervalo)
+    trabajador → coordinador  {"type": "done", "wall", "cpu", "memory"}
+                              {"type": "error", "message"}
+
+Con "sent" y "time" cada trabajador estima el desfase de su reloj respecto al
+del coordinador y convierte "start_at" a su reloj local, así todos empiezan a
+la vez aunque hayan conectado en momentos distintos. Los histogramas viajan
+serializados (sólo intervalos no vacíos) y el coordinador los suma para
+calcular percentiles globales exactos en lugar de promediar percentiles.
+"""
+import asyncio
+import json
+import socket
+import struct
+import time
+from collections import Counter
+
+from histogram import LatencyHistogram, LatencyRecorder
+from load_generator import HttpLoadGenerator
+
+# Cabecera de cada mensaje: longitud del JSON en bytes
+_HEADER = struct.Struct("!I")
+
+# Mayor mensaje aceptado (protege al coordinador de datos corruptos)
+MAX_MESSAGE = 64 * 2 ** 20
+
+DEFAULT_PORT = 7070
+
+
+def _frame(message):
+    data = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    return _HEADER.pack(len(data)) + data
+
+
+async def send_message(writer, message):
+    """Envía un mensaje JSON con su prefijo de longitud"""
+    writer.write(_frame(message))
+    await writer.drain()
+
+
+async def read_message(reader):
+    """Lee un mensaje JSON con prefijo de longitud; None si la conexión se cerró"""
+    try:
+        header = await reader.readexactly(_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    (length,) = _HEADER.unpack(header)
+    if length > MAX_MESSAGE:
+        raise ValueError(f"Mensaje de {length} bytes: supera el máximo de {MAX_MESSAGE}")
+    return json.loads(await reader.readexactly(length))
+
+
+def split_load(total, parts):
+    """Reparte un entero en `parts` partes que difieren como mucho en 1"""
+    base, extra = divmod(int(total), parts)
+    return [base + (1 if i < extra else 0) for i in range(parts)]
+
+
+class Coordinator:
+    """Acepta trabajadores, los arranca a la vez y combina sus métricas"""
+
+    def __init__(self, apis, host="127.0.0.1", port=DEFAULT_PORT, workers=2, interval=1.0, start_delay=1.0,
+                 connect_timeout=60.0, connections=256, max_pending=10000, timeout=30.0, think_time=5.0,
+                 significant_digits=3):
+        """
+        Args:
+            apis (dict): APIs del simulador (FinancialLoadTestSimulator.apis)
+            host (str): Interfaz de escucha
+            port (int): Puerto de escucha (0 elige uno libre, ver self.port tras start())
+            workers (int): Trabajadores que se esperan antes de empezar
+            interval (float): Segundos entre envíos de métricas de cada trabajador
+            start_delay (float): Margen en segundos entre la orden de inicio y el inicio
+            connect_timeout (float): Segundos máximos esperando a los trabajadores
+            connections (int): Conexiones keep-alive de cada trabajador
+            max_pending (int): Cola de cada trabajador antes de descartar peticiones
+            timeout (float): Segundos máximos por petición
+            think_time (float): Tiempo de reflexión para derivar la tasa a partir de los usuarios
+            significant_digits (int): Precisión de los histogramas de latencia
+        """
+        self.apis = apis
+        self.api_keys = list(apis)
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.interval = interval
+        self.start_delay = start_delay
+        self.connect_timeout = connect_timeout
+        self.options = {"connections": connections, "max_pending": max_pending, "timeout": timeout,
+                        "think_time": think_time, "significant_digits": significant_digits}
+        self._server = None
+        self._joined = None
+        self._peers = []
+
+    async def start(self):
+        """Empieza a escuchar; los trabajadores pueden conectarse desde este momento"""
+        self._joined = asyncio.Event()
+        self._server = await asyncio.start_server(self._accept, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def _accept(self, reader, writer):
+        hello = await read_message(reader)
+        if not hello or hello.get("type") != "hello" or len(self._peers) >= self.workers:
+            writer.close()
+            return
+        worker_id = len(self._peers)
+        self._peers.append({"id": worker_id, "name": hello.get("name", f"worker-{worker_id}"),
+                            "reader": reader, "writer": writer})
+        await send_message(writer, {"type": "welcome", "id": worker_id, "time": time.time()})
+        if len(self._peers) == self.workers:
+            self._joined.set()
+
+    def _new_stats(self):
+        n_apis = len(self.api_keys)
+        return {
+            "requests": [0] * n_apis,
+            "latencies": [LatencyRecorder(self._new_histogram()) for _ in range(n_apis)],
+            "statuses": [Counter() for _ in range(n_apis)],
+            "client_errors": [Counter() for _ in range(n_apis)],
+        }
+
+    def _new_histogram(self):
+        return LatencyHistogram(self.options["timeout"] * 4, self.options["significant_digits"])
+
+    def _merge(self, stats, delta):
+        """Suma el intervalo de un trabajador a los contadores globales; devuelve su resumen"""
+        requests = errors = completed = 0
+        latency = self._new_histogram()
+        for i in range(len(self.api_keys)):
+            stats["requests"][i] += delta["requests"][i]
+            requests += delta["requests"][i]
+            for code, count in delta["statuses"][i].items():
+                stats["statuses"][i][int(code)] += count
+                if int(code) >= 400:
+                    errors += count
+            for kind, count in delta["client_errors"][i].items():
+                stats["client_errors"][i][kind] += count
+                errors += count
+            if delta["histograms"][i] is not None:
+                histogram = LatencyHistogram.from_dict(delta["histograms"][i])
+                stats["latencies"][i].histogram.merge(histogram)
+                latency.merge(histogram)
+                completed += histogram.total
+        return {"requests": requests, "completed": completed, "errors": errors, "latency": latency}
+
+    async def _collect(self, peer, stats, intervals, on_interval):
+        """Recibe las métricas de un trabajador hasta su mensaje final"""
+        while True:
+            message = await read_message(peer["reader"])
+            if message is None:
+                raise RuntimeError(f"El trabajador {peer['name']} cerró la conexión antes de terminar")
+            if message["type"] == "error":
+                raise RuntimeError(f"El trabajador {peer['name']} falló: {message['message']}")
+            if message["type"] == "done":
+                return message
+
+            summary = self._merge(stats, message)
+            peer["requests"] = peer.get("requests", 0) + summary["requests"]
+            slot = intervals.setdefault(message["index"], {"reported": 0, "requests": 0, "completed": 0,
+                                                           "errors": 0, "latency": self._new_histogram()})
+            slot["reported"] += 1
+            for key in ("requests", "completed", "errors"):
+                slot[key] += summary[key]
+            slot["latency"].merge(summary["latency"])
+            # El intervalo se publica cuando lo han enviado todos los trabajadores
+            if slot["reported"] == self.workers and on_interval is not None:
+                on_interval(self._interval_row(message["index"], slot))
+
+    def _interval_row(self, index, slot):
+        latency = slot["latency"]
+        return {
+            "t": round((index + 1) * self.interval, 3),
+            "requests": slot["requests"],
+            "completed": slot["completed"],
+            "errors": slot["errors"],
+            "throughput": round(slot["completed"] / self.interval, 1),
+            "p50": round(latency.quantile(0.5), 3) if latency.total else 0.0,
+            "p99": round(latency.quantile(0.99), 3) if latency.total else 0.0,
+        }
+
+    async def run(self, base_url, users, distribution, rate=None, duration=10.0, seed=None, on_interval=None):
+        """
+        Espera a los trabajadores, ejecuta la prueba y combina sus resultados
+
+        Args:
+            base_url (str): URL base del servicio bajo prueba (vista desde los trabajadores)
+            users (int): Usuarios del escenario, repartidos entre los trabajadores
+            distribution (dict): Distribución de peticiones por API
+            rate (float): Peticiones por segundo totales (por defecto users / think_time)
+            duration (float): Segundos de generación de carga
+            seed (int): Semilla base (cada trabajador usa seed + id)
+            on_interval (callable): Recibe el resumen de cada intervalo (t, peticiones,
+                completadas, errores, rendimiento, p50, p99) cuando todos lo han enviado
+
+        Returns:
+            dict: Resultados combinados con la forma de HttpLoadGenerator.run más
+                "workers" (reparto por trabajador) e "intervals" (serie temporal)
+        """
+        if self._server is None:
+            await self.start()
+        try:
+            await asyncio.wait_for(self._joined.wait(), self.connect_timeout)
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"Sólo se conectaron {len(self._peers)} de {self.workers} trabajadores") from None
+
+        rate = rate or users / self.options["think_time"]
+        user_shares = split_load(users, self.workers)
+        start_at = time.time() + self.start_delay
+        for peer, share in zip(self._peers, user_shares):
+            peer["users"] = share
+            peer["rate"] = rate * share / users if users else rate / self.workers
+            await send_message(peer["writer"], {
+                "type": "start", "start_at": start_at, "apis": self.apis, "base_url": base_url,
+                "users": share, "rate": peer["rate"], "distribution": distribution, "duration": duration,
+                "seed": None if seed is None else seed + peer["id"], "interval": self.interval,
+                "options": self.options,
+            })
+
+        stats = self._new_stats()
+        intervals = {}
+        try:
+            finals = await asyncio.gather(*(self._collect(peer, stats, intervals, on_interval)
+                                            for peer in self._peers))
+        finally:
+            await self.close()
+
+        # Intervalos incompletos (el último de cada trabajador llega en momentos distintos)
+        for index in sorted(intervals):
+            if intervals[index]["reported"] < self.workers and on_interval is not None:
+                on_interval(self._interval_row(index, intervals[index]))
+
+        generator = HttpLoadGenerator(self.apis, base_url, **self.options)
+        wall = max(final["wall"] for final in finals)
+        cpu = sum(final["cpu"] for final in finals) / len(finals)
+        results = generator._build_results(users, distribution, rate, wall, cpu, stats)
+        results["system_metrics"]["memory"] = max(final["memory"] for final in finals)
+        results["engine"] = "distributed"
+        results["workers"] = [{"name": peer["name"], "users": peer["users"], "rate": round(peer["rate"], 1),
+                               "requests": peer.get("requests", 0)} for peer in self._peers]
+        results["intervals"] = [self._interval_row(index, intervals[index]) for index in sorted(intervals)]
+        return results
+
+    async def close(self):
+        """Cierra las conexiones con los trabajadores y deja de escuchar"""
+        for peer in self._peers:
+            peer["writer"].close()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+async def run_worker(host="127.0.0.1", port=DEFAULT_PORT, name=None, connect_timeout=60.0):
+    """
+    Se conecta al coordinador, espera la orden de inicio y genera su parte de la carga
+
+    Args:
+        host (str): Dirección del coordinador
+        port (int): Puerto del coordinador
+        name (str): Nombre del trabajador en los resultados (por defecto host:pid)
+        connect_timeout (float): Segundos reintentando la conexión mientras el coordinador arranca
+
+    Returns:
+        dict: Resultados locales del trabajador
+    """
+    import os
+
+    deadline = time.monotonic() + connect_timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+    try:
+        sent = time.time()
+        await send_message(writer, {"type": "hello", "name": name or f"{socket.gethostname()}:{os.getpid()}",
+                                    "sent": sent})
+        welcome = await read_message(reader)
+        if welcome is None:
+            raise RuntimeError("El coordinador rechazó la conexión (¿ya tiene todos los trabajadores?)")
+        # Desfase del reloj local respecto al del coordinador (suponiendo latencia simétrica)
+        offset = welcome["time"] - (sent + time.time()) / 2
+
+        order = await read_message(reader)
+        if order is None or order["type"] != "start":
+            raise RuntimeError("El coordinador cerró la conexión antes de la orden de inicio")
+
+        try:
+            generator = HttpLoadGenerator(order["apis"], order["base_url"], **order["options"])
+            await asyncio.sleep(max(0.0, order["start_at"] - offset - time.time()))
+            results = await generator.run(order["users"], order["distribution"], rate=order["rate"],
+                                          duration=order["duration"], seed=order["seed"],
+                                          interval=order["interval"],
+                                          on_interval=lambda delta: writer.write(_frame({"type": "delta", **delta})))
+        except Exception as exc:
+            await send_message(writer, {"type": "error", "message": f"{type(exc).__name__}: {exc}"})
+            raise
+
+        await send_message(writer, {"type": "done", "wall": results["duration"],
+                                    "cpu": results["system_metrics"]["cpu"],
+                                    "memory": results["system_metrics"]["memory"]})
+        return results
+    finally:
+        writer.close()
+
+
+def _worker_process(host, port, name):
+    """Punto de entrada de un trabajador local en un proceso aparte"""
+    try:
+        asyncio.run(run_worker(host, port, name=name))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_local(apis, base_url, users, distribution, workers=2, rate=None, duration=10.0, seed=None,
+              on_interval=None, host="127.0.0.1", **coordinator_options):
+    """
+    Ejecuta el coordinador y `workers` trabajadores en procesos locales
+
+    Args:
+        apis (dict): APIs del simulador
+        base_url (str): URL base del servicio bajo prueba
+        users (int): Usuarios del escenario
+        distribution (dict): Distribución de peticiones por API
+        workers (int): Procesos trabajadores
+        rate (float): Peticiones por segundo totales
+        duration (float): Segundos de generación de carga
+        seed (int): Semilla base
+        on_interval (callable): Ver Coordinator.run
+        host (str): Interfaz local del coordinador
+        **coordinator_options: Parámetros adicionales de Coordinator
+
+    Returns:
+        dict: Resultados combinados
+    """
+    import multiprocessing
+
+    async def main():
+        coordinator = Coordinator(apis, host=host, port=0, workers=workers, **coordinator_options)
+        await coordinator.start()
+        processes = [multiprocessing.Process(target=_worker_process, args=(host, coordinator.port, f"local-{i}"),
+                                             daemon=True) for i in range(workers)]
+        for process in processes:
+            process.start()
+        try:
+            return await coordinator.run(base_url, users, distribution, rate=rate, duration=duration, seed=seed,
+                                         on_interval=on_interval)
+        finally:
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+    return asyncio.run(main())
@@ -0,0 +1,260 @@
+import heapq
+from collections import deque
+
+import numpy as np
+
+from histogram import LatencyHistogram, LatencyRecorder, summarize_histograms
+
+# Tiempo medio de servicio por API (segundos), igual al tiempo base del modelo predictivo
+DEFAULT_SERVICE_TIMES = {"auth": 0.8, "balance": 1.0, "p2p": 1.2, "qr": 1.0, "withdrawal": 1.0}
+
+# Peticiones que cada API puede atender en paralelo (hilos/pods disponibles)
+DEFAULT_SERVERS = {"auth": 500, "balance": 800, "p2p": 1000, "qr": 600, "withdrawal": 300}
+
+# Tipos de evento
+_ARRIVAL = 0
+_DEPARTURE = 1
+
+
+def _stream(draw, chunk=65536):
+    """Generador infinito que consume números aleatorios por bloques"""
+    while True:
+        yield from draw(chunk).tolist()
+
+
+class EventDrivenEngine:
+    """
+    Simulación de eventos discretos de usuarios virtuales en modelo cerrado
+
+    Cada usuario alterna tiempo de reflexión y una petición a una API elegida
+    según la distribución del escenario. Cada API tiene un número fijo de
+    servidores y una cola FIFO acotada: si la cola está llena la petición se
+    rechaza (429) y si la respuesta tarda más que el timeout del gateway se
+    contabiliza como 504.
+    """
+
+    def __init__(self, apis, service_times=None, servers=None, queue_factor=2.0, timeout=30.0,
+                 think_time=5.0, service_cv=0.5, base_error_rate=0.005, duration=60.0, significant_digits=3):
+        """
+        Args:
+            apis (dict): APIs del simulador (FinancialLoadTestSimulator.apis)
+            service_times (dict): Tiempo medio de servicio por API en segundos
+            servers (dict): Capacidad concurrente por API
+            queue_factor (float): Tamaño máximo de cola como múltiplo de los servidores
+            timeout (float): Timeout del gateway en segundos (errores 504)
+            think_time (float): Tiempo medio de reflexión entre peticiones de un usuario
+            service_cv (float): Coeficiente de variación del tiempo de servicio (lognormal)
+            base_error_rate (float): Probabilidad de error interno (500) sin carga
+            duration (float): Duración simulada de la prueba en segundos
+            significant_digits (int): Precisión de los histogramas de latencia (cifras significativas)
+        """
+        self.apis = list(apis)
+        self.service_times = {**DEFAULT_SERVICE_TIMES, **(service_times or {})}
+        self.servers = {**DEFAULT_SERVERS, **(servers or {})}
+        self.queue_factor = queue_factor
+        self.timeout = timeout
+        self.think_time = think_time
+        self.service_cv = service_cv
+        self.base_error_rate = base_error_rate
+        self.duration = duration
+        self.significant_digits = significant_digits
+
+    def run(self, users, distribution, seed=None):
+        """
+        Ejecuta la simulación
+
+        Args:
+            users (int): Número de usuarios virtuales
+            distribution (dict): Distribución de peticiones por API (porcentajes)
+            seed (int | np.random.Generator): Semilla del generador aleatorio
+
+        Returns:
+            dict: Resultados con la misma forma que _calculate_results más
+                percentiles e histogramas de latencia por API
+        """
+        weights = np.array([distribution.get(api, 0) for api in self.apis], dtype=np.float64)
+        if weights.sum() <= 0:
+            raise ValueError("La distribución debe asignar tráfico al menos a una API")
+        cum_weights = np.cumsum(weights / weights.sum())
+        cum_weights[-1] = 1.0
+
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+        # Flujos de números aleatorios precalculados por bloques
+        think = _stream(lambda n: rng.exponential(self.think_time, n))
+        choose_api = _stream(lambda n: np.searchsorted(cum_weights, rng.random(n), side="right"))
+
+        # Los usuarios arrancan escalonados durante el primer tiempo de reflexión
+        heap = [(t, u, _ARRIVAL) for u, t in enumerate(rng.uniform(0, self.think_time, users).tolist())]
+
+        def arrive(user, now, kind):
+            """Cada llegada es una petición a una API elegida según la distribución"""
+            return next(choose_api)
+
+        def complete(user, now, code):
+            """Tras cualquier respuesta el usuario reflexiona y vuelve a llegar"""
+            return (now + next(think), user, _ARRIVAL)
+
+        counters = self._simulate(users, heap, rng, arrive, complete)
+        return self._build_results(users, distribution, *counters)
+
+    def _simulate(self, users, heap, rng, arrive, complete):
+        """
+        Bucle de eventos compartido: colas y servidores por API, 429/504/500 e histogramas
+
+        Los motores que derivan de éste sólo deciden a qué API va cada llegada y
+        qué hace el usuario tras cada respuesta.
+
+        Args:
+            users (int): Número de usuarios virtuales
+            heap (list): Eventos iniciales (tiempo, usuario, tipo); cualquier tipo
+                distinto de _DEPARTURE se trata como llegada
+            rng (np.random.Generator): Generador para los tiempos de servicio y los fallos
+            arrive (callable): arrive(usuario, ahora, tipo) → índice de la API de la petición
+            complete (callable): complete(usuario, ahora, código) → siguiente evento del
+                usuario tras una respuesta 200, 429, 500 o 504
+
+        Returns:
+            tuple: (requests, rejected, timeouts, failures, latencies, busy_time) por API
+        """
+        n_apis = len(self.apis)
+        sigma = np.sqrt(np.log1p(self.service_cv ** 2))
+        service = _stream(lambda n: rng.lognormal(-sigma ** 2 / 2, sigma, n))
+        failure = _stream(lambda n: rng.random(n) < self.base_error_rate)
+
+        service_mean = [self.service_times[api] for api in self.apis]
+        servers = [self.servers[api] for api in self.apis]
+        queue_limit = [int(self.servers[api] * self.queue_factor) for api in self.apis]
+        timeout = self.timeout
+        end = float(self.duration)
+
+        busy = [0] * n_apis
+        busy_time = [0.0] * n_apis
+        queues = [deque() for _ in range(n_apis)]
+        # Latencias en histogramas HDR: memoria constante sea cual sea el número de peticiones
+        latencies = [LatencyRecorder(LatencyHistogram(self.timeout * 2, self.significant_digits))
+                     for _ in range(n_apis)]
+        requests = [0] * n_apis
+        rejected = [0] * n_apis
+        timeouts = [0] * n_apis
+        failures = [0] * n_apis
+
+        request_api = [0] * users
+        request_start = [0.0] * users
+
+        heapq.heapify(heap)
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        # heapreplace saca el evento actual e inserta el siguiente del mismo usuario en una sola operación
+        heapreplace = heapq.heapreplace
+
+        while heap:
+            now, user, kind = heap[0]
+            if now > end:
+                break
+
+            if kind != _DEPARTURE:
+                api = arrive(user, now, kind)
+                requests[api] += 1
+                request_api[user] = api
+                request_start[user] = now
+                if busy[api] < servers[api]:
+                    busy[api] += 1
+                    service_time = service_mean[api] * next(service)
+                    busy_time[api] += service_time
+                    heapreplace(heap, (now + service_time, user, _DEPARTURE))
+                elif len(queues[api]) >= queue_limit[api]:
+                    rejected[api] += 1
+                    heapreplace(heap, complete(user, now, 429))
+                else:
+                    heappop(heap)
+                    queues[api].append(user)
+                continue
+
+            # Fin de servicio: registrar latencia, avisar al motor y atender al siguiente de la cola
+            api = request_api[user]
+            latency = now - request_start[user]
+            if latency > timeout:
+                timeouts[api] += 1
+                latencies[api].append(timeout)
+                code = 504
+            elif next(failure):
+                failures[api] += 1
+                latencies[api].append(latency)
+                code = 500
+            else:
+                latencies[api].append(latency)
+                code = 200
+            heapreplace(heap, complete(user, now, code))
+
+            queue = queues[api]
+            while queue:
+                waiting = queue.popleft()
+                if now - request_start[waiting] > timeout:
+                    # El gateway ya respondió 504 a esta petición: se descarta sin servirla
+                    timeouts[api] += 1
+                    latencies[api].append(timeout)
+                    heappush(heap, complete(waiting, now, 504))
+                    continue
+                service_time = service_mean[api] * next(service)
+                busy_time[api] += service_time
+                heappush(heap, (now + service_time, waiting, _DEPARTURE))
+                break
+            else:
+                busy[api] -= 1
+
+        return requests, rejected, timeouts, failures, latencies, busy_time
+
+    def _build_results(self, users, distribution, requests, rejected, timeouts, failures, latencies, busy_time):
+        """Convierte los contadores de la simulación al formato de resultados del simulador"""
+        error_rate = {}
+        errors = []
+
+        histograms = {api: latencies[i].flush() for i, api in enumerate(self.apis)}
+        report = summarize_histograms(histograms)
+        response_time = report["response_time"]
+        total_latency = sum(histogram.sum for histogram in histograms.values())
+
+        for i, api in enumerate(self.apis):
+            n_errors = rejected[i] + timeouts[i] + failures[i]
+            error_rate[api] = round(100 * n_errors / requests[i], 2) if requests[i] else 0.0
+
+            if rejected[i]:
+                errors.append({"api": api, "code": 429, "message": "Too Many Requests", "count": rejected[i]})
+            if timeouts[i]:
+                errors.append({"api": api, "code": 504, "message": "Gateway Timeout", "count": timeouts[i]})
+            if failures[i]:
+                errors.append({"api": api, "code": 500, "message": "Internal Server Error", "count": failures[i]})
+
+        # CPU: utilización media de los servidores; memoria: ocupación media (ley de Little)
+        capacity = sum(self.servers[api] for api in self.apis)
+        cpu = 100 * sum(busy_time) / (capacity * self.duration)
+        in_system = float(total_latency) / self.duration
+        memory = 40 + 60 * in_system / (capacity * (1 + self.queue_factor))
+
+        valid_response_times = [rt for api, rt in response_time.items() if distribution.get(api, 0) > 0]
+        valid_error_rates = [er for api, er in error_rate.items() if distribution.get(api, 0) > 0]
+        avg_response_time = sum(valid_response_times) / len(valid_response_times) if valid_response_times else 0
+        avg_error_rate = sum(valid_error_rates) / len(valid_error_rates) if valid_error_rates else 0
+
+        total_requests = sum(requests)
+        return {
+            "response_time": response_time,
+            "error_rate": error_rate,
+            "system_metrics": {
+                "cpu": round(min(100, cpu), 1),
+                "memory": round(min(100, memory), 1)
+            },
+            "errors": errors,
+            "total_users": users,
+            "avg_response_time": round(avg_response_time, 2),
+            "avg_error_rate": round(avg_error_rate, 2),
+            "distribution": distribution,
+            "engine": "events",
+            "duration": self.duration,
+            "total_requests": total_requests,
+            "throughput": round(total_requests / self.duration, 1),
+            "percentiles": report["percentiles"],
+            "global_percentiles": report["global_percentiles"],
+            "histograms": report["histograms"]
+        }
@@ -0,0 +1,215 @@
+"""
+Histograma de latencias estilo HDR con memoria constante
+
+Los valores se cuantizan en unidades enteras (microsegundos por defecto) y se
+agrupan en intervalos log-lineales: cada potencia de dos se divide en el
+número de sub-intervalos necesario para mantener `significant_digits` cifras
+significativas. El tamaño del array depende sólo de la precisión y del rango,
+nunca del número de peticiones, y dos histogramas con la misma configuración
+se combinan sumando sus contadores.
+"""
+import base64
+import math
+from array import array
+
+import numpy as np
+
+# Percentiles reportados por defecto
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LatencyHistogram:
+    """Histograma log-lineal de latencias en segundos"""
+
+    def __init__(self, highest=3600.0, significant_digits=3, unit=1e-6):
+        """
+        Args:
+            highest (float): Mayor latencia registrable en segundos (las mayores se truncan)
+            significant_digits (int): Cifras significativas garantizadas (1 a 5)
+            unit (float): Resolución en segundos de los valores registrados
+        """
+        if not 1 <= significant_digits <= 5:
+            raise ValueError("significant_digits debe estar entre 1 y 5")
+        self.highest = float(highest)
+        self.significant_digits = int(significant_digits)
+        self.unit = float(unit)
+
+        # Sub-intervalos por potencia de dos: 2^k >= 2 * 10^digits
+        self._sub_bits = math.ceil(math.log2(2 * 10 ** self.significant_digits))
+        self._half = 1 << (self._sub_bits - 1)
+        self._highest_units = max(1, int(self.highest / self.unit))
+        max_shift = max(0, self._highest_units.bit_length() - self._sub_bits)
+        self.counts = np.zeros((max_shift + 2) * self._half, dtype=np.int64)
+
+        self.total = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @property
+    def config(self):
+        """Parámetros que deben coincidir para poder combinar histogramas"""
+        return (self.highest, self.significant_digits, self.unit)
+
+    def _indices(self, units):
+        """Índice del intervalo de cada valor entero (vectorizado)"""
+        # frexp da el número de bits de forma exacta para enteros menores que 2^53
+        _, bits = np.frexp(units.astype(np.float64))
+        shift = np.maximum(bits - self._sub_bits, 0)
+        return shift * self._half + (units >> shift)
+
+    def record(self, value, count=1):
+        """Registra una latencia en segundos"""
+        units = min(max(int(value / self.unit), 0), self._highest_units)
+        shift = max(units.bit_length() - self._sub_bits, 0)
+        self.counts[shift * self._half + (units >> shift)] += count
+        self.total += count
+        self.sum += value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def record_many(self, values):
+        """Registra un array de latencias en segundos"""
+        values = np.asarray(values, dtype=np.float64)
+        if not values.size:
+            return
+        units = np.clip((values / self.unit).astype(np.int64), 0, self._highest_units)
+        self.counts += np.bincount(self._indices(units), minlength=self.counts.size)
+        self.total += int(values.size)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        """Suma los contadores de otro histograma con la misma configuración"""
+        if other.config != self.config:
+            raise ValueError("Sólo se pueden combinar histogramas con la misma configuración")
+        self.counts += other.counts
+        self.total += other.total
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def _bucket_values(self, indices):
+        """Valor representativo (punto medio) de cada intervalo, en segundos"""
+        indices = np.asarray(indices, dtype=np.int64)
+        shift = np.maximum(indices // self._half - 1, 0)
+        lowest = (indices - shift * self._half) << shift
+        return (lowest + ((1 << shift) - 1) / 2) * self.unit
+
+    def quantile(self, q):
+        """
+        Latencia del cuantil q (0 a 1), precisa a las cifras significativas configuradas
+
+        Args:
+            q (float | array-like): Cuantil o cuantiles
+
+        Returns:
+            float | np.ndarray: Latencias en segundos (0 si el histograma está vacío)
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if not self.total:
+            return np.zeros_like(q) if q.ndim else 0.0
+        cumulative = np.cumsum(self.counts)
+        ranks = np.maximum(np.ceil(q * self.total), 1)
+        values = self._bucket_values(np.searchsorted(cumulative, ranks))
+        values = np.clip(values, self.min, self.max)
+        return values if q.ndim else float(values)
+
+    @property
+    def mean(self):
+        """Latencia media exacta"""
+        return self.sum / self.total if self.total else 0.0
+
+    def summary(self, percentiles=PERCENTILES):
+        """Percentiles y máximo listos para incluir en los resultados"""
+        values = self.quantile(np.asarray(percentiles) / 100)
+        result = {f"p{p}": round(float(v), 3) for p, v in zip(percentiles, values)}
+        result["max"] = round(self.max, 3)
+        return result
+
+    def to_dict(self):
+        """Serialización compacta (sólo intervalos no vacíos) apta para JSON"""
+        nonzero = np.flatnonzero(self.counts)
+        return {
+            "highest": self.highest,
+            "significant_digits": self.significant_digits,
+            "unit": self.unit,
+            "total": self.total,
+            "sum": self.sum,
+            "min": self.min if self.total else None,
+            "max": self.max,
+            "indices": base64.b64encode(nonzero.astype("<u4").tobytes()).decode("ascii"),
+            "counts": base64.b64encode(self.counts[nonzero].astype("<i8").tobytes()).decode("ascii"),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Reconstruye un histograma serializado con to_dict"""
+        histogram = cls(data["highest"], data["significant_digits"], data["unit"])
+        indices = np.frombuffer(base64.b64decode(data["indices"]), dtype="<u4")
+        histogram.counts[indices] = np.frombuffer(base64.b64decode(data["counts"]), dtype="<i8")
+        histogram.total = int(data["total"])
+        histogram.sum = float(data["sum"])
+        histogram.min = data["min"] if data["min"] is not None else math.inf
+        histogram.max = float(data["max"])
+        return histogram
+
+
+class LatencyRecorder:
+    """
+    Registro rápido de latencias una a una
+
+    Las latencias se acumulan en un buffer de tamaño fijo que se vuelca al
+    histograma con record_many, evitando el coste por muestra de record().
+    """
+
+    __slots__ = ("histogram", "buffer", "flush_size")
+
+    def __init__(self, histogram, flush_size=65536):
+        self.histogram = histogram
+        self.buffer = array("d")
+        self.flush_size = flush_size
+
+    def append(self, value):
+        """Registra una latencia en segundos"""
+        self.buffer.append(value)
+        if len(self.buffer) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Vuelca el buffer al histograma y devuelve el histograma"""
+        if self.buffer:
+            self.histogram.record_many(np.frombuffer(self.buffer, dtype=np.float64))
+            del self.buffer[:]
+        return self.histogram
+
+
+def summarize_histograms(histograms, percentiles=PERCENTILES):
+    """
+    Resume los histogramas por API para incluirlos en los resultados
+
+    Args:
+        histograms (dict): API → LatencyHistogram
+
+    Returns:
+        dict: "response_time" (media por API), "percentiles" por API,
+            "global_percentiles" de todas las peticiones e "histograms" serializados
+    """
+    combined = None
+    report = {"response_time": {}, "percentiles": {}, "histograms": {}}
+    for api, histogram in histograms.items():
+        report["response_time"][api] = round(histogram.mean, 2)
+        report["percentiles"][api] = histogram.summary(percentiles)
+        report["histograms"][api] = histogram.to_dict()
+        if combined is None:
+            combined = LatencyHistogram(*histogram.config)
+        combined.merge(histogram)
+    report["global_percentiles"] = combined.summary(percentiles) if combined is not None else {}
+    return report
@@ -0,0 +1,310 @@
+"""
+Instrumentación de las fases del simulador
+
+Temporizadores (histogramas), contadores y medidores en memoria para las
+fases de una ejecución: evaluación del modelo, salida en consola, guardado
+del JSON y gráficos. Opcionalmente captura un perfil de cProfile y el pico de
+memoria de tracemalloc por ejecución. Las métricas se exportan en formato de
+texto de Prometheus (archivo o endpoint HTTP /metrics local) o como JSON con
+la estructura de métricas de OTLP.
+
+Está desactivada por defecto: phase() devuelve un contexto vacío compartido
+y los métodos decorados con instrumented() sólo comprueban un atributo antes
+de llamar a la función original.
+
+El registro se actualiza desde el hilo de la simulación mientras el servidor
+de serve() lo lee desde los suyos: todas las escrituras se hacen bajo un
+cerrojo y las exportaciones trabajan sobre una instantánea tomada con él.
+"""
+import functools
+import threading
+import time
+from contextlib import nullcontext
+
+# Límites superiores (segundos) de los intervalos de los histogramas de tiempo
+BUCKETS = (1e-5, 1e-4, 1e-3, 1e-2, 0.1, 1.0, 10.0, 60.0)
+
+SERVICE_NAME = "nequi-load-simulator"
+
+_NULL = nullcontext()
+
+
+class Registry:
+    """Métricas acumuladas del proceso"""
+
+    def __init__(self):
+        self.enabled = False
+        self.profile_dir = None
+        self.trace_memory = False
+        self.start_time_ns = time.time_ns()
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Borra todas las métricas acumuladas"""
+        with self._lock:
+            # (nombre, etiquetas) → [contadores por intervalo..., suma]
+            self.histograms = {}
+            self.counters = {}
+            self.gauges = {}
+            self._runs = 0
+
+    def observe(self, name, seconds, labels=()):
+        """Registra una duración en el histograma `name`"""
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            i = len(BUCKETS)
+        with self._lock:
+            values = self.histograms.get((name, labels))
+            if values is None:
+                values = self.histograms[(name, labels)] = [0] * (len(BUCKETS) + 1) + [0.0]
+            values[i] += 1
+            values[-1] += seconds
+
+    def inc(self, name, value=1, labels=()):
+        """Incrementa el contador `name`"""
+        with self._lock:
+            self.counters[(name, labels)] = self.counters.get((name, labels), 0) + value
+
+    def set(self, name, value, labels=()):
+        """Fija el valor del medidor `name`"""
+        with self._lock:
+            self.gauges[(name, labels)] = value
+
+    def next_run(self):
+        """Numera una nueva ejecución (1, 2, ...)"""
+        with self._lock:
+            self._runs += 1
+            return self._runs
+
+    def snapshot(self):
+        """
+        Copia coherente de las métricas para exportarlas sin bloquear la simulación
+
+        Returns:
+            tuple: (histogramas, contadores, medidores), listas de ((nombre, etiquetas), valor);
+                los valores de los histogramas son copias de sus listas
+        """
+        with self._lock:
+            return ([(key, list(values)) for key, values in self.histograms.items()],
+                    list(self.counters.items()), list(self.gauges.items()))
+
+
+registry = Registry()
+
+
+def enable(profile_dir=None, trace_memory=False):
+    """
+    Activa la instrumentación
+
+    Args:
+        profile_dir (str): Si se indica, guarda un perfil de cProfile por ejecución (run-<n>.prof)
+        trace_memory (bool): Registra el pico de memoria de cada ejecución con tracemalloc
+    """
+    registry.enabled = True
+    registry.profile_dir = profile_dir
+    registry.trace_memory = trace_memory
+
+
+def disable():
+    """Desactiva la instrumentación (las métricas acumuladas se conservan)"""
+    registry.enabled = False
+
+
+class _Phase:
+    """Mide la duración de un bloque y la registra en simulator_phase_seconds"""
+
+    __slots__ = ("labels", "start")
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe("simulator_phase_seconds", time.perf_counter() - self.start, self.labels)
+        return False
+
+
+def phase(name, **labels):
+    """
+    Contexto que mide una fase; sin instrumentación activa no hace nada
+
+    Args:
+        name (str): Fase ("model", "events", "display", "save", "plot"...)
+        **labels: Etiquetas adicionales, por ejemplo engine="events"
+    """
+    if not registry.enabled:
+        return _NULL
+    return _Phase((("phase", name),) + tuple(sorted(labels.items())))
+
+
+def instrumented(name):
+    """Decorador que mide cada llamada como la fase `name`"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return function(*args, **kwargs)
+            with _Phase((("phase", name),)):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+class _RunCapture:
+    """Cuenta la ejecución y, si se pidió, captura su perfil y su pico de memoria"""
+
+    def __init__(self, engine, users):
+        self.engine = engine
+        self.users = users
+        self.profiler = None
+
+    def __enter__(self):
+        self.index = registry.next_run()
+        labels = (("engine", self.engine),)
+        registry.inc("simulator_runs_total", labels=labels)
+        registry.inc("simulator_users_simulated_total", self.users, labels=labels)
+
+        if registry.trace_memory:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        if registry.profile_dir:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        labels = (("engine", self.engine),)
+        registry.observe("simulator_run_seconds", time.perf_counter() - self.start, labels)
+        if self.profiler is not None:
+            import os
+            self.profiler.disable()
+            os.makedirs(registry.profile_dir, exist_ok=True)
+            self.profiler.dump_stats(os.path.join(registry.profile_dir, f"run-{self.index}.prof"))
+        if registry.trace_memory:
+            import tracemalloc
+            registry.set("simulator_run_peak_memory_bytes", tracemalloc.get_traced_memory()[1], labels)
+        return False
+
+
+def capture_run(engine, users):
+    """Contexto de una ejecución completa; sin instrumentación activa no hace nada"""
+    if not registry.enabled:
+        return _NULL
+    return _RunCapture(engine, users)
+
+
+def _label_text(labels, extra=()):
+    items = list(labels) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}"
+
+
+def prometheus_text():
+    """Métricas en el formato de exposición de texto de Prometheus"""
+    histograms, counters, gauges = registry.snapshot()
+    lines = []
+    for kind, metrics in (("counter", counters), ("gauge", gauges)):
+        for name in sorted({name for (name, _), _ in metrics}):
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in metrics:
+                if metric == name:
+                    lines.append(f"{name}{_label_text(labels)} {value}")
+
+    for name in sorted({name for (name, _), _ in histograms}):
+        lines.append(f"# TYPE {name} histogram")
+        for (metric, labels), values in histograms:
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), values[:-1]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_label_text(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(labels)} {values[-1]}")
+            lines.append(f"{name}_count{_label_text(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def _attributes(labels):
+    return [{"key": key, "value": {"stringValue": str(value)}} for key, value in labels]
+
+
+def otlp_metrics():
+    """Métricas con la estructura JSON de OTLP (ExportMetricsServiceRequest)"""
+    now = str(time.time_ns())
+    start = str(registry.start_time_ns)
+    histograms, counters, gauges = registry.snapshot()
+    metrics = {}
+
+    for (name, labels), value in counters:
+        metric = metrics.setdefault(name, {"name": name, "sum": {
+            "aggregationTemporality": 2, "isMonotonic": True, "dataPoints": []}})
+        metric["sum"]["dataPoints"].append({"attributes": _attributes(labels), "startTimeUnixNano": start,
+                                            "timeUnixNano": now, "asInt": str(value)})
+    for (name, labels), value in gauges:
+        metric = metrics.setdefault(name, {"name": name, "gauge": {"dataPoints": []}})
+        metric["gauge"]["dataPoints"].append({"attributes": _attributes(labels), "timeUnixNano": now,
+                                              "asDouble": float(value)})
+    for (name, labels), values in histograms:
+        metric = metrics.setdefault(name, {"name": name, "unit": "s", "histogram": {
+            "aggregationTemporality": 2, "dataPoints": []}})
+        metric["histogram"]["dataPoints"].append({
+            "attributes": _attributes(labels), "startTimeUnixNano": start, "timeUnixNano": now,
+            "count": str(sum(values[:-1])), "sum": values[-1],
+            "bucketCounts": [str(count) for count in values[:-1]], "explicitBounds": list(BUCKETS)})
+
+    return {"resourceMetrics": [{
+        "resource": {"attributes": _attributes([("service.name", SERVICE_NAME)])},
+        "scopeMetrics": [{"scope": {"name": "instrumentation"}, "metrics": list(metrics.values())}],
+    }]}
+
+
+def write_metrics(filename):
+    """Guarda las métricas: texto de Prometheus si el archivo termina en .prom, si no JSON de OTLP"""
+    import json
+
+    with open(filename, "w", encoding="utf-8") as f:
+        if filename.endswith(".prom"):
+            f.write(prometheus_text())
+        else:
+            json.dump(otlp_metrics(), f, indent=2)
+    return filename
+
+
+def serve(port=9464, host="127.0.0.1"):
+    """
+    Expone /metrics en formato Prometheus desde un hilo en segundo plano
+
+    Returns:
+        ThreadingHTTPServer: Servidor en marcha (shutdown() para detenerlo)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,475 @@
+"""
+Generador de carga HTTP real contra las APIs de FinancialLoadTestSimulator.apis
+
+Modelo abierto: las peticiones llegan según un proceso de Poisson a la tasa
+indicada, independientemente de lo que tarde el servidor. Un conjunto fijo de
+conexiones keep-alive atiende una cola acotada; si la cola se llena la
+petición se descarta y se cuenta como sobrecarga del cliente. La latencia se
+mide desde el instante en que la petición debía salir, así que incluye la
+espera en la cola del cliente (sin omisión coordinada).
+
+Las respuestas se leen según HTTP/1.1 (Content-Length, Transfer-Encoding:
+chunked o cuerpo hasta el cierre de la conexión), así que las conexiones
+keep-alive no se desincronizan contra servidores reales.
+"""
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from histogram import LatencyHistogram, LatencyRecorder, summarize_histograms
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Cuerpos de ejemplo para las APIs que reciben datos
+_BODIES = {
+    "auth": {"grant_type": "client_credentials", "scope": "nequi"},
+    "p2p": {"amount": 25000, "currency": "COP", "destination": "3001234567"},
+    "qr": {"amount": 18000, "qrCode": "NEQUI-QR-0001"},
+    "withdrawal": {"amount": 50000, "channel": "ATM"},
+}
+
+# Códigos para errores del lado del cliente (no hay respuesta HTTP)
+CLIENT_ERRORS = {
+    "overloaded": (0, "Client Overloaded"),
+    "connection": (0, "Connection Error"),
+    "timeout": (0, "Client Timeout"),
+    "unsent": (0, "Not Completed Before Shutdown"),
+}
+
+# Códigos de estado que nunca llevan cuerpo
+_NO_BODY = (204, 304)
+
+
+def _header(lowered, name):
+    """Valor de la cabecera `name` (en minúsculas y con ':') de un bloque de cabeceras en minúsculas"""
+    position = lowered.find(b"\r\n" + name)
+    if position < 0:
+        return None
+    start = position + 2 + len(name)
+    return lowered[start:lowered.index(b"\r\n", start)].strip()
+
+
+async def _read_chunked(reader):
+    """Consume un cuerpo con Transfer-Encoding: chunked, trailers incluidos"""
+    while True:
+        line = await reader.readuntil(b"\r\n")
+        size = int(line.split(b";", 1)[0], 16)
+        if size == 0:
+            while await reader.readuntil(b"\r\n") != b"\r\n":
+                pass
+            return
+        await reader.readexactly(size + 2)
+
+
+class HttpLoadGenerator:
+    """Driver asyncio de carga HTTP con un pool de conexiones keep-alive"""
+
+    def __init__(self, apis, base_url, connections=256, max_pending=10000, timeout=30.0, think_time=5.0,
+                 significant_digits=3):
+        """
+        Args:
+            apis (dict): APIs del simulador (FinancialLoadTestSimulator.apis)
+            base_url (str): URL base del servicio, por ejemplo http://127.0.0.1:8080
+            connections (int): Conexiones keep-alive, es decir, peticiones concurrentes máximas
+            max_pending (int): Peticiones esperando conexión antes de descartarse
+            timeout (float): Segundos máximos por petición
+            think_time (float): Tiempo de reflexión usado para derivar la tasa a partir de los usuarios
+            significant_digits (int): Precisión de los histogramas de latencia (cifras significativas)
+        """
+        self.apis = apis
+        self.api_keys = list(apis)
+        self.base_url = base_url
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.ssl = url.scheme == "https"
+        self.port = url.port or (443 if self.ssl else 80)
+        self.prefix = url.path.rstrip("/")
+        self.connections = connections
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.think_time = think_time
+        self.significant_digits = significant_digits
+
+    def _build_requests(self, rng, variants=64):
+        """Precalcula los bytes de cada petición; las rutas con parámetros tienen varias variantes"""
+        prepared = []
+        for key in self.api_keys:
+            api = self.apis[key]
+            body = json.dumps(_BODIES[key]).encode() if key in _BODIES and api["method"] != "GET" else b""
+            count = variants if "{" in api["path"] else 1
+            options = []
+            for account in rng.integers(10 ** 9, 10 ** 10, count).tolist():
+                path = self.prefix + api["path"].replace("{accountId}", str(account))
+                head = (f"{api['method']} {path} HTTP/1.1\r\n"
+                        f"Host: {self.host}:{self.port}\r\n"
+                        f"Connection: keep-alive\r\n"
+                        f"Content-Type: application/json\r\n"
+                        f"Content-Length: {len(body)}\r\n\r\n")
+                options.append(head.encode() + body)
+            prepared.append(options)
+        return prepared
+
+    async def _dispatch(self, queue, rate, duration, cum_weights, rng, stats):
+        """Genera llegadas de Poisson y las encola; si la cola está llena se descartan"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        end = start + duration
+        gaps = iter(())
+        choices = iter(())
+        next_time = start
+
+        while next_time < end:
+            now = loop.time()
+            while next_time <= now and next_time < end:
+                try:
+                    api = next(choices)
+                except StopIteration:
+                    choices = iter(np.searchsorted(cum_weights, rng.random(8192), side="right").tolist())
+                    api = next(choices)
+                stats["requests"][api] += 1
+                try:
+                    queue.put_nowait((api, next_time))
+                except asyncio.QueueFull:
+                    stats["client_errors"][api]["overloaded"] += 1
+                try:
+                    next_time += next(gaps)
+                except StopIteration:
+                    gaps = iter(rng.exponential(1 / rate, 8192).tolist())
+                    next_time += next(gaps)
+            await asyncio.sleep(max(0.0, next_time - loop.time()))
+
+    async def _worker(self, slot, queue, prepared, stats, rng, inflight):
+        """Atiende la cola con una conexión keep-alive, reconectando si se cierra"""
+        loop = asyncio.get_running_loop()
+        reader = writer = None
+        latencies = stats["latencies"]
+        statuses = stats["statuses"]
+        client_errors = stats["client_errors"]
+        picks = iter(())
+        api = None
+
+        try:
+            while True:
+                api = None
+                item = await queue.get()
+                if item is None:
+                    break
+                api, intended = item
+                options = prepared[api]
+                if len(options) == 1:
+                    request = options[0]
+                else:
+                    try:
+                        request = options[next(picks)]
+                    except StopIteration:
+                        picks = iter(rng.integers(0, len(options), 4096).tolist())
+                        request = options[next(picks)]
+
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.wait_for(
+                            asyncio.open_connection(self.host, self.port, ssl=self.ssl or None), self.timeout)
+                    # El vigilante cierra la conexión si la petición supera el timeout
+                    inflight[slot] = [loop.time(), writer, False]
+                    writer.write(request)
+                    head = await reader.readuntil(b"\r\n\r\n")
+                    status = int(head[9:12])
+                    lowered = head.lower()
+                    close = b"connection: close" in lowered
+                    # Transfer-Encoding manda sobre Content-Length; sin ninguno de los dos el
+                    # cuerpo termina al cerrarse la conexión
+                    encoding = _header(lowered, b"transfer-encoding:") if b"transfer-encoding:" in lowered else None
+                    length = _header(lowered, b"content-length:") if encoding is None else None
+                    if encoding is not None and encoding.endswith(b"chunked"):
+                        await _read_chunked(reader)
+                    elif length is not None:
+                        length = int(length)
+                        if length:
+                            await reader.readexactly(length)
+                    elif status >= 200 and status not in _NO_BODY:
+                        await reader.read()
+                        close = True
+                    if close:
+                        writer.close()
+                        reader = writer = None
+                except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                        ValueError):
+                    timed_out = inflight[slot] is not None and inflight[slot][2]
+                    client_errors[api]["timeout" if timed_out else "connection"] += 1
+                    if timed_out:
+                        latencies[api].append(loop.time() - intended)
+                    if writer is not None:
+                        writer.close()
+                    reader = writer = None
+                    inflight[slot] = None
+                    continue
+
+                inflight[slot] = None
+                latencies[api].append(loop.time() - intended)
+                statuses[api][status] += 1
+        finally:
+            # Cancelado al terminar la prueba con una petición en curso: ya estaba contada en requests
+            if api is not None:
+                client_errors[api]["unsent"] += 1
+            if writer is not None:
+                writer.close()
+
+    async def _watchdog(self, inflight):
+        """Cierra las conexiones cuya petición lleva más de timeout segundos en curso"""
+        loop = asyncio.get_running_loop()
+        interval = min(1.0, self.timeout / 4)
+        while True:
+            await asyncio.sleep(interval)
+            deadline = loop.time() - self.timeout
+            for state in inflight:
+                if state is not None and not state[2] and state[0] < deadline:
+                    state[2] = True
+                    state[1].transport.abort()
+
+    def _interval_delta(self, stats):
+        """
+        Métricas acumuladas desde el intervalo anterior, listas para enviarse como JSON
+
+        Los histogramas del intervalo se vacían y se suman a stats["totals"],
+        de modo que los resultados finales siguen incluyendo toda la prueba.
+        """
+        previous = stats["previous"]
+        delta = {"index": previous["index"], "requests": [], "statuses": [], "client_errors": [], "histograms": []}
+        previous["index"] += 1
+        for i, recorder in enumerate(stats["latencies"]):
+            delta["requests"].append(stats["requests"][i] - previous["requests"][i])
+            previous["requests"][i] = stats["requests"][i]
+            for key in ("statuses", "client_errors"):
+                counts = stats[key][i] - previous[key][i]
+                delta[key].append({str(code): count for code, count in counts.items()})
+                previous[key][i] = stats[key][i].copy()
+
+            histogram = recorder.flush()
+            delta["histograms"].append(histogram.to_dict() if histogram.total else None)
+            stats["totals"][i].merge(histogram)
+            recorder.histogram = LatencyHistogram(histogram.highest, histogram.significant_digits, histogram.unit)
+        return delta
+
+    async def _report(self, stats, interval, callback):
+        """Entrega a callback las métricas de cada intervalo mientras dura la prueba"""
+        loop = asyncio.get_running_loop()
+        next_time = loop.time() + interval
+        while True:
+            await asyncio.sleep(max(0.0, next_time - loop.time()))
+            callback(self._interval_delta(stats))
+            next_time += interval
+
+    async def run(self, users, distribution, rate=None, duration=10.0, seed=None, interval=None, on_interval=None):
+        """
+        Ejecuta la prueba de carga
+
+        Args:
+            users (int): Usuarios del escenario; si no se indica rate se usa users / think_time
+            distribution (dict): Distribución de peticiones por API (porcentajes)
+            rate (float): Peticiones por segundo del modelo abierto
+            duration (float): Segundos durante los que se generan llegadas
+            seed (int): Semilla de las llegadas y la elección de APIs
+            interval (float): Segundos entre entregas a on_interval
+            on_interval (callable): Si se indica, recibe cada `interval` segundos (y una
+                última vez al terminar) un dict con las peticiones, códigos, errores del
+                cliente e histogramas serializados del intervalo, por API
+
+        Returns:
+            dict: Resultados con la forma de _calculate_results más percentiles,
+                histogramas, total de peticiones y rendimiento medido
+        """
+        weights = np.array([distribution.get(api, 0) for api in self.api_keys], dtype=np.float64)
+        if weights.sum() <= 0:
+            raise ValueError("La distribución debe asignar tráfico al menos a una API")
+        cum_weights = np.cumsum(weights / weights.sum())
+        cum_weights[-1] = 1.0
+        rate = rate or users / self.think_time
+
+        rng = np.random.default_rng(seed)
+        stats, wall, cpu = await self._drive(
+            lambda queue, stats: self._dispatch(queue, rate, duration, cum_weights, rng, stats), rng,
+            interval, on_interval)
+        return self._build_results(users, distribution, rate, wall, cpu, stats)
+
+    async def replay(self, arrivals, speed=1.0, seed=None, interval=None, on_interval=None):
+        """
+        Reproduce una traza: cada petición sale en su instante original dividido por speed
+
+        Args:
+            arrivals (iterable): Bloques (segundos desde el inicio de la traza, índice de API
+                en el orden de apis) como arrays de NumPy; se consumen a medida que se envían
+            speed (float): Factor de aceleración (2 reproduce la traza en la mitad de tiempo)
+            seed (int): Semilla de las variantes de las rutas con parámetros
+            interval (float): Segundos entre entregas a on_interval
+            on_interval (callable): Ver run()
+
+        Returns:
+            dict: Resultados como run(); los usuarios son los equivalentes a la tasa
+                media reproducida y la distribución es la observada
+        """
+        rng = np.random.default_rng(seed)
+        stats, wall, cpu = await self._drive(
+            lambda queue, stats: self._dispatch_trace(queue, arrivals, speed, stats), rng, interval, on_interval)
+
+        total = sum(stats["requests"])
+        rate = total / wall if wall else 0.0
+        distribution = {api: round(100 * stats["requests"][i] / total, 2) if total else 0.0
+                        for i, api in enumerate(self.api_keys)}
+        return self._build_results(round(rate * self.think_time), distribution, rate, wall, cpu, stats)
+
+    async def _dispatch_trace(self, queue, arrivals, speed, stats):
+        """Encola las peticiones de la traza en su instante; si la cola está llena se descartan"""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        requests = stats["requests"]
+        client_errors = stats["client_errors"]
+        sent = 0
+        for offsets, apis in arrivals:
+            for when, api in zip((start + np.asarray(offsets) / speed).tolist(), np.asarray(apis).tolist()):
+                delay = when - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif sent & 255 == 0:
+                    # Con retraso acumulado también se cede el bucle para que salgan las peticiones
+                    await asyncio.sleep(0)
+                sent += 1
+                requests[api] += 1
+                try:
+                    queue.put_nowait((api, when))
+                except asyncio.QueueFull:
+                    client_errors[api]["overloaded"] += 1
+
+    async def _drive(self, dispatch, rng, interval=None, on_interval=None):
+        """
+        Arranca las conexiones, ejecuta dispatch(queue, stats) y espera a que se vacíe la cola
+
+        Returns:
+            tuple: (estadísticas, segundos de reloj, % de CPU del proceso)
+        """
+        prepared = self._build_requests(rng)
+        n_apis = len(self.api_keys)
+        stats = {
+            "requests": [0] * n_apis,
+            "latencies": [LatencyRecorder(LatencyHistogram(self.timeout * 4, self.significant_digits))
+                          for _ in range(n_apis)],
+            "statuses": [Counter() for _ in range(n_apis)],
+            "client_errors": [Counter() for _ in range(n_apis)],
+        }
+        reporter = None
+        if on_interval is not None:
+            stats["previous"] = {"index": 0, "requests": [0] * n_apis, "statuses": [Counter() for _ in range(n_apis)],
+                                 "client_errors": [Counter() for _ in range(n_apis)]}
+            stats["totals"] = [LatencyHistogram(self.timeout * 4, self.significant_digits) for _ in range(n_apis)]
+            reporter = asyncio.create_task(self._report(stats, interval or 1.0, on_interval))
+
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+
+        # Una sola tarea vigila los timeouts: evita un asyncio.wait_for por petición
+        inflight = [None] * self.connections
+        watchdog = asyncio.create_task(self._watchdog(inflight))
+        workers = [asyncio.create_task(self._worker(slot, queue, prepared, stats, rng, inflight))
+                   for slot in range(self.connections)]
+        await dispatch(queue, stats)
+
+        # Vaciar la cola: cada trabajador termina al recibir su centinela
+        for _ in workers:
+            await queue.put(None)
+        done, pending = await asyncio.wait(workers, timeout=self.timeout)
+        for task in pending:
+            task.cancel()
+        watchdog.cancel()
+        await asyncio.gather(*pending, watchdog, return_exceptions=True)
+
+        # Las peticiones que siguen en la cola se contaron en requests: cuentan como error
+        while not queue.empty():
+            item = queue.get_nowait()
+            if item is not None:
+                stats["client_errors"][item[0]]["unsent"] += 1
+
+        if reporter is not None:
+            reporter.cancel()
+            await asyncio.gather(reporter, return_exceptions=True)
+            on_interval(self._interval_delta(stats))
+            for recorder, total in zip(stats["latencies"], stats["totals"]):
+                recorder.histogram = total
+
+        wall = time.perf_counter() - wall_start
+        cpu = 100 * (time.process_time() - cpu_start) / wall
+        return stats, wall, cpu
+
+    def run_sync(self, *args, **kwargs):
+        """Versión síncrona de run()"""
+        return asyncio.run(self.run(*args, **kwargs))
+
+    def _build_results(self, users, distribution, rate, wall, cpu, stats):
+        """Convierte las mediciones al formato de resultados del simulador"""
+        error_rate = {}
+        errors = []
+
+        histograms = {api: stats["latencies"][i].flush() for i, api in enumerate(self.api_keys)}
+        report = summarize_histograms(histograms)
+        response_time = report["response_time"]
+        completed = sum(histogram.total for histogram in histograms.values())
+
+        for i, api in enumerate(self.api_keys):
+            n_errors = 0
+            for status, count in sorted(stats["statuses"][i].items()):
+                if status >= 400:
+                    n_errors += count
+                    try:
+                        message = HTTPStatus(status).phrase
+                    except ValueError:
+                        message = "Unknown"
+                    errors.append({"api": api, "code": status, "message": message, "count": count})
+            for kind, count in stats["client_errors"][i].items():
+                n_errors += count
+                code, message = CLIENT_ERRORS[kind]
+                errors.append({"api": api, "code": code, "message": message, "count": count})
+
+            requests = stats["requests"][i]
+            error_rate[api] = round(100 * n_errors / requests, 2) if requests else 0.0
+
+        # Métricas del equipo generador: no se conocen las del servidor remoto
+        memory = 0.0
+        if resource is not None:
+            total_memory_kb = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 1024
+            memory = 100 * resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / total_memory_kb
+
+        valid_response_times = [rt for api, rt in response_time.items() if distribution.get(api, 0) > 0]
+        valid_error_rates = [er for api, er in error_rate.items() if distribution.get(api, 0) > 0]
+        avg_response_time = sum(valid_response_times) / len(valid_response_times) if valid_response_times else 0
+        avg_error_rate = sum(valid_error_rates) / len(valid_error_rates) if valid_error_rates else 0
+
+        return {
+            "response_time": response_time,
+            "error_rate": error_rate,
+            "system_metrics": {
+                "cpu": round(min(100, cpu), 1),
+                "memory": round(min(100, memory), 1)
+            },
+            "errors": errors,
+            "total_users": users,
+            "avg_response_time": round(avg_response_time, 2),
+            "avg_error_rate": round(avg_error_rate, 2),
+            "distribution": distribution,
+            "engine": "http",
+            "base_url": self.base_url,
+            "target_rate": round(rate, 1),
+            "duration": round(wall, 3),
+            "total_requests": sum(stats["requests"]),
+            "throughput": round(completed / wall, 1),
+            "percentiles": report["percentiles"],
+            "global_percentiles": report["global_percentiles"],
+            "histograms": report["histograms"]
+        }
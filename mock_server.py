@@ -0,0 +1,413 @@
+"""
+Servidor HTTP local que imita las APIs de FinancialLoadTestSimulator.apis
+
+Permite probar el generador de carga sin depender de la red:
+    python mock_server.py --port 8080
+
+Cada API tiene un limitador de tasa token bucket (429), un número fijo de
+trabajadores con una cola de espera acotada (503 si está llena, 504 si la
+espera supera el timeout del gateway) y, opcionalmente, latencia y errores
+inyectados con las mismas curvas que _calculate_results, evaluadas con los
+usuarios equivalentes a la tasa de llegada observada.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import random
+import re
+import socket
+import sys
+import time
+from collections import deque
+
+from nequiTestAPI import FinancialLoadTestSimulator
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 429: "Too Many Requests",
+            500: "Internal Server Error", 503: "Service Unavailable", 504: "Gateway Timeout"}
+
+# Límite de peticiones por segundo de cada API (token bucket)
+DEFAULT_RATE_LIMITS = {"auth": 2000, "balance": 4000, "p2p": 3000, "qr": 2000, "withdrawal": 1000}
+
+# Peticiones atendidas en paralelo por cada API
+DEFAULT_WORKERS = {"auth": 200, "balance": 400, "p2p": 300, "qr": 200, "withdrawal": 100}
+
+
+def _response(status, body, keep_alive=True):
+    """Construye una respuesta HTTP/1.1 completa en bytes (keep-alive salvo que se indique)"""
+    payload = json.dumps(body, separators=(",", ":")).encode()
+    head = (f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode() + payload
+
+
+class RouteTable:
+    """
+    Resuelve (método, ruta) a la clave de API
+
+    Las rutas sin parámetros se buscan en un dict; las que tienen plantillas
+    como {accountId} se comprueban con expresiones regulares precompiladas.
+    """
+
+    def __init__(self, apis):
+        self.exact = {}
+        self.templated = []
+        for key, api in apis.items():
+            path = api["path"]
+            if "{" in path:
+                pattern = re.sub(r"\\\{[^/]+?\\\}", r"[^/]+", re.escape(path))
+                self.templated.append((re.compile(pattern + "$"), api["method"], key))
+            else:
+                self.exact[path] = (api["method"], key)
+
+    def match(self, method, path):
+        """
+        Devuelve (clave de API, estado HTTP)
+
+        El estado es 200 si la ruta y el método coinciden, 405 si sólo coincide
+        la ruta y 404 si la ruta no existe.
+        """
+        path = path.split("?", 1)[0]
+        found = self.exact.get(path)
+        if found is None:
+            for pattern, api_method, key in self.templated:
+                if pattern.match(path):
+                    found = (api_method, key)
+                    break
+        if found is None:
+            return None, 404
+        api_method, key = found
+        return key, 200 if api_method == method else 405
+
+
+class TokenBucket:
+    """Limitador de tasa: rate fichas por segundo con capacidad máxima burst"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def take(self, now):
+        """Consume una ficha si hay disponible. Devuelve False si hay que rechazar"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class _ApiState:
+    """Limitador, trabajadores ocupados y cola de espera de una API"""
+
+    __slots__ = ("bucket", "workers", "busy", "waiting", "queue_limit")
+
+    def __init__(self, rate_limit, workers, queue_limit):
+        self.bucket = TokenBucket(rate_limit)
+        self.workers = workers
+        self.busy = 0
+        self.waiting = deque()
+        self.queue_limit = queue_limit
+
+
+class MockNequiServer:
+    """Servidor asyncio que imita las APIs declaradas con saturación realista"""
+
+    def __init__(self, apis=None, host="127.0.0.1", port=8080, rate_limits=None, workers=None, queue_factor=4.0,
+                 gateway_timeout=5.0, time_scale=0.01, think_time=5.0, inject=True, window=1.0, seed=None):
+        """
+        Args:
+            apis (dict): APIs a servir (por defecto las de FinancialLoadTestSimulator)
+            host (str): Interfaz de escucha
+            port (int): Puerto de escucha
+            rate_limits (dict): Peticiones por segundo admitidas por API
+            workers (dict): Trabajadores concurrentes por API
+            queue_factor (float): Cola de espera máxima como múltiplo de los trabajadores
+            gateway_timeout (float): Segundos máximos de espera en cola antes de responder 504
+            time_scale (float): Factor aplicado a los tiempos del modelo (0.01 → 1.2s pasan a 12ms)
+            think_time (float): Tiempo de reflexión para convertir tasa observada en usuarios equivalentes
+            inject (bool): Inyectar latencia y errores según las curvas del modelo
+            window (float): Segundos entre recálculos de la carga observada
+            seed (int): Semilla de la variación aleatoria
+        """
+        self.simulator = FinancialLoadTestSimulator()
+        self.apis = apis or self.simulator.apis
+        self.host = host
+        self.port = port
+        self.routes = RouteTable(self.apis)
+        rate_limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+        workers = {**DEFAULT_WORKERS, **(workers or {})}
+        self.state = {key: _ApiState(rate_limits.get(key, 1000), workers.get(key, 100),
+                                     int(workers.get(key, 100) * queue_factor)) for key in self.apis}
+        self.gateway_timeout = gateway_timeout
+        self.time_scale = time_scale
+        self.think_time = think_time
+        self.inject = inject
+        self.window = window
+        self.random = random.Random(seed)
+
+        self.requests = 0
+        self.status_counts = {}
+        self.equivalent_users = 0
+        # Curvas del modelo en el punto de carga actual: API → (latencia en s, probabilidad de error, códigos)
+        self.curves = {}
+        self._update_curves(0)
+
+        # Respuestas precalculadas: el servidor no debe ser el cuello de botella
+        self.ok_responses = {key: _response(200, {"status": "SUCCESS", "api": key}) for key in self.apis}
+        self.error_responses = {code: _response(code, {"status": "ERROR", "message": _REASONS[code]})
+                                for code in (404, 405, 429, 500, 503, 504)}
+        self._server = None
+        self._monitor = None
+
+    def _update_curves(self, users):
+        """Evalúa _calculate_results con los usuarios equivalentes a la carga observada"""
+        self.equivalent_users = users
+        model = self.simulator._calculate_results(max(1, users), {key: 1 for key in self.apis}, rng=self.random)
+        for key in self.apis:
+            error_pct = model["error_rate"].get(key, 0.5)
+            # Mismos umbrales que los errores que reporta _calculate_results
+            codes = [500]
+            if error_pct > 5:
+                codes = [429]
+            if error_pct > 15:
+                codes.append(504)
+            if error_pct > 25:
+                codes += [503, 500]
+            latency = model["response_time"].get(key, 1.0) * self.time_scale
+            self.curves[key] = (latency, min(1.0, error_pct / 100), codes)
+
+    async def _observe_load(self):
+        """Recalcula periódicamente la carga equivalente a partir de la tasa de llegada"""
+        previous = self.requests
+        while True:
+            await asyncio.sleep(self.window)
+            rate = (self.requests - previous) / self.window
+            previous = self.requests
+            self._update_curves(int(rate * self.think_time))
+
+    def _count(self, status):
+        self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    async def handle_request(self, api, status):
+        """Devuelve los bytes de la respuesta para una petición ya enrutada"""
+        if status != 200:
+            self._count(status)
+            return self.error_responses[status]
+
+        state = self.state[api]
+        loop = asyncio.get_running_loop()
+        arrival = loop.time()
+
+        # Limitador de tasa
+        if not state.bucket.take(time.monotonic()):
+            self._count(429)
+            return self.error_responses[429]
+
+        # Trabajadores ocupados: esperar turno en una cola acotada
+        if state.busy >= state.workers:
+            if len(state.waiting) >= state.queue_limit:
+                self._count(503)
+                return self.error_responses[503]
+            turn = loop.create_future()
+            state.waiting.append(turn)
+            try:
+                await turn
+            except asyncio.CancelledError:
+                if turn.done() and not turn.cancelled():
+                    # El turno llegó justo antes de la cancelación: hay que cederlo
+                    self._release(state)
+                elif turn in state.waiting:
+                    state.waiting.remove(turn)
+                raise
+            if loop.time() - arrival > self.gateway_timeout:
+                self._release(state)
+                self._count(504)
+                return self.error_responses[504]
+        else:
+            state.busy += 1
+
+        try:
+            latency, error_probability, codes = self.curves[api]
+            rnd = self.random.random
+            if not self.inject:
+                latency = 0.0
+            if latency > 0:
+                await asyncio.sleep(latency * (0.9 + 0.2 * rnd()))
+            if self.inject and rnd() < error_probability:
+                code = codes[int(rnd() * len(codes))]
+                self._count(code)
+                return self.error_responses[code]
+        finally:
+            self._release(state)
+
+        self._count(200)
+        return self.ok_responses[api]
+
+    @staticmethod
+    def _release(state):
+        """Cede el trabajador al siguiente en espera o lo deja libre"""
+        while state.waiting:
+            turn = state.waiting.popleft()
+            if not turn.done():
+                turn.set_result(None)
+                return
+        state.busy -= 1
+
+    def stats(self):
+        """Contadores del servidor"""
+        return {
+            "requests": self.requests,
+            "status": {str(code): count for code, count in sorted(self.status_counts.items())},
+            "equivalent_users": self.equivalent_users,
+            "busy": {key: state.busy for key, state in self.state.items()},
+            "waiting": {key: len(state.waiting) for key, state in self.state.items()},
+        }
+
+    async def _handle_connection(self, reader, writer):
+        """Atiende las peticiones de una conexión keep-alive hasta que el cliente la cierre"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    writer.write(_response(400, {"error": "Request header too large"}, keep_alive=False))
+                    await writer.drain()
+                    break
+
+                request_line, _, headers = head.partition(b"\r\n")
+                try:
+                    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                    # Descartar el cuerpo de la petición
+                    length = 0
+                    for line in headers.split(b"\r\n"):
+                        if line[:15].lower() == b"content-length:":
+                            length = int(line[15:])
+                            break
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    # Línea de petición o Content-Length no válidos: no se puede seguir leyendo la conexión
+                    writer.write(_response(400, {"error": "Malformed request"}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if length:
+                    await reader.readexactly(length)
+
+                if path == "/__stats":
+                    writer.write(_response(200, self.stats()))
+                else:
+                    self.requests += 1
+                    api, status = self.routes.match(method, path)
+                    writer.write(await self.handle_request(api, status))
+                # Con un cliente lento el búfer de escritura no crece sin límite
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        """Empieza a aceptar conexiones. Devuelve el puerto efectivo"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  reuse_address=True, backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._monitor = asyncio.create_task(self._observe_load())
+        return self.port
+
+    async def serve_forever(self):
+        """Arranca el servidor y lo mantiene hasta que se cancele"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Deja de aceptar conexiones"""
+        if self._monitor is not None:
+            self._monitor.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+def _free_port(host):
+    """Reserva un puerto libre del sistema operativo"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def _serve_process(host, port, options):
+    """Punto de entrada del proceso hijo del servidor"""
+    server = MockNequiServer(host=host, port=port, **options)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+def start_process(host="127.0.0.1", port=0, timeout=10.0, **options):
+    """
+    Arranca el servidor en un proceso aparte para no competir por el GIL con el cliente
+
+    Args:
+        host (str): Interfaz de escucha
+        port (int): Puerto (0 elige uno libre)
+        timeout (float): Segundos a esperar a que el puerto acepte conexiones
+        **options: Parámetros adicionales de MockNequiServer
+
+    Returns:
+        tuple: (proceso, url base)
+    """
+    port = port or _free_port(host)
+    process = multiprocessing.Process(target=_serve_process, args=(host, port, options), daemon=True)
+    process.start()
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=0.5):
+                break
+        except OSError:
+            if time.monotonic() > deadline or not process.is_alive():
+                process.terminate()
+                raise RuntimeError(f"El servidor simulado no arrancó en {host}:{port}")
+            time.sleep(0.05)
+
+    return process, f"http://{host}:{port}"
+
+
+def main(argv=None):
+    """Arranca el servidor simulado desde la línea de comandos"""
+    parser = argparse.ArgumentParser(description="Servidor local que imita las APIs de Nequi")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--time-scale", type=float, default=0.01, help="Factor sobre los tiempos del modelo")
+    parser.add_argument("--gateway-timeout", type=float, default=5.0)
+    parser.add_argument("--think-time", type=float, default=5.0,
+                        help="Convierte la tasa observada en usuarios equivalentes para las curvas")
+    parser.add_argument("--no-inject", action="store_true", help="Sin latencia ni errores del modelo")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = MockNequiServer(host=args.host, port=args.port, time_scale=args.time_scale,
+                             gateway_timeout=args.gateway_timeout, think_time=args.think_time,
+                             inject=not args.no_inject, seed=args.seed)
+    print(f"Servidor simulado escuchando en http://{args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
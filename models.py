@@ -0,0 +1,474 @@
+"""
+Modelos de rendimiento intercambiables del simulador
+
+Un modelo predice, para un número de usuarios y una distribución de
+peticiones, el tiempo de respuesta medio y la tasa de error de cada API y el
+uso de CPU y memoria. La variación aleatoria y el redondeo los aplica el
+simulador, así que todos los modelos comparten el mismo consumo de números
+aleatorios y las mismas semillas.
+
+- PiecewiseModel: las curvas a tramos originales (umbrales en 1.000 y 10.000
+  usuarios totales). Es el modelo por defecto y reproduce exactamente los
+  resultados anteriores.
+- QueueingModel: cada API es una estación con clientes interactivos cuyo
+  tiempo de respuesta sigue la ley de escalabilidad universal (USL) en función
+  de los usuarios de esa API. Sus parámetros se ajustan con mínimos cuadrados
+  lineales a ejecuciones medidas.
+
+Las predicciones se guardan en una caché compartida por todos los modelos con
+la misma clase y los mismos parámetros: una LRU de puntos para el camino
+escalar y, para los barridos con una distribución común, los usuarios ya
+evaluados de cada distribución, de modo que un barrido posterior en el mismo
+proceso sólo predice los usuarios nuevos. Se conservan las cachés de los
+MAX_CACHED_MODELS modelos usados más recientemente.
+"""
+import json
+from collections import OrderedDict
+
+# Tamaño máximo de la caché de predicciones puntuales de cada (modelo, parámetros)
+CACHE_SIZE = 65536
+
+# Puntos (usuarios, distribución) de barridos guardados por cada (modelo, parámetros)
+BATCH_CACHE_POINTS = 131072
+
+# Modelos distintos cuyas cachés se conservan (los ajustes crean modelos nuevos)
+MAX_CACHED_MODELS = 4
+
+# Cachés por cache_key del modelo, de la usada menos recientemente a la última
+_CACHES = OrderedDict()
+
+
+class _PredictionCache:
+    """Predicciones de un (modelo, parámetros): puntos sueltos y barridos por distribución"""
+
+    def __init__(self):
+        # (usuarios, distribución, apis) → predicción puntual
+        self.points = OrderedDict()
+        # (apis, distribución) → (usuarios ordenados, {métrica: valores})
+        self.rows = OrderedDict()
+        self.row_points = 0
+
+
+def clear_caches():
+    """Vacía las cachés de predicciones de todos los modelos (benchmarks y pruebas en frío)"""
+    _CACHES.clear()
+
+
+def _prediction_cache(cache_key):
+    """Caché de un cache_key, creándola si no existe y descartando la del modelo menos reciente"""
+    cache = _CACHES.get(cache_key)
+    if cache is None:
+        cache = _CACHES[cache_key] = _PredictionCache()
+        if len(_CACHES) > MAX_CACHED_MODELS:
+            _CACHES.popitem(last=False)
+    else:
+        _CACHES.move_to_end(cache_key)
+    return cache
+
+
+class PerformanceModel:
+    """
+    Interfaz de los modelos de rendimiento
+
+    Las subclases implementan predict (vectorizado con NumPy) y, si quieren
+    evitar NumPy en el camino escalar, _predict_point.
+    """
+
+    name = None
+
+    def __init__(self, params=None):
+        # Los parámetros no se modifican tras crear el modelo: ajustar crea un modelo nuevo
+        self.params = dict(params or {})
+        self.cache_key = (self.name, json.dumps(self.params, sort_keys=True))
+
+    def predict(self, users, distributions, apis):
+        """
+        Predice las métricas medias de muchos puntos a la vez
+
+        Args:
+            users (np.ndarray): Usuarios concurrentes por punto, forma (N,)
+            distributions (np.ndarray): Porcentajes por API, forma (N, n_apis)
+            apis (list): Claves de las APIs en el orden de las columnas
+
+        Returns:
+            dict: "response_time" y "error_rate" de forma (N, n_apis), "cpu" y "memory" de forma (N,)
+        """
+        raise NotImplementedError
+
+    def predict_batch(self, users, distributions, apis):
+        """
+        Como predict, pero con una única distribución evalúa cada número de usuarios una sola vez
+
+        Los barridos con réplicas (por ejemplo la bisección de sweep.find_threshold)
+        repiten los mismos puntos: se predicen los valores únicos y se expanden.
+        Además los usuarios ya evaluados con esa distribución en barridos anteriores
+        se toman de la caché del modelo y sólo se predicen los nuevos.
+        """
+        import numpy as np
+
+        # Sólo una distribución común (una fila repetida con stride 0) identifica el barrido
+        if users.size == 0 or distributions.strides[0] != 0:
+            return self.predict(users, distributions, apis)
+
+        # Las mallas de los barridos suelen venir ya ordenadas y sin repetir
+        if users.size > 1 and (users[1:] <= users[:-1]).any():
+            unique, inverse = np.unique(users, return_inverse=True)
+        else:
+            unique, inverse = users, None
+
+        # Un barrido mayor que la caché se predice sin guardarlo
+        if unique.size > BATCH_CACHE_POINTS:
+            batch = self.predict(unique, distributions[:unique.size], apis)
+            return batch if inverse is None else {name: values[inverse] for name, values in batch.items()}
+
+        cache = _prediction_cache(self.cache_key)
+        key = (tuple(apis), tuple(distributions[0].tolist()))
+        entry = cache.rows.get(key)
+        missing = unique
+        if entry is not None:
+            cache.rows.move_to_end(key)
+            known, values = entry
+            if known.size == unique.size and np.array_equal(known, unique):
+                # La misma malla que la guardada: no hace falta buscar posiciones
+                position, missing = None, unique[:0]
+            else:
+                position = np.searchsorted(known, unique)
+                found = known[np.minimum(position, known.size - 1)] == unique
+                missing = unique[~found]
+
+        if missing.size:
+            batch = self.predict(missing, distributions[:missing.size], apis)
+            if entry is None:
+                known, values = missing, batch
+            else:
+                order = np.argsort(np.concatenate([known, missing]), kind="stable")
+                known = np.concatenate([known, missing])[order]
+                values = {name: np.concatenate([values[name], batch[name]])[order] for name in batch}
+                cache.row_points -= entry[0].size
+                del cache.rows[key]
+            cache.rows[key] = (known, values)
+            cache.row_points += known.size
+            while cache.row_points > BATCH_CACHE_POINTS and len(cache.rows) > 1:
+                _, (evicted, _) = cache.rows.popitem(last=False)
+                cache.row_points -= evicted.size
+            position = None if known is missing else np.searchsorted(known, unique)
+
+        # Copias: quien llama puede modificar los arrays sin alterar la caché
+        if position is None:
+            if inverse is None:
+                return {name: column.copy() for name, column in values.items()}
+            position = inverse
+        elif inverse is not None:
+            position = position[inverse]
+        return {name: column[position] for name, column in values.items()}
+
+    def _predict_point(self, users, distribution, apis):
+        """Predicción de un punto; por defecto usa predict con arrays de un elemento"""
+        import numpy as np
+
+        row = np.array([[distribution.get(api, 0) for api in apis]], dtype=np.float64)
+        batch = self.predict(np.array([users], dtype=np.int64), row, apis)
+        return {
+            "response_time": dict(zip(apis, batch["response_time"][0].tolist())),
+            "error_rate": dict(zip(apis, batch["error_rate"][0].tolist())),
+            "cpu": float(batch["cpu"][0]),
+            "memory": float(batch["memory"][0]),
+        }
+
+    def predict_point(self, users, distribution, apis):
+        """
+        Predice las métricas medias de un punto, con caché LRU por (modelo, parámetros)
+
+        Args:
+            users (int): Usuarios concurrentes
+            distribution (dict): Porcentaje de peticiones por API
+            apis (list): Claves de las APIs
+
+        Returns:
+            dict: "response_time" y "error_rate" por API, "cpu" y "memory"
+                (compartido con la caché: no debe modificarse)
+        """
+        # cache_key identifica el modelo y sus parámetros: misma clave → mismas predicciones
+        cache = _prediction_cache(self.cache_key).points
+        key = (users, tuple(distribution.get(api, 0) for api in apis), tuple(apis))
+        prediction = cache.get(key)
+        if prediction is not None:
+            cache.move_to_end(key)
+            return prediction
+
+        prediction = self._predict_point(users, distribution, apis)
+        cache[key] = prediction
+        if len(cache) > CACHE_SIZE:
+            cache.popitem(last=False)
+        return prediction
+
+    def to_dict(self):
+        """Especificación serializable del modelo (tipo y parámetros)"""
+        return {"type": self.name, "params": self.params}
+
+
+class PiecewiseModel(PerformanceModel):
+    """
+    Curvas a tramos basadas en los datos del caso Nequi
+
+    Todas las APIs siguen la misma curva en función de los usuarios totales,
+    escalada por un tiempo base por API.
+    """
+
+    name = "piecewise"
+
+    def __init__(self, params=None):
+        params = {"base_times": {"p2p": 1.2, "auth": 0.8}, "default_base_time": 1.0, **(params or {})}
+        super().__init__(params)
+
+    def _base_time(self, api):
+        return self.params["base_times"].get(api, self.params["default_base_time"])
+
+    def _predict_point(self, users, distribution, apis):
+        # Mismas operaciones y en el mismo orden que predict, para que ambos caminos coincidan
+        if users <= 1000:
+            load_factor = 1.0
+            error_pct = 0.5
+            cpu = 45
+            memory = 60
+        elif users <= 10000:
+            load_factor = 1 + (users - 1000) / 3000
+            error_pct = 0.5 + (users - 1000) * 0.00075
+            cpu = 45 + (users - 1000) * 0.004
+            memory = 60 + (users - 1000) * 0.003
+        else:
+            load_factor = 1 + 3 + (users - 10000) / 2000
+            error_pct = 8 + (users - 10000) * 0.0027
+            cpu = 85 + (users - 10000) * 0.0015
+            memory = 90 + (users - 10000) * 0.0005
+
+        return {
+            "response_time": {api: self._base_time(api) * load_factor for api in apis},
+            "error_rate": {api: error_pct for api in apis},
+            "cpu": cpu,
+            "memory": memory,
+        }
+
+    def predict(self, users, distributions, apis):
+        import numpy as np
+
+        u = users.astype(np.float64)
+        tiers = [users <= 1000, users <= 10000]
+        base_times = np.array([self._base_time(api) for api in apis])
+        load_factor = np.select(tiers, [1.0, 1 + (u - 1000) / 3000], default=1 + 3 + (u - 10000) / 2000)
+        error_pct = np.select(tiers, [0.5, 0.5 + (u - 1000) * 0.00075], default=8 + (u - 10000) * 0.0027)
+
+        return {
+            "response_time": base_times * load_factor[:, None],
+            "error_rate": np.broadcast_to(error_pct[:, None], (users.size, len(apis))),
+            "cpu": np.select(tiers, [45.0, 45 + (u - 1000) * 0.004], default=85 + (u - 10000) * 0.0015),
+            "memory": np.select(tiers, [60.0, 60 + (u - 1000) * 0.003], default=90 + (u - 10000) * 0.0005),
+        }
+
+
+class QueueingModel(PerformanceModel):
+    """
+    Modelo de colas por API basado en la ley de escalabilidad universal
+
+    Cada API recibe N = usuarios * porcentaje / 100 clientes interactivos con
+    tiempo de reflexión Z. La USL da su productividad
+    X(N) = N / ((S + Z) * (1 + sigma (N - 1) + kappa N (N - 1))) y la ley del
+    tiempo de respuesta R = N / X - Z, así que:
+
+        R(N) = (S + Z) * (1 + sigma (N - 1) + kappa N (N - 1)) - Z
+
+    con S el tiempo de servicio sin carga, sigma la contención y kappa la
+    coherencia (el coste de coordinación que hace caer la productividad).
+    La tasa de error crece con el tiempo de espera (R - S), la CPU con la
+    productividad total y la memoria con los usuarios. Todas las relaciones
+    son lineales en sus coeficientes y se ajustan con np.linalg.lstsq.
+    """
+
+    name = "queueing"
+
+    def __init__(self, params=None):
+        defaults = {
+            "think_time": 5.0,
+            "apis": {
+                api: {"service_time": service_time, "sigma": 1e-4, "kappa": 1.5e-8, "base_error": 0.5,
+                      "error_per_second": 3.0}
+                for api, service_time in {"auth": 0.8, "balance": 1.0, "p2p": 1.2, "qr": 1.0,
+                                          "withdrawal": 1.0}.items()
+            },
+            "cpu": {"idle": 45.0, "per_request": 0.04},
+            "memory": {"base": 60.0, "per_user": 0.0015},
+        }
+        super().__init__({**defaults, **(params or {})})
+
+    def _api_params(self, api):
+        return self.params["apis"].get(api) or next(iter(self.params["apis"].values()))
+
+    def predict(self, users, distributions, apis):
+        import numpy as np
+
+        think_time = self.params["think_time"]
+        api_users = users[:, None] * distributions / 100
+        response_time = np.empty_like(api_users)
+        error_rate = np.empty_like(api_users)
+
+        for i, api in enumerate(apis):
+            p = self._api_params(api)
+            n = api_users[:, i]
+            # Sin usuarios la API responde en su tiempo de servicio
+            contention = 1 + p["sigma"] * np.maximum(n - 1, 0) + p["kappa"] * n * np.maximum(n - 1, 0)
+            # Un ajuste con coeficientes negativos no puede dar tiempos menores que el de servicio
+            # ni tasas de error negativas al extrapolar
+            response_time[:, i] = np.maximum((p["service_time"] + think_time) * contention - think_time,
+                                             p["service_time"])
+            error_rate[:, i] = np.maximum(
+                p["base_error"] + p["error_per_second"] * (response_time[:, i] - p["service_time"]), 0)
+
+        # Productividad total (peticiones/s) por la ley del tiempo de respuesta
+        throughput = (api_users / (response_time + think_time)).sum(axis=1)
+        return {
+            "response_time": response_time,
+            "error_rate": error_rate,
+            "cpu": self.params["cpu"]["idle"] + self.params["cpu"]["per_request"] * throughput,
+            "memory": self.params["memory"]["base"] + self.params["memory"]["per_user"] * users,
+        }
+
+    @classmethod
+    def fit(cls, observations, think_time=5.0):
+        """
+        Ajusta el modelo a ejecuciones medidas con mínimos cuadrados lineales
+
+        Para cada API, R + Z = a + b (N - 1) + c N (N - 1) es lineal en
+        (a, b, c) = (S + Z, (S + Z) sigma, (S + Z) kappa); la tasa de error es
+        lineal en el tiempo de espera R - S; la CPU en la productividad y la
+        memoria en los usuarios.
+
+        Args:
+            observations (dict): Columnas de ejecuciones medidas (ver runs_to_columns o
+                calculate_results_batch): "apis", "total_users", "distribution" (N, n_apis),
+                "response_time" y "error_rate" (API → array), "cpu" y "memory"
+            think_time (float): Tiempo de reflexión de los usuarios en segundos
+
+        Returns:
+            QueueingModel: Modelo con los parámetros ajustados
+        """
+        import numpy as np
+
+        apis = list(observations["apis"])
+        users = np.asarray(observations["total_users"], dtype=np.float64)
+        distributions = np.asarray(observations["distribution"], dtype=np.float64)
+        api_users = users[:, None] * distributions / 100
+        params = {"think_time": think_time, "apis": {}}
+        throughput = np.zeros(users.size)
+
+        for i, api in enumerate(apis):
+            n = api_users[:, i]
+            used = n > 0
+            if used.sum() < 3:
+                continue
+            rt = np.asarray(observations["response_time"][api], dtype=np.float64)
+            er = np.asarray(observations["error_rate"][api], dtype=np.float64)
+
+            design = np.column_stack([np.ones(used.sum()), n[used] - 1, n[used] * (n[used] - 1)])
+            (a, b, c), *_ = np.linalg.lstsq(design, rt[used] + think_time, rcond=None)
+            service_time = max(a - think_time, 1e-3)
+
+            wait = rt[used] - service_time
+            (base_error, error_per_second), *_ = np.linalg.lstsq(
+                np.column_stack([np.ones(wait.size), wait]), er[used], rcond=None)
+
+            params["apis"][api] = {
+                "service_time": float(service_time),
+                "sigma": float(b / a),
+                "kappa": float(c / a),
+                "base_error": float(base_error),
+                "error_per_second": float(error_per_second),
+            }
+            throughput[used] += n[used] / (rt[used] + think_time)
+
+        if not params["apis"]:
+            raise ValueError("No hay suficientes ejecuciones con tráfico para ajustar el modelo")
+
+        # Los puntos saturados al 100% no informan de la pendiente y se descartan
+        cpu = np.asarray(observations["cpu"], dtype=np.float64)
+        memory = np.asarray(observations["memory"], dtype=np.float64)
+        cpu_used = cpu < 100 if (cpu < 100).sum() >= 2 else np.ones(users.size, dtype=bool)
+        memory_used = memory < 100 if (memory < 100).sum() >= 2 else np.ones(users.size, dtype=bool)
+        (idle, per_request), *_ = np.linalg.lstsq(
+            np.column_stack([np.ones(cpu_used.sum()), throughput[cpu_used]]), cpu[cpu_used], rcond=None)
+        (base, per_user), *_ = np.linalg.lstsq(
+            np.column_stack([np.ones(memory_used.sum()), users[memory_used]]), memory[memory_used], rcond=None)
+        params["cpu"] = {"idle": float(idle), "per_request": float(per_request)}
+        params["memory"] = {"base": float(base), "per_user": float(per_user)}
+        return cls(params)
+
+
+MODELS = {model.name: model for model in (PiecewiseModel, QueueingModel)}
+
+
+def runs_to_columns(runs, apis):
+    """
+    Convierte ejecuciones en columnas aptas para QueueingModel.fit
+
+    Args:
+        runs (list | np.ndarray): Diccionarios de resultados o filas de ResultsStore.query
+        apis (iterable): Claves de las APIs
+
+    Returns:
+        dict: Columnas con "apis", "total_users", "distribution", "response_time",
+            "error_rate", "cpu" y "memory"
+    """
+    import numpy as np
+
+    apis = list(apis)
+    if isinstance(runs, np.ndarray):
+        # Filas del histórico (array estructurado)
+        return {
+            "apis": apis,
+            "total_users": runs["users"],
+            "distribution": np.column_stack([runs[f"{api}.share"] for api in apis]),
+            "response_time": {api: runs[f"{api}.response_time"] for api in apis},
+            "error_rate": {api: runs[f"{api}.error_rate"] for api in apis},
+            "cpu": runs["cpu"],
+            "memory": runs["memory"],
+        }
+    return {
+        "apis": apis,
+        "total_users": np.array([r["total_users"] for r in runs]),
+        "distribution": np.array([[r["distribution"].get(api, 0) for api in apis] for r in runs], dtype=np.float64),
+        "response_time": {api: np.array([r["response_time"].get(api, np.nan) for r in runs]) for api in apis},
+        "error_rate": {api: np.array([r["error_rate"].get(api, np.nan) for r in runs]) for api in apis},
+        "cpu": np.array([r["system_metrics"]["cpu"] for r in runs]),
+        "memory": np.array([r["system_metrics"]["memory"] for r in runs]),
+    }
+
+
+def load_model(spec=None):
+    """
+    Crea un modelo a partir de su nombre, su especificación o un archivo JSON
+
+    Args:
+        spec (str | dict | PerformanceModel): "piecewise", "queueing", ruta a un JSON
+            guardado con save_model o dict {"type": ..., "params": ...}. None → PiecewiseModel
+
+    Returns:
+        PerformanceModel: Modelo listo para usar
+    """
+    if spec is None:
+        return PiecewiseModel()
+    if isinstance(spec, PerformanceModel):
+        return spec
+    if isinstance(spec, str):
+        if spec in MODELS:
+            return MODELS[spec]()
+        with open(spec, encoding="utf-8") as f:
+            spec = json.load(f)
+    if spec.get("type") not in MODELS:
+        raise ValueError(f"Modelo no válido '{spec.get('type')}'. Use {', '.join(MODELS)}.")
+    return MODELS[spec["type"]](spec.get("params"))
+
+
+def save_model(model, filename):
+    """Guarda la especificación del modelo en un archivo JSON"""
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(model.to_dict(), f, indent=4)
+    return filename
@@ -1,15 +1,39 @@
-import time
+"""
+Núcleo del simulador: escenarios y modelos de carga
+
+Importar este módulo sólo carga la biblioteca estándar. NumPy, los motores
+(event_engine, profiles), la consola (console: tabulate y colorama) y los
+gráficos (plotting: matplotlib) se importan dentro de los métodos que los
+usan, así calcular resultados desde scripts, procesos trabajadores o tests
+no paga su coste de arranque.
+"""
 import random
 import json
-import matplotlib.pyplot as plt
-import numpy as np
-from tabulate import tabulate
-from colorama import Fore, Style, init
 import sys
-sys.stdout.reconfigure(encoding='utf-8')
 
-# Inicializar colorama para colores en consola
-init(autoreset=True)
+import instrumentation
+from instrumentation import instrumented
+from models import load_model
+
+# Motores de simulación admitidos por run_simulation
+ENGINES = ("model", "events", "population", "workflows")
+
+
+def _round_half(values, ndigits):
+    """
+    Redondea un array igual que round() de Python
+    
+    np.round escala por 10**ndigits y puede diferir de round() en los valores
+    próximos a la mitad; esos casos se recalculan con round().
+    """
+    import numpy as np
+    
+    rounded = np.round(values, ndigits)
+    scaled = np.abs(values) * 10 ** ndigits
+    ambiguous = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ambiguous.any():
+        rounded[ambiguous] = [round(v, ndigits) for v in values[ambiguous].tolist()]
+    return rounded
 
 class FinancialLoadTestSimulator:
     """
@@ -17,7 +41,20 @@ class FinancialLoadTestSimulator:
     Basado en el caso de estudio de Nequi y JMeter
     """
     
-    def __init__(self):
+    def __init__(self, model=None, cache=None):
+        """
+        Args:
+            model (str | dict | PerformanceModel): Modelo de rendimiento ("piecewise" por
+                defecto, "queueing", un JSON guardado con models.save_model o una instancia)
+            cache (ResultCache | str): Caché de resultados de las ejecuciones con semilla,
+                o directorio de su almacén en disco. None → sin caché
+        """
+        self.model = load_model(model)
+        if isinstance(cache, str):
+            from result_cache import ResultCache
+            cache = ResultCache(cache)
+        self.cache = cache
+        
         # Definir las APIs disponibles
         self.apis = {
             "auth": {"name": "Autenticación (Auth API)", "path": "/api/v2/oauth/token", "method": "POST"},
@@ -48,39 +85,25 @@ class FinancialLoadTestSimulator:
         
         # Inicializar resultados
         self.results = None
+        self._renderer = None
     
     def print_header(self):
         """Muestra el encabezado del simulador"""
-        print(Fore.CYAN + "\n" + "="*80)
-        print(Fore.CYAN + " "*20 + "SIMULADOR DE PRUEBAS DE CARGA PARA APLICACIONES FINANCIERAS")
-        print(Fore.CYAN + " "*30 + "Caso de estudio: Nequi")
-        print(Fore.CYAN + "="*80 + "\n")
+        import console
+        console.print_header(self)
     
     def print_apis(self):
         """Muestra las APIs disponibles para pruebas"""
-        print(Fore.YELLOW + "\nAPIs disponibles para pruebas:")
-        headers = ["Clave", "Nombre", "Ruta", "Método"]
-        table_data = []
-        
-        for key, api in self.apis.items():
-            table_data.append([key, api["name"], api["path"], api["method"]])
-        
-        print(tabulate(table_data, headers=headers, tablefmt="pretty"))
+        import console
+        console.print_apis(self)
     
     def print_scenarios(self):
         """Muestra los escenarios predefinidos"""
-        print(Fore.YELLOW + "\nEscenarios predefinidos:")
-        headers = ["Clave", "Nombre", "Usuarios", "Distribución de APIs"]
-        table_data = []
-        
-        for key, scenario in self.scenarios.items():
-            distribution_str = ", ".join([f"{self.apis[api]['name'].split(' ')[0]}: {pct}%" 
-                                         for api, pct in scenario["distribution"].items() if pct > 0])
-            table_data.append([key, scenario["name"], scenario["users"], distribution_str])
-        
-        print(tabulate(table_data, headers=headers, tablefmt="pretty"))
+        import console
+        console.print_scenarios(self)
     
-    def run_simulation(self, scenario_key=None, custom_users=None, custom_distribution=None):
+    def run_simulation(self, scenario_key=None, custom_users=None, custom_distribution=None, engine="model",
+                       verbose=True, flows=None, seed=None):
         """
         Ejecuta la simulación de carga
         
@@ -88,55 +111,152 @@ class FinancialLoadTestSimulator:
             scenario_key (str): Clave del escenario predefinido (normal, high, extreme)
             custom_users (int): Número personalizado de usuarios
             custom_distribution (dict): Distribución personalizada de APIs
+            engine (str): "model" para el modelo predictivo, "events" para la
+                simulación de eventos discretos por petición o "population" para
+                simular custom_users/users como usuarios registrados con sesiones
+                o "workflows" para flujos de varios pasos (auth → balance → p2p)
+                con reintentos
+            verbose (bool): Si es False no se imprime nada (uso desde scripts o CLI)
+            flows (list): Flujos del motor "workflows"; por defecto los del escenario
+                (clave "flows") o los derivados de la distribución
+            seed (int): Semilla del generador aleatorio. Con semilla la ejecución es
+                reproducible y su resultado se guarda en self.cache (si hay caché); sin
+                semilla se usa el módulo global random y nunca se usa la caché
         """
-        print(Fore.GREEN + "\nIniciando simulación de carga...")
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de simulación no válido '{engine}'. Use {', '.join(ENGINES)}.")
         
         # Determinar parámetros de simulación
+        scenario = None
         if scenario_key and scenario_key in self.scenarios:
             scenario = self.scenarios[scenario_key]
             users = scenario["users"]
             distribution = scenario["distribution"]
-            print(f"Utilizando escenario: {scenario['name']}")
         else:
             users = custom_users if custom_users else 5000
             distribution = custom_distribution if custom_distribution else {
                 "auth": 10, "balance": 30, "p2p": 40, "qr": 15, "withdrawal": 5
             }
-            print(f"Utilizando configuración personalizada: {users} usuarios")
         
         # Mostrar detalles de la prueba
-        print(f"Número de usuarios concurrentes: {users}")
-        print("Distribución de peticiones:")
-        for api, percentage in distribution.items():
-            if percentage > 0:
-                print(f"  - {self.apis[api]['name']}: {percentage}%")
-        
-        # Simulación de progreso
-        print("\nEjecutando prueba de carga ", end="")
-        for _ in range(10):
-            print(".", end="", flush=True)
-            time.sleep(0.2)
-        print(" ¡completado!")
+        if verbose:
+            import console
+            console.print_run_start(self, users, distribution, scenario)
+        
+        if engine == "workflows":
+            flows = flows or (scenario or {}).get("flows")
+        
+        # Las ejecuciones con semilla son deterministas: se buscan primero en la caché
+        key = None
+        if seed is not None and self.cache is not None:
+            key = self.cache.key(model=list(self.model.cache_key), engine=engine, users=users,
+                                 distribution={api: distribution.get(api, 0) for api in self.apis},
+                                 seed=seed, flows=flows if engine == "workflows" else None)
+            results = self.cache.get(key)
+            if instrumentation.registry.enabled:
+                instrumentation.registry.inc("simulator_result_cache_total",
+                                             labels=(("result", "miss" if results is None else "hit"),))
+        else:
+            results = None
         
         # Calcular resultados
-        self.results = self._calculate_results(users, distribution)
+        if results is None:
+            with instrumentation.capture_run(engine, users), instrumentation.phase(engine):
+                if engine == "events":
+                    results = self._simulate_events(users, distribution, seed=seed)
+                elif engine == "population":
+                    results = self._simulate_population(users, distribution, seed=seed)
+                elif engine == "workflows":
+                    results = self._simulate_workflows(users, distribution, flows, seed=seed)
+                else:
+                    results = self._calculate_results(users, distribution, rng=self._seeded_rng(seed))
+            if seed is not None:
+                results["seed"] = seed
+            if key is not None:
+                self.cache.put(key, results)
+        self.results = results
         
         # Mostrar resultados
-        self._display_results()
+        if verbose:
+            print("¡completado!")
+            self._display_results()
         
         return self.results
     
-    def _calculate_results(self, users, distribution):
+    def stream_simulation(self, scenario_key=None, custom_users=None, custom_distribution=None, profile=None,
+                          seed=None, callback=None):
+        """
+        Ejecuta la simulación siguiendo un perfil de carga y entrega resultados por segundo
+        
+        Los escenarios pueden incluir una clave "profile", por ejemplo
+        {"type": "ramp", "ramp_up": 60, "steady": 300, "ramp_down": 60}.
+        
+        Args:
+            scenario_key (str): Clave del escenario predefinido (normal, high, extreme)
+            custom_users (int): Número personalizado de usuarios (máximo del perfil)
+            custom_distribution (dict): Distribución personalizada de APIs
+            profile (dict | str): Perfil de carga; tiene prioridad sobre el del escenario
+            seed (int): Semilla del generador aleatorio
+            callback (callable): Función llamada con cada intervalo
+        
+        Returns:
+            generator: Intervalos de un segundo con usuarios, fase y métricas
+        """
+        if scenario_key and scenario_key in self.scenarios:
+            scenario = self.scenarios[scenario_key]
+            users = scenario["users"]
+            distribution = scenario["distribution"]
+            profile = profile or scenario.get("profile")
+        else:
+            users = custom_users if custom_users else 5000
+            distribution = custom_distribution if custom_distribution else {
+                "auth": 10, "balance": 30, "p2p": 40, "qr": 15, "withdrawal": 5
+            }
+        
+        from profiles import stream_timeseries
+        
+        return stream_timeseries(self, users, distribution, profile or {"type": "ramp"}, seed=seed,
+                                 callback=callback)
+    
+    @staticmethod
+    def _seeded_rng(seed):
+        """
+        Generador de las ejecuciones con semilla del modelo
+        
+        Es el mismo np.random.Generator que usa calculate_results_batch, de modo que
+        una ejecución con semilla coincide con el punto equivalente de un barrido.
+        
+        Args:
+            seed (int): Semilla; None → sin generador propio (módulo global random)
+        
+        Returns:
+            np.random.Generator | None: Generador sembrado, o None si no hay semilla
+        """
+        if seed is None:
+            return None
+        import numpy as np
+        
+        return np.random.default_rng(seed)
+    
+    def _calculate_results(self, users, distribution, rng=None):
         """
         Calcula los resultados de la simulación basándose en modelos predictivos
         
         Args:
             users (int): Número de usuarios concurrentes
             distribution (dict): Distribución de peticiones por API
+            rng: Generador con método uniform(low, high) (np.random.Generator o
+                random.Random). Si es None se usa el módulo global random
         
         Returns:
             dict: Resultados de la simulación
         """
+        if rng is None:
+            rng = random
+        
+        # Valores medios del modelo de rendimiento; aquí sólo se añade la variación aleatoria
+        prediction = self.model.predict_point(users, distribution, list(self.apis))
+        
         # Calcular tiempo de respuesta y tasa de error para cada API
         response_time = {}
         error_rate = {}
@@ -147,31 +267,12 @@ class FinancialLoadTestSimulator:
             percentage = distribution.get(api, 0)
             api_users = int(users * percentage / 100)
             
-            # Calcular tiempo de respuesta basado en usuarios
-            # Fórmula basada en datos reales del caso Nequi
-            base_time = 1.2 if api == "p2p" else 0.8 if api == "auth" else 1.0
-            
-            if users <= 1000:
-                calc_time = base_time
-            elif users <= 10000:
-                calc_time = base_time * (1 + (users - 1000) / 3000)
-            else:
-                calc_time = base_time * (1 + 3 + (users - 10000) / 2000)
-            
             # Añadir variación aleatoria
-            calc_time = calc_time * (1 + random.uniform(-0.1, 0.1))
+            calc_time = prediction["response_time"][api] * (1 + rng.uniform(-0.1, 0.1))
             response_time[api] = round(calc_time, 2)
             
-            # Calcular tasa de error
-            if users <= 1000:
-                error_pct = 0.5
-            elif users <= 10000:
-                error_pct = 0.5 + (users - 1000) * 0.00075
-            else:
-                error_pct = 8 + (users - 10000) * 0.0027
-            
             # Añadir variación aleatoria
-            error_pct = error_pct * (1 + random.uniform(-0.1, 0.2))
+            error_pct = prediction["error_rate"][api] * (1 + rng.uniform(-0.1, 0.2))
             error_rate[api] = round(error_pct, 2)
             
             # Añadir tipos de errores específicos cuando la tasa es alta
@@ -183,22 +284,11 @@ class FinancialLoadTestSimulator:
                 errors.append({"api": api, "code": 503, "message": "Service Unavailable"})
                 errors.append({"api": api, "code": 500, "message": "Internal Server Error"})
         
-        # Calcular métricas del sistema
-        system_metrics = {"cpu": 0, "memory": 0}
-        
-        if users <= 1000:
-            system_metrics["cpu"] = 45
-            system_metrics["memory"] = 60
-        elif users <= 10000:
-            system_metrics["cpu"] = 45 + (users - 1000) * 0.004
-            system_metrics["memory"] = 60 + (users - 1000) * 0.003
-        else:
-            system_metrics["cpu"] = 85 + (users - 10000) * 0.0015
-            system_metrics["memory"] = 90 + (users - 10000) * 0.0005
-        
-        # Añadir variación aleatoria
-        system_metrics["cpu"] = min(100, system_metrics["cpu"] * (1 + random.uniform(-0.05, 0.05)))
-        system_metrics["memory"] = min(100, system_metrics["memory"] * (1 + random.uniform(-0.05, 0.05)))
+        # Calcular métricas del sistema con variación aleatoria
+        system_metrics = {
+            "cpu": min(100, prediction["cpu"] * (1 + rng.uniform(-0.05, 0.05))),
+            "memory": min(100, prediction["memory"] * (1 + rng.uniform(-0.05, 0.05))),
+        }
         
         # Calcular estadísticas globales
         valid_response_times = [rt for api, rt in response_time.items() if distribution.get(api, 0) > 0]
@@ -224,262 +314,261 @@ class FinancialLoadTestSimulator:
         
         return results
     
-    def _display_results(self):
-        """Muestra los resultados de la simulación en formato tabular y recomendaciones"""
-        if not self.results:
-            print(Fore.RED + "\nNo hay resultados disponibles. Ejecute una simulación primero.")
-            return
+    def _simulate_events(self, users, distribution, seed=None, **engine_options):
+        """
+        Simula cada petición de cada usuario virtual con un motor de eventos discretos
         
-        print(Fore.GREEN + "\n" + "="*80)
-        print(Fore.GREEN + " "*30 + "RESULTADOS DE LA SIMULACIÓN")
-        print(Fore.GREEN + "="*80)
-        
-        # Mostrar métricas generales
-        print(Fore.CYAN + "\nMétricas generales:")
-        general_data = [
-            ["Usuarios concurrentes", f"{self.results['total_users']:,}"],
-            ["Tiempo medio de respuesta", f"{self.results['avg_response_time']:.2f} segundos"],
-            ["Tasa de error global", f"{self.results['avg_error_rate']:.2f}%"],
-            ["Uso de CPU", f"{self.results['system_metrics']['cpu']:.1f}%"],
-            ["Uso de memoria", f"{self.results['system_metrics']['memory']:.1f}%"],
-        ]
-        print(tabulate(general_data, tablefmt="pretty"))
-        
-        # Mostrar tiempos de respuesta por API
-        print(Fore.CYAN + "\nTiempos de respuesta por API:")
-        rt_data = []
-        for api, rt in self.results["response_time"].items():
-            if self.results["distribution"].get(api, 0) > 0:
-                rt_data.append([self.apis[api]["name"], f"{rt:.2f} segundos"])
-        print(tabulate(rt_data, headers=["API", "Tiempo de respuesta"], tablefmt="pretty"))
-        
-        # Mostrar tasa de error por API
-        print(Fore.CYAN + "\nTasa de error por API:")
-        er_data = []
-        for api, er in self.results["error_rate"].items():
-            if self.results["distribution"].get(api, 0) > 0:
-                er_data.append([self.apis[api]["name"], f"{er:.2f}%"])
-        print(tabulate(er_data, headers=["API", "Tasa de error"], tablefmt="pretty"))
-        
-        # Mostrar errores detectados
-        if self.results["errors"]:
-            print(Fore.RED + "\nErrores detectados:")
-            error_data = []
-            for error in self.results["errors"]:
-                api = error["api"]
-                error_data.append([
-                    self.apis[api]["name"],
-                    error["code"],
-                    error["message"]
-                ])
-            print(tabulate(error_data, headers=["API", "Código", "Mensaje"], tablefmt="pretty"))
-        
-        # Mostrar diagnóstico
-        print(Fore.CYAN + "\nDiagnóstico:")
-        if self.results["avg_error_rate"] < 5:
-            print(Fore.GREEN + "✓ El sistema funciona de manera óptima bajo esta carga.")
-        elif self.results["avg_error_rate"] < 15:
-            print(Fore.YELLOW + "⚠ El sistema muestra signos de degradación. Se recomienda optimizar las APIs con mayor tasa de error.")
-        else:
-            print(Fore.RED + "✗ ¡Sistema sobrecargado! Se requiere implementar throttling inteligente, priorización de transacciones " +
-                  "y escalado horizontal inmediato.")
+        Args:
+            users (int): Número de usuarios concurrentes
+            distribution (dict): Distribución de peticiones por API
+            seed (int): Semilla del generador aleatorio
+            **engine_options: Parámetros de EventDrivenEngine (servers, duration, timeout...)
+        
+        Returns:
+            dict: Resultados de la simulación con percentiles e histogramas por API
+        """
+        from event_engine import EventDrivenEngine
         
-        # Mostrar recomendaciones
-        self._show_recommendations()
+        engine = EventDrivenEngine(self.apis, **engine_options)
+        return engine.run(users, distribution, seed=seed)
     
-    def _show_recommendations(self):
-        """Muestra recomendaciones basadas en los resultados de la simulación"""
-        if not self.results:
-            return
+    def _simulate_workflows(self, users, distribution, flows=None, seed=None, **engine_options):
+        """
+        Simula flujos de transacciones de varios pasos con reintentos tras 429/504
         
-        print(Fore.CYAN + "\nRecomendaciones para mejorar el rendimiento:")
+        Args:
+            users (int): Número de usuarios concurrentes
+            distribution (dict): Distribución del escenario (define los flujos por defecto)
+            flows (list): Definiciones de flujo (ver workflows.py)
+            seed (int): Semilla del generador aleatorio
+            **engine_options: Parámetros de WorkflowEngine (servers, duration, timeout...)
         
-        recommendations = []
+        Returns:
+            dict: Resultados por API más la latencia extremo a extremo y la amplificación
+                por reintentos de cada flujo
+        """
+        from workflows import WorkflowEngine, flows_from_distribution
         
-        # Recomendaciones basadas en tasa de error
-        if self.results["avg_error_rate"] > 8:
-            recommendations.append("Optimizar API de Transferencias: Las transferencias P2P muestran tiempos " +
-                                 "de respuesta elevados. Implemente caché para operaciones recurrentes y optimice " +
-                                 "consultas a base de datos.")
+        engine = WorkflowEngine(self.apis, **engine_options)
+        return engine.run(users, flows or flows_from_distribution(distribution), seed=seed)
+    
+    def _simulate_population(self, users, distribution, seed=None, duration=60.0, **population_options):
+        """
+        Simula una población de usuarios registrados y evalúa el modelo con su carga
         
-        # Recomendaciones basadas en CPU
-        if self.results["system_metrics"]["cpu"] > 75:
-            recommendations.append("Escalar Horizontalmente: El uso de CPU supera el 75%. Implemente auto-scaling " +
-                                 "para añadir más nodos durante picos de demanda.")
+        La población (population.py) decide cuántos usuarios están en sesión y qué
+        APIs llaman (auth al iniciar sesión y al caducar el token); el modelo se
+        evalúa con los usuarios en sesión y la mezcla de peticiones observada.
         
-        # Recomendaciones basadas en errores específicos
-        has_429 = any(e["code"] == 429 for e in self.results["errors"])
-        has_500_503 = any(e["code"] in [500, 503] for e in self.results["errors"])
+        Args:
+            users (int): Usuarios registrados (millones son admisibles)
+            distribution (dict): Distribución de peticiones dentro de una sesión
+            seed (int): Semilla del generador aleatorio
+            duration (float): Segundos simulados
+            **population_options: Parámetros de Population (session_length, memory_budget...)
         
-        if has_429:
-            recommendations.append("Revisar Políticas de Rate Limiting: Los errores 429 (Too Many Requests) indican " +
-                                 "que las políticas de limitación de tasa actuales son demasiado restrictivas para " +
-                                 "el volumen de usuarios.")
+        Returns:
+            dict: Resultados del modelo con las estadísticas de la población
+        """
+        from population import Population
+        
+        population = Population(self.apis, users, distribution, seed=seed, **population_options)
+        stats = population.run(duration)
+        total_calls = sum(stats["calls"].values())
+        observed = {api: round(100 * calls / total_calls, 2) for api, calls in stats["calls"].items()} \
+            if total_calls else distribution
+        
+        results = self._calculate_results(max(1, round(stats["active_mean"])), observed,
+                                          rng=self._seeded_rng(seed))
+        results.update({
+            "engine": "population",
+            "duration": duration,
+            "total_requests": total_calls,
+            "throughput": round(total_calls / duration, 2),
+            "population": stats,
+        })
+        return results
+    
+    @instrumented("batch")
+    def calculate_results_batch(self, users, distributions, seed=None):
+        """
+        Evalúa el modelo predictivo para muchos puntos (usuarios, distribución) a la vez
         
-        if has_500_503:
-            recommendations.append("Implementar Degradación Controlada: Los errores 503 y 500 sugieren fallos completos. " +
-                                 "Implemente circuit breakers y estrategias de degradación controlada para mantener " +
-                                 "funcionalidades críticas operativas.")
+        Equivale a llamar _calculate_results punto a punto compartiendo un mismo
+        np.random.Generator: con la misma semilla los resultados coinciden.
         
-        # Recomendación para caso óptimo
-        if self.results["avg_error_rate"] < 5:
-            recommendations.append("Monitoreo Continuo: El sistema muestra buen rendimiento. Se recomienda implementar " +
-                                 "un sistema de monitoreo continuo para detectar cambios en los patrones de uso y " +
-                                 "anticipar futuros picos.")
+        Args:
+            users (array-like): Número de usuarios concurrentes por punto, forma (N,)
+            distributions (array-like | dict): Matriz (N, n_apis) de porcentajes en el
+                orden de self.apis, un vector (n_apis,) o un dict común a todos los puntos
+            seed (int | np.random.Generator): Semilla o generador para la variación aleatoria.
+                Con una semilla entera el resultado se guarda en self.cache (si hay caché)
         
-        # Mostrar recomendaciones
-        for i, rec in enumerate(recommendations, 1):
-            print(f"{i}. {rec}")
+        Returns:
+            dict: Resultados en columnas (arrays de NumPy de longitud N)
+        """
+        import numpy as np
+        
+        api_keys = list(self.apis)
+        n_apis = len(api_keys)
+        
+        users = np.atleast_1d(np.asarray(users, dtype=np.int64))
+        if isinstance(distributions, dict):
+            distributions = [distributions.get(api, 0) for api in api_keys]
+        distributions = np.asarray(distributions, dtype=np.float64)
+        if distributions.ndim == 1:
+            distributions = np.broadcast_to(distributions, (users.size, n_apis))
+        if distributions.shape != (users.size, n_apis):
+            raise ValueError(f"La matriz de distribución debe tener forma ({users.size}, {n_apis}), "
+                             f"se recibió {distributions.shape}")
+        
+        # Con semilla entera el barrido es determinista: la clave resume los puntos con un hash
+        key = None
+        if self.cache is not None and isinstance(seed, (int, np.integer)):
+            import hashlib
+            
+            # Con una distribución común (stride 0) basta con la fila para identificar la malla
+            shared = distributions.strides[0] == 0
+            rows = distributions[0] if shared else np.ascontiguousarray(distributions)
+            points = hashlib.sha256(users.tobytes() + rows.tobytes())
+            key = self.cache.key(model=list(self.model.cache_key), engine="batch", apis=api_keys,
+                                 points=points.hexdigest(), shared=bool(shared), seed=int(seed))
+            cached = self.cache.get_arrays(key)
+            if cached is not None:
+                return {
+                    "apis": api_keys,
+                    "total_users": users,
+                    "distribution": distributions,
+                    **{name: {api: cached[name][:, i] for i, api in enumerate(api_keys)}
+                       for name in ("response_time", "error_rate")},
+                    **{name: cached[name] for name in ("cpu", "memory", "avg_response_time", "avg_error_rate")},
+                }
+        
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        
+        # Mismo orden de consumo que _calculate_results: (tiempo, error) por API, luego CPU y memoria
+        draws = rng.random((users.size, 2 * n_apis + 2))
+        rt_noise = -0.1 + (0.1 - -0.1) * draws[:, 0:2 * n_apis:2]
+        er_noise = -0.1 + (0.2 - -0.1) * draws[:, 1:2 * n_apis:2]
+        cpu_noise = -0.05 + (0.05 - -0.05) * draws[:, -2]
+        mem_noise = -0.05 + (0.05 - -0.05) * draws[:, -1]
+        
+        # Valores medios del modelo de rendimiento con la variación aleatoria
+        prediction = self.model.predict_batch(users, distributions, api_keys)
+        calc_time = prediction["response_time"] * (1 + rt_noise)
+        error_pct = prediction["error_rate"] * (1 + er_noise)
+        cpu = np.minimum(100, prediction["cpu"] * (1 + cpu_noise))
+        memory = np.minimum(100, prediction["memory"] * (1 + mem_noise))
+        
+        response_time = _round_half(calc_time, 2)
+        error_rate = _round_half(error_pct, 2)
+        
+        # Estadísticas globales sólo sobre las APIs con tráfico. Se acumula columna a
+        # columna para sumar en el mismo orden que la versión escalar
+        active = distributions > 0
+        n_active = active.sum(axis=1)
+        rt_sum = np.zeros(users.size)
+        er_sum = np.zeros(users.size)
+        for i in range(n_apis):
+            rt_sum += np.where(active[:, i], response_time[:, i], 0)
+            er_sum += np.where(active[:, i], error_rate[:, i], 0)
+        divisor = np.maximum(n_active, 1)
+        avg_response_time = np.where(n_active > 0, rt_sum / divisor, 0)
+        avg_error_rate = np.where(n_active > 0, er_sum / divisor, 0)
+        
+        cpu = _round_half(cpu, 1)
+        memory = _round_half(memory, 1)
+        avg_response_time = _round_half(avg_response_time, 2)
+        avg_error_rate = _round_half(avg_error_rate, 2)
+        if key is not None:
+            # Columnas como arrays (.npz en disco); usuarios y distribución ya forman la clave
+            self.cache.put_arrays(key, {"response_time": response_time, "error_rate": error_rate, "cpu": cpu,
+                                        "memory": memory, "avg_response_time": avg_response_time,
+                                        "avg_error_rate": avg_error_rate})
+        
+        return {
+            "apis": api_keys,
+            "total_users": users,
+            "distribution": distributions,
+            "response_time": {api: response_time[:, i] for i, api in enumerate(api_keys)},
+            "error_rate": {api: error_rate[:, i] for i, api in enumerate(api_keys)},
+            "cpu": cpu,
+            "memory": memory,
+            "avg_response_time": avg_response_time,
+            "avg_error_rate": avg_error_rate,
+        }
+    
+    @instrumented("display")
+    def _display_results(self):
+        """Muestra los resultados de la simulación en formato tabular y recomendaciones"""
+        import console
+        console.display_results(self)
     
-    def plot_results(self):
-        """Genera gráficos con los resultados de la simulación"""
+    def _show_recommendations(self):
+        """Muestra recomendaciones basadas en los resultados de la simulación"""
+        import console
+        console.show_recommendations(self)
+    
+    @instrumented("plot")
+    def plot_results(self, filename=None):
+        """
+        Genera gráficos con los resultados de la simulación
+        
+        Args:
+            filename (str): Si se indica, el gráfico se guarda en este archivo (png, svg, pdf...)
+                sin abrir ninguna ventana; si no, se muestra en pantalla
+        """
         if not self.results:
-            print(Fore.RED + "\nNo hay resultados disponibles para graficar. Ejecute una simulación primero.")
+            import console
+            console.print_error("\nNo hay resultados disponibles para graficar. Ejecute una simulación primero.")
             return
         
-        # Configurar el estilo de los gráficos
-        plt.style.use('ggplot')
-        
-        # Crear figura con 2 subplots (tiempos de respuesta y tasas de error)
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
-        fig.suptitle(f'Resultados de Simulación: {self.results["total_users"]:,} usuarios', fontsize=16)
-        
-        # Preparar datos
-        apis = [api for api, pct in self.results["distribution"].items() if pct > 0]
-        api_names = [self.apis[api]["name"].split(" ")[0] for api in apis]
-        response_times = [self.results["response_time"][api] for api in apis]
-        error_rates = [self.results["error_rate"][api] for api in apis]
-        
-        # Gráfico de tiempos de respuesta
-        bars1 = ax1.bar(api_names, response_times, color='steelblue')
-        ax1.set_title('Tiempos de Respuesta por API')
-        ax1.set_ylabel('Tiempo (segundos)')
-        ax1.set_ylim(0, max(response_times) * 1.2)
-        
-        # Añadir etiquetas de valor
-        for bar in bars1:
-            height = bar.get_height()
-            ax1.text(bar.get_x() + bar.get_width()/2., height + 0.1,
-                    f'{height:.2f}s', ha='center', va='bottom')
-        
-        # Gráfico de tasas de error
-        bars2 = ax2.bar(api_names, error_rates, color='indianred')
-        ax2.set_title('Tasa de Error por API')
-        ax2.set_ylabel('Error (%)')
-        ax2.set_ylim(0, max(error_rates) * 1.2)
-        
-        # Añadir etiquetas de valor
-        for bar in bars2:
-            height = bar.get_height()
-            ax2.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                    f'{height:.2f}%', ha='center', va='bottom')
-        
-        # Añadir marcas de nivel crítico en tasas de error
-        ax2.axhline(y=5, linestyle='--', color='orange', alpha=0.7, label='Nivel de advertencia (5%)')
-        ax2.axhline(y=15, linestyle='--', color='red', alpha=0.7, label='Nivel crítico (15%)')
-        ax2.legend()
-        
-        # Añadir información adicional en un cuadro de texto
-        textstr = '\n'.join((
-            f'Usuarios concurrentes: {self.results["total_users"]:,}',
-            f'Tasa de error global: {self.results["avg_error_rate"]:.2f}%',
-            f'Tiempo medio de respuesta: {self.results["avg_response_time"]:.2f}s',
-            f'CPU: {self.results["system_metrics"]["cpu"]:.1f}%',
-            f'Memoria: {self.results["system_metrics"]["memory"]:.1f}%'))
-        
-        props = dict(boxstyle='round', facecolor='wheat', alpha=0.5)
-        fig.text(0.15, 0.02, textstr, fontsize=12, bbox=props)
-        
-        # Ajustar layout y mostrar gráfico
-        plt.tight_layout(rect=[0, 0.05, 1, 0.95])
+        from plotting import ReportRenderer
+        
+        if filename:
+            # Sin interfaz: figura Agg reutilizada entre llamadas
+            if self._renderer is None:
+                self._renderer = ReportRenderer(self.apis)
+            return self._renderer.render(self.results, filename)
+        
+        import matplotlib.pyplot as plt
+        
+        ReportRenderer(self.apis, figure=plt.figure(figsize=(12, 10))).draw(self.results)
         plt.show()
     
+    @instrumented("save")
     def save_results(self, filename='load_test_results.json'):
         """Guarda los resultados de la simulación en un archivo JSON"""
+        import console
+        
         if not self.results:
-            print(Fore.RED + "\nNo hay resultados disponibles para guardar. Ejecute una simulación primero.")
+            console.print_error("\nNo hay resultados disponibles para guardar. Ejecute una simulación primero.")
             return
         
         with open(filename, 'w') as f:
             json.dump(self.results, f, indent=4)
         
-        print(Fore.GREEN + f"\nResultados guardados en {filename}")
+        console.print_success(f"\nResultados guardados en {filename}")
     
     def interactive_menu(self):
         """Menú interactivo para la simulación de pruebas de carga"""
-        self.print_header()
-        
-        while True:
-            print(Fore.CYAN + "\nOpciones disponibles:")
-            print("1. Ver APIs disponibles")
-            print("2. Ver escenarios predefinidos")
-            print("3. Ejecutar escenario predefinido")
-            print("4. Ejecutar configuración personalizada")
-            print("5. Graficar resultados")
-            print("6. Guardar resultados")
-            print("0. Salir")
-            
-            choice = input("\nSeleccione una opción (0-6): ")
-            
-            if choice == '1':
-                self.print_apis()
-            elif choice == '2':
-                self.print_scenarios()
-            elif choice == '3':
-                self.print_scenarios()
-                scenario_key = input("\nIngrese la clave del escenario (normal, high, extreme): ").lower()
-                if scenario_key in self.scenarios:
-                    self.run_simulation(scenario_key=scenario_key)
-                else:
-                    print(Fore.RED + "Escenario no válido. Use 'normal', 'high' o 'extreme'.")
-            elif choice == '4':
-                try:
-                    users = int(input("\nIngrese número de usuarios concurrentes: "))
-                    print("\nIngrese distribución de peticiones (porcentaje para cada API, debe sumar 100):")
-                    
-                    custom_distribution = {}
-                    total_percentage = 0
-                    
-                    for api in self.apis:
-                        while True:
-                            try:
-                                percentage = int(input(f"{self.apis[api]['name']}: "))
-                                if percentage < 0:
-                                    print(Fore.RED + "El porcentaje no puede ser negativo.")
-                                    continue
-                                    
-                                if total_percentage + percentage > 100:
-                                    print(Fore.RED + f"El total supera 100%. Quedan {100 - total_percentage}% disponibles.")
-                                    continue
-                                
-                                custom_distribution[api] = percentage
-                                total_percentage += percentage
-                                break
-                            except ValueError:
-                                print(Fore.RED + "Ingrese un número entero válido.")
-                    
-                    if total_percentage != 100:
-                        print(Fore.RED + f"La suma debe ser 100%. Total actual: {total_percentage}%")
-                    else:
-                        self.run_simulation(custom_users=users, custom_distribution=custom_distribution)
-                        
-                except ValueError:
-                    print(Fore.RED + "Entrada no válida. Ingrese números enteros.")
-            elif choice == '5':
-                self.plot_results()
-            elif choice == '6':
-                filename = input("\nIngrese nombre de archivo (o presione Enter para usar el predeterminado): ")
-                if not filename:
-                    filename = 'load_test_results.json'
-                self.save_results(filename)
-            elif choice == '0':
-                print(Fore.GREEN + "\n¡Gracias por usar el simulador de pruebas de carga!")
-                break
-            else:
-                print(Fore.RED + "Opción no válida. Intente de nuevo.")
-
+        import console
+        console.interactive_menu(self)
+    
 
 # Ejemplo de uso
 if __name__ == "__main__":
-    simulator = FinancialLoadTestSimulator()
+    # Salida UTF-8 sólo al ejecutarse como programa y si stdout es un stream real
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding='utf-8')
+    
+    if len(sys.argv) > 1:
+        # Con argumentos se usa la CLI no interactiva (python nequiTestAPI.py run extreme --format json)
+        from cli import main
+        sys.exit(main())
+    
+    # Caché en memoria: repetir un escenario con la misma semilla muestra el resultado al instante
+    from result_cache import ResultCache
+    
+    simulator = FinancialLoadTestSimulator(cache=ResultCache())
     simulator.interactive_menu()
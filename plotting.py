@@ -0,0 +1,234 @@
+"""
+Gráficos sin interfaz (backend Agg) para una o muchas ejecuciones
+
+Las figuras se crean con matplotlib.figure.Figure y FigureCanvasAgg, sin pasar
+por pyplot: no se abre ninguna ventana, no hay estado global y funciona en
+agentes de CI sin pantalla. ReportRenderer reutiliza la misma figura y los
+mismos ejes para todas las ejecuciones y sólo actualiza alturas y etiquetas
+de las barras cuando las APIs no cambian.
+
+Aun así cada PNG por ejecución cuesta del orden de 0,15 s (casi todo es el
+rasterizado de textos y ejes de Agg): 1.000 ejecuciones son varios minutos.
+Para barridos grandes se usan plot_sweep y plot_heatmap, que resumen miles de
+puntos en un único gráfico en menos de un segundo.
+"""
+import os
+
+import numpy as np
+from matplotlib import style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.layout_engine import TightLayoutEngine
+
+STYLE = "ggplot"
+
+# Compresión zlib de los PNG por ejecución: el nivel por defecto (6) tarda ~3 veces más
+PNG_COMPRESS_LEVEL = 1
+
+# Umbrales de la tasa de error dibujados en los gráficos
+WARNING_LEVEL = 5
+CRITICAL_LEVEL = 15
+
+
+def _new_figure(figsize, dpi):
+    """Figura independiente de pyplot con lienzo Agg"""
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+class ReportRenderer:
+    """Gráfico de tiempos de respuesta y tasas de error por API de una ejecución"""
+
+    def __init__(self, apis, figure=None, figsize=(12, 10), dpi=100):
+        """
+        Args:
+            apis (dict): APIs del simulador (para los nombres de las barras)
+            figure (Figure): Figura a reutilizar (por ejemplo una de pyplot para mostrarla);
+                si no se indica se crea una figura Agg sin interfaz
+            figsize (tuple): Tamaño de la figura en pulgadas
+            dpi (int): Resolución de los archivos generados
+        """
+        self.apis = apis
+        self.figure = figure if figure is not None else _new_figure(figsize, dpi)
+        with style.context(STYLE):
+            self.ax_time, self.ax_error = self.figure.subplots(2, 1)
+        self.title = self.figure.suptitle("", fontsize=16)
+        self.info = self.figure.text(0.15, 0.02, "", fontsize=12,
+                                     bbox=dict(boxstyle="round", facecolor="wheat", alpha=0.5))
+        self._keys = None
+        self._bars = None
+        self._labels = None
+
+    def _build(self, keys):
+        """Crea barras, etiquetas y líneas de referencia para un conjunto de APIs"""
+        names = [self.apis[api]["name"].split(" ")[0] for api in keys]
+        with style.context(STYLE):
+            for ax in (self.ax_time, self.ax_error):
+                ax.cla()
+            bars_time = self.ax_time.bar(names, [0] * len(keys), color="steelblue")
+            bars_error = self.ax_error.bar(names, [0] * len(keys), color="indianred")
+            self.ax_time.set_title("Tiempos de Respuesta por API")
+            self.ax_time.set_ylabel("Tiempo (segundos)")
+            self.ax_error.set_title("Tasa de Error por API")
+            self.ax_error.set_ylabel("Error (%)")
+            self.ax_error.axhline(y=WARNING_LEVEL, linestyle="--", color="orange", alpha=0.7,
+                                  label=f"Nivel de advertencia ({WARNING_LEVEL}%)")
+            self.ax_error.axhline(y=CRITICAL_LEVEL, linestyle="--", color="red", alpha=0.7,
+                                  label=f"Nivel crítico ({CRITICAL_LEVEL}%)")
+            self.ax_error.legend()
+            labels_time = [self.ax_time.text(0, 0, "", ha="center", va="bottom") for _ in keys]
+            labels_error = [self.ax_error.text(0, 0, "", ha="center", va="bottom") for _ in keys]
+
+        self._keys = keys
+        self._bars = (bars_time, bars_error)
+        self._labels = (labels_time, labels_error)
+        # Equivale a tight_layout pero sin dejar un motor de maquetación en la figura,
+        # que obligaría a dibujarla dos veces en cada savefig
+        TightLayoutEngine(rect=[0, 0.05, 1, 0.95]).execute(self.figure)
+
+    def draw(self, results):
+        """Actualiza la figura con los resultados de una ejecución"""
+        keys = [api for api, pct in results["distribution"].items() if pct > 0]
+        if keys != self._keys:
+            self._build(keys)
+
+        series = (
+            ([results["response_time"][api] for api in keys], self.ax_time, 0.1, "{:.2f}s"),
+            ([results["error_rate"][api] for api in keys], self.ax_error, 0.5, "{:.2f}%"),
+        )
+        for (values, ax, offset, fmt), bars, labels in zip(series, self._bars, self._labels):
+            for bar, label, value in zip(bars, labels, values):
+                bar.set_height(value)
+                label.set_position((bar.get_x() + bar.get_width() / 2., value + offset))
+                label.set_text(fmt.format(value))
+            ax.set_ylim(0, max(max(values) * 1.2, 1e-3))
+
+        self.title.set_text(f'Resultados de Simulación: {results["total_users"]:,} usuarios')
+        self.info.set_text("\n".join((
+            f'Usuarios concurrentes: {results["total_users"]:,}',
+            f'Tasa de error global: {results["avg_error_rate"]:.2f}%',
+            f'Tiempo medio de respuesta: {results["avg_response_time"]:.2f}s',
+            f'CPU: {results["system_metrics"]["cpu"]:.1f}%',
+            f'Memoria: {results["system_metrics"]["memory"]:.1f}%')))
+        return self.figure
+
+    def render(self, results, filename):
+        """Dibuja una ejecución y la guarda en un archivo (png, svg, pdf...)"""
+        self.draw(results)
+        if filename.lower().endswith(".png"):
+            self.figure.savefig(filename, pil_kwargs={"compress_level": PNG_COMPRESS_LEVEL})
+        else:
+            self.figure.savefig(filename)
+        return filename
+
+    def render_many(self, runs, output_dir, pattern="run_{index:05d}.png"):
+        """
+        Dibuja muchas ejecuciones reutilizando la figura
+
+        Pensado para decenas o cientos de ejecuciones; para barridos de miles de
+        puntos plot_sweep y plot_heatmap son órdenes de magnitud más rápidos.
+
+        Args:
+            runs (iterable): Resultados de cada ejecución
+            output_dir (str): Directorio de salida (se crea si no existe)
+            pattern (str): Nombre de archivo; admite {index} y {users}
+
+        Returns:
+            list: Rutas generadas
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for index, results in enumerate(runs):
+            name = pattern.format(index=index, users=results["total_users"])
+            paths.append(self.render(results, os.path.join(output_dir, name)))
+        return paths
+
+
+def _sweep_columns(runs, apis):
+    """Normaliza un barrido (columnas de calculate_results_batch o lista de resultados) a arrays"""
+    if isinstance(runs, dict):
+        return (np.asarray(runs["total_users"]),
+                {api: np.asarray(runs["response_time"][api]) for api in apis},
+                {api: np.asarray(runs["error_rate"][api]) for api in apis})
+    runs = list(runs)
+    users = np.array([r["total_users"] for r in runs])
+    response_time = {api: np.array([r["response_time"].get(api, np.nan) for r in runs]) for api in apis}
+    error_rate = {api: np.array([r["error_rate"].get(api, np.nan) for r in runs]) for api in apis}
+    return users, response_time, error_rate
+
+
+def plot_sweep(runs, apis, filename, title=None, figsize=(12, 9), dpi=100):
+    """
+    Curvas de latencia y tasa de error frente al número de usuarios en un barrido
+
+    Args:
+        runs (dict | list): Columnas de calculate_results_batch o lista de resultados
+        apis (dict): APIs del simulador
+        filename (str): Archivo de salida
+        title (str): Título del gráfico
+    """
+    keys = list(apis)
+    users, response_time, error_rate = _sweep_columns(runs, keys)
+    order = np.argsort(users, kind="stable")
+
+    figure = _new_figure(figsize, dpi)
+    with style.context(STYLE):
+        ax_time, ax_error = figure.subplots(2, 1, sharex=True)
+        for api in keys:
+            label = apis[api]["name"].split(" ")[0]
+            ax_time.plot(users[order], response_time[api][order], label=label, linewidth=1)
+            ax_error.plot(users[order], error_rate[api][order], label=label, linewidth=1)
+        ax_time.set_ylabel("Tiempo (segundos)")
+        ax_time.set_title("Tiempo de respuesta frente a usuarios")
+        ax_time.legend(loc="upper left")
+        ax_error.axhline(y=WARNING_LEVEL, linestyle="--", color="orange", alpha=0.7)
+        ax_error.axhline(y=CRITICAL_LEVEL, linestyle="--", color="red", alpha=0.7)
+        ax_error.set_ylabel("Error (%)")
+        ax_error.set_xlabel("Usuarios concurrentes")
+        ax_error.set_title("Tasa de error frente a usuarios")
+    figure.suptitle(title or f"Barrido de {users.size:,} puntos", fontsize=16)
+    figure.tight_layout(rect=[0, 0, 1, 0.96])
+    figure.savefig(filename)
+    return filename
+
+
+def plot_heatmap(runs, apis, filename, metric="error_rate", bins=100, title=None, figsize=(12, 5), dpi=100):
+    """
+    Mapa de calor por API (filas) y número de usuarios (columnas) de una métrica
+
+    Los puntos del barrido se agrupan en `bins` intervalos de usuarios y se
+    promedian, así el coste no depende del número de puntos.
+
+    Args:
+        runs (dict | list): Columnas de calculate_results_batch o lista de resultados
+        apis (dict): APIs del simulador
+        filename (str): Archivo de salida
+        metric (str): "error_rate" o "response_time"
+        bins (int): Intervalos de usuarios
+    """
+    keys = list(apis)
+    users, response_time, error_rate = _sweep_columns(runs, keys)
+    values = error_rate if metric == "error_rate" else response_time
+
+    edges = np.linspace(users.min(), users.max() + 1, bins + 1)
+    column = np.clip(np.searchsorted(edges, users, side="right") - 1, 0, bins - 1)
+    counts = np.bincount(column, minlength=bins)
+    grid = np.full((len(keys), bins), np.nan)
+    for row, api in enumerate(keys):
+        sums = np.bincount(column, weights=np.nan_to_num(values[api]), minlength=bins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            grid[row] = sums / counts
+
+    figure = _new_figure(figsize, dpi)
+    ax = figure.subplots()
+    image = ax.imshow(grid, aspect="auto", cmap="inferno", interpolation="nearest",
+                      extent=[edges[0], edges[-1], len(keys) - 0.5, -0.5])
+    ax.set_yticks(range(len(keys)))
+    ax.set_yticklabels([apis[api]["name"].split(" ")[0] for api in keys])
+    ax.set_xlabel("Usuarios concurrentes")
+    figure.colorbar(image, ax=ax, label="Error (%)" if metric == "error_rate" else "Tiempo (segundos)")
+    ax.set_title(title or ("Tasa de error por API" if metric == "error_rate" else "Tiempo de respuesta por API"))
+    figure.tight_layout()
+    figure.savefig(filename)
+    return filename
@@ -0,0 +1,206 @@
+"""
+Población de usuarios virtuales a escala de millones
+
+El estado de cada usuario (sesión, token, saldo, contraparte habitual y
+próxima API) se guarda en un único array estructurado de NumPy de unos 22
+bytes por usuario: 5 millones de usuarios ocupan ~110 MB en lugar de los
+gigabytes de una lista de objetos. La simulación avanza por pasos de tiempo
+y sólo procesa, por bloques de tamaño fijo, los usuarios cuya próxima acción
+vence en ese paso, así la memoria de trabajo no depende de la población.
+
+Cada usuario alterna sesiones y periodos sin conexión. Dentro de una sesión
+hace una petición tras cada tiempo de reflexión: si su token ha caducado (por
+ejemplo al iniciar sesión) la petición es siempre a auth; si no, la próxima
+API se elige según la distribución del escenario. Las transferencias P2P
+mueven saldo hacia la contraparte del usuario y los pagos y retiros lo
+reducen.
+"""
+import numpy as np
+
+# Estado por usuario (tiempos en segundos desde el inicio de la simulación, saldo en pesos)
+USER_DTYPE = np.dtype([
+    ("next_time", "f4"),
+    ("session_end", "f4"),
+    ("token_expires", "f4"),
+    ("balance", "i4"),
+    ("counterparty", "u4"),
+    ("active", "u1"),
+    ("next_api", "u1"),
+])
+
+# Bytes de trabajo por usuario de cada bloque (máscaras, índices y copias de campos)
+_WORK_BYTES_PER_USER = 64
+
+
+class Population:
+    """Estado compacto de una población de usuarios y su simulación por pasos"""
+
+    def __init__(self, apis, size, distribution, think_time=5.0, session_length=300.0, session_gap=43200.0,
+                 token_ttl=900.0, mean_balance=250000, transfer_amount=50000, chunk_size=1_000_000,
+                 memory_budget=512 * 2 ** 20, seed=None):
+        """
+        Args:
+            apis (dict): APIs del simulador (FinancialLoadTestSimulator.apis)
+            size (int): Usuarios registrados
+            distribution (dict): Porcentaje de peticiones por API dentro de una sesión
+            think_time (float): Tiempo medio entre peticiones de un usuario en sesión
+            session_length (float): Duración media de una sesión en segundos
+            session_gap (float): Tiempo medio sin conexión entre sesiones en segundos
+            token_ttl (float): Validez del token de auth en segundos (luego se renueva)
+            mean_balance (int): Saldo medio inicial en pesos
+            transfer_amount (int): Importe medio de transferencias, pagos y retiros
+            chunk_size (int): Usuarios procesados a la vez (acota la memoria de trabajo)
+            memory_budget (int): Memoria máxima en bytes para estado y trabajo
+            seed (int): Semilla del generador aleatorio
+        """
+        self.apis = list(apis)
+        self.size = int(size)
+        self.chunk_size = min(int(chunk_size), max(self.size, 1))
+        self.memory_bytes = self.size * USER_DTYPE.itemsize + self.chunk_size * _WORK_BYTES_PER_USER
+        if memory_budget is not None and self.memory_bytes > memory_budget:
+            raise ValueError(f"La población de {self.size:,} usuarios necesita {self.memory_bytes / 2 ** 20:.0f} MB "
+                             f"y el presupuesto es {memory_budget / 2 ** 20:.0f} MB; reduzca chunk_size o el tamaño")
+
+        weights = np.array([distribution.get(api, 0) for api in self.apis], dtype=np.float64)
+        if weights.sum() <= 0:
+            raise ValueError("La distribución debe asignar tráfico al menos a una API")
+        self.cum_weights = np.cumsum(weights / weights.sum())
+        # El redondeo puede dejar el último acumulado por debajo de 1 y searchsorted devolvería len(apis)
+        self.cum_weights[-1] = 1.0
+        self.index = {api: i for i, api in enumerate(self.apis)}
+        self.auth = self.index.get("auth")
+
+        self.think_time = think_time
+        self.session_length = session_length
+        self.session_gap = session_gap
+        self.token_ttl = token_ttl
+        self.transfer_amount = transfer_amount
+        self.rng = np.random.default_rng(seed)
+
+        self.calls = np.zeros(len(self.apis), dtype=np.int64)
+        self.token_refreshes = 0
+        self.sessions_started = 0
+        self.transferred = 0
+        self.state = self._initial_state(mean_balance)
+        self.active_users = int(self.state["active"].sum())
+
+    def _initial_state(self, mean_balance):
+        """Estado estacionario: cada usuario está en sesión con probabilidad L / (L + G)"""
+        state = np.zeros(self.size, dtype=USER_DTYPE)
+        for lo in range(0, self.size, self.chunk_size):
+            part = state[lo:lo + self.chunk_size]
+            n = part.size
+            active = self.rng.random(n) < self.session_length / (self.session_length + self.session_gap)
+            part["active"] = active
+            # Tiempo restante de sesión o de desconexión (exponenciales: sin memoria)
+            part["session_end"] = np.where(active, self.rng.exponential(self.session_length, n), -1)
+            part["next_time"] = np.where(active, self.rng.exponential(self.think_time, n),
+                                         self.rng.exponential(self.session_gap, n))
+            part["token_expires"] = np.where(active, self.rng.uniform(0, self.token_ttl, n), 0)
+            part["balance"] = np.minimum(self.rng.exponential(mean_balance, n), 2 ** 31 - 1)
+            part["counterparty"] = self.rng.integers(0, self.size, n)
+            part["next_api"] = self._choose_api(n)
+        return state
+
+    def _choose_api(self, n):
+        return np.searchsorted(self.cum_weights, self.rng.random(n), side="right").astype(np.uint8)
+
+    def _step_chunk(self, part, t, dt):
+        """Procesa los usuarios del bloque cuya próxima acción vence antes de t + dt"""
+        due = np.flatnonzero(part["next_time"] < t + dt)
+        if not due.size:
+            return
+        rng = self.rng
+        now = part["next_time"][due]
+        active = part["active"][due].astype(bool)
+        session_end = part["session_end"][due]
+        next_time = np.empty_like(now)
+
+        # Usuarios desconectados que inician sesión: la primera petición es inmediata
+        starting = ~active
+        n_start = int(starting.sum())
+        session_end[starting] = now[starting] + rng.exponential(self.session_length, n_start)
+        self.sessions_started += n_start
+        self.active_users += n_start
+
+        # Sesiones que terminan: sin petición, vuelven a conectarse tras un periodo sin conexión
+        ending = ~starting & (now >= session_end)
+        n_end = int(ending.sum())
+        next_time[ending] = now[ending] + rng.exponential(self.session_gap, n_end)
+        session_end[ending] = -1
+        self.active_users -= n_end
+
+        calling = ~ending
+        users = due[calling]
+        when = now[calling]
+        api = part["next_api"][users]
+
+        # Token caducado (siempre al iniciar sesión tras un periodo largo): se renueva con auth
+        if self.auth is not None:
+            expired = part["token_expires"][users] <= when
+            api[expired] = self.auth
+            self.token_refreshes += int(expired.sum())
+            renewed = api == self.auth
+            part["token_expires"][users[renewed]] = when[renewed] + self.token_ttl
+        self.calls += np.bincount(api, minlength=len(self.apis))
+
+        self._move_money(part, users, api)
+
+        next_time[calling] = when + rng.exponential(self.think_time, users.size)
+        part["next_api"][users] = self._choose_api(users.size)
+        part["next_time"][due] = next_time
+        part["session_end"][due] = session_end
+        part["active"][due] = ~ending
+
+    def _move_money(self, part, users, api):
+        """Aplica transferencias P2P (a la contraparte), pagos QR y retiros sobre los saldos"""
+        spending = np.zeros(users.size, dtype=bool)
+        for key in ("p2p", "qr", "withdrawal"):
+            if key in self.index:
+                spending |= api == self.index[key]
+        if not spending.any():
+            return
+        payers = users[spending]
+        balance = part["balance"][payers]
+        amount = np.minimum(self.rng.exponential(self.transfer_amount, payers.size).astype(np.int64), balance)
+        part["balance"][payers] = balance - amount
+
+        if "p2p" in self.index:
+            p2p = api[spending] == self.index["p2p"]
+            # La contraparte puede estar en otro bloque: se abona sobre el estado completo
+            np.add.at(self.state["balance"], part["counterparty"][payers[p2p]], amount[p2p].astype(np.int32))
+            self.transferred += int(amount[p2p].sum())
+
+    def run(self, duration=60.0, step=1.0, callback=None):
+        """
+        Simula la población durante `duration` segundos
+
+        Args:
+            duration (float): Segundos simulados
+            step (float): Anchura de cada paso en segundos
+            callback (callable): Si se indica, se llama con (t, usuarios en sesión) tras cada paso
+
+        Returns:
+            dict: Usuarios en sesión (media y pico), peticiones por API y contadores de la población
+        """
+        concurrency = []
+        t = 0.0
+        while t < duration:
+            for lo in range(0, self.size, self.chunk_size):
+                self._step_chunk(self.state[lo:lo + self.chunk_size], t, step)
+            concurrency.append(self.active_users)
+            if callback is not None:
+                callback(t, self.active_users)
+            t += step
+
+        return {
+            "size": self.size,
+            "duration": duration,
+            "active_mean": float(np.mean(concurrency)),
+            "active_peak": int(max(concurrency)),
+            "calls": dict(zip(self.apis, self.calls.tolist())),
+            "token_refreshes": self.token_refreshes,
+            "sessions_started": self.sessions_started,
+            "transferred": self.transferred,
+            "memory_bytes": self.memory_bytes,
+        }
@@ -0,0 +1,197 @@
+"""
+Perfiles de carga y resultados en series temporales
+
+Un perfil describe cuántos usuarios hay en cada instante de la prueba (rampa,
+escalones, pico o carga sostenida). stream_timeseries evalúa el modelo en
+intervalos de un segundo y los entrega uno a uno a medida que se calculan,
+así que una prueba de 24 horas ocupa la misma memoria que una de un minuto.
+"""
+import numpy as np
+
+# Parámetros por defecto de cada tipo de perfil (segundos o fracciones de los usuarios del escenario)
+PROFILE_DEFAULTS = {
+    "ramp": {"ramp_up": 60, "steady": 300, "ramp_down": 60},
+    "step": {"steps": 5, "step_duration": 60},
+    "spike": {"duration": 600, "base": 0.2, "spike_at": 300, "spike_duration": 60},
+    "soak": {"duration": 86400},
+}
+
+
+def _validate(kind, p):
+    """
+    Comprueba que los parámetros de un perfil dan nodos estrictamente crecientes
+
+    Args:
+        kind (str): Tipo de perfil
+        p (dict): Parámetros con los valores por defecto aplicados
+
+    Raises:
+        ValueError: Si algún parámetro no es válido
+    """
+    for name, value in p.items():
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError(f"El parámetro '{name}' del perfil '{kind}' debe ser numérico")
+
+    durations = {"ramp": ("ramp_up", "steady", "ramp_down"), "step": ("step_duration",),
+                 "spike": ("duration", "spike_at", "spike_duration"), "soak": ("duration",)}[kind]
+    for name in durations:
+        if p[name] <= 0:
+            raise ValueError(f"'{name}' del perfil '{kind}' debe ser mayor que 0 segundos")
+
+    if kind == "step" and (p["steps"] < 1 or p["steps"] != int(p["steps"])):
+        raise ValueError("'steps' del perfil 'step' debe ser un entero mayor o igual que 1")
+    if kind == "spike":
+        if not 0 <= p["base"] <= 1:
+            raise ValueError("'base' del perfil 'spike' debe estar entre 0 y 1 (fracción de los usuarios)")
+        if p["spike_at"] + p["spike_duration"] >= p["duration"]:
+            raise ValueError(f"El pico del perfil 'spike' (spike_at + spike_duration = "
+                             f"{p['spike_at'] + p['spike_duration']:g}s) debe terminar antes de duration "
+                             f"({p['duration']:g}s)")
+
+
+class LoadProfile:
+    """
+    Perfil de carga lineal a tramos
+
+    Se define con nodos (tiempo, usuarios); entre nodos los usuarios se
+    interpolan linealmente, lo que cubre rampas, escalones y picos.
+    """
+
+    def __init__(self, kind, times, users):
+        self.kind = kind
+        self.times = np.asarray(times, dtype=np.float64)
+        self.users = np.asarray(users, dtype=np.float64)
+        self.duration = float(self.times[-1])
+
+    @classmethod
+    def build(cls, kind, peak_users, **params):
+        """
+        Crea un perfil del tipo indicado
+
+        Args:
+            kind (str): "ramp", "step", "spike" o "soak"
+            peak_users (int): Usuarios máximos (los del escenario)
+            **params: Parámetros del tipo de perfil (ver PROFILE_DEFAULTS)
+
+        Returns:
+            LoadProfile: Perfil construido
+        """
+        if kind not in PROFILE_DEFAULTS:
+            raise ValueError(f"Perfil no válido '{kind}'. Use {', '.join(PROFILE_DEFAULTS)}.")
+        unknown = set(params) - set(PROFILE_DEFAULTS[kind])
+        if unknown:
+            raise ValueError(f"Parámetros no válidos para '{kind}': {', '.join(sorted(unknown))}")
+        p = {**PROFILE_DEFAULTS[kind], **params}
+        _validate(kind, p)
+        edge = 1e-6  # Cambio prácticamente instantáneo para escalones y picos
+
+        if kind == "ramp":
+            up, steady, down = p["ramp_up"], p["steady"], p["ramp_down"]
+            times = [0, up, up + steady, up + steady + down]
+            users = [0, peak_users, peak_users, 0]
+        elif kind == "step":
+            times, users = [], []
+            for i in range(int(p["steps"])):
+                level = peak_users * (i + 1) / p["steps"]
+                start = i * p["step_duration"]
+                times += [start + (edge if i else 0), start + p["step_duration"]]
+                users += [level, level]
+        elif kind == "spike":
+            base = peak_users * p["base"]
+            start, end = p["spike_at"], p["spike_at"] + p["spike_duration"]
+            times = [0, start, start + edge, end, end + edge, p["duration"]]
+            users = [base, base, peak_users, peak_users, base, base]
+        else:
+            times = [0, p["duration"]]
+            users = [peak_users, peak_users]
+
+        return cls(kind, times, users)
+
+    @classmethod
+    def from_spec(cls, spec, peak_users):
+        """
+        Crea un perfil a partir de un dict {"type": ..., parámetros} o un texto "tipo:clave=valor,..."
+
+        Args:
+            spec (dict | str): Especificación del perfil
+            peak_users (int): Usuarios máximos (los del escenario)
+        """
+        if isinstance(spec, str):
+            kind, _, text = spec.partition(":")
+            params = {}
+            for item in filter(None, text.split(",")):
+                key, _, value = item.partition("=")
+                try:
+                    params[key.strip()] = float(value)
+                except ValueError:
+                    raise ValueError(f"Parámetro de perfil no válido '{item}'. Use clave=número")
+        else:
+            params = dict(spec)
+            if "type" not in params:
+                raise ValueError("El perfil debe indicar su tipo en la clave 'type'")
+            kind = params.pop("type")
+        return cls.build(kind, peak_users, **params)
+
+    def users_at(self, t):
+        """Usuarios en los instantes t (array de segundos)"""
+        return np.interp(t, self.times, self.users)
+
+    def phase_at(self, t, bucket=1.0):
+        """Fase de cada intervalo [t, t + bucket): "ramp-up", "steady" o "ramp-down" """
+        delta = self.users_at(np.asarray(t) + bucket) - self.users_at(t)
+        return np.where(delta > 0.5, "ramp-up", np.where(delta < -0.5, "ramp-down", "steady"))
+
+
+def stream_timeseries(simulator, users, distribution, profile, seed=None, bucket=1.0, chunk=3600, callback=None):
+    """
+    Genera los resultados intervalo a intervalo siguiendo un perfil de carga
+
+    Los intervalos se evalúan por bloques de `chunk` con el motor vectorizado
+    y se entregan de uno en uno: la memoria depende de `chunk`, no de la
+    duración de la prueba.
+
+    Args:
+        simulator (FinancialLoadTestSimulator): Simulador con el modelo
+        users (int): Usuarios máximos del escenario
+        distribution (dict): Distribución de peticiones por API
+        profile (LoadProfile | dict | str): Perfil de carga
+        seed (int): Semilla del generador aleatorio
+        bucket (float): Anchura de cada intervalo en segundos
+        chunk (int): Intervalos evaluados por bloque
+        callback (callable): Si se indica, se llama con cada intervalo además de entregarlo
+
+    Yields:
+        dict: Intervalo con su instante, fase, usuarios y métricas por API
+    """
+    if not isinstance(profile, LoadProfile):
+        profile = LoadProfile.from_spec(profile, users)
+
+    rng = np.random.default_rng(seed)
+    n_buckets = int(np.ceil(profile.duration / bucket))
+    apis = list(simulator.apis)
+
+    for start in range(0, n_buckets, chunk):
+        t = np.arange(start, min(start + chunk, n_buckets)) * bucket
+        # Usuarios en el centro de cada intervalo
+        active = np.rint(profile.users_at(t + bucket / 2)).astype(np.int64)
+        phases = profile.phase_at(t, bucket)
+        batch = simulator.calculate_results_batch(active, distribution, seed=rng)
+
+        columns = [t.tolist(), phases.tolist(), active.tolist(), batch["avg_response_time"].tolist(),
+                   batch["avg_error_rate"].tolist(), batch["cpu"].tolist(), batch["memory"].tolist()]
+        api_columns = [(api, batch["response_time"][api].tolist(), batch["error_rate"][api].tolist()) for api in apis]
+
+        for i, (time, phase, n_users, avg_rt, avg_er, cpu, memory) in enumerate(zip(*columns)):
+            item = {
+                "t": time,
+                "phase": phase,
+                "users": n_users,
+                "response_time": {api: rt[i] for api, rt, _ in api_columns},
+                "error_rate": {api: er[i] for api, _, er in api_columns},
+                "system_metrics": {"cpu": cpu, "memory": memory},
+                "avg_response_time": avg_rt,
+                "avg_error_rate": avg_er,
+            }
+            if callback is not None:
+                callback(item)
+            yield item
@@ -0,0 +1,371 @@
+"""
+Reproducción de trazas de tráfico real a partir de logs de acceso
+
+Lee logs en formato común o combinado de Apache/nginx, por ejemplo:
+    10.0.0.1 - - [03/Oct/2026:04:00:00 +0000] "POST /api/v2/p2p HTTP/1.1" 200 196 "-" "okhttp/4.9.0"
+en bloques de tamaño fijo (también comprimidos con gzip), así la memoria no
+depende del tamaño del log. Cada bloque se analiza con NumPy sin bucles por
+línea: la fecha se convierte a segundos con aritmética sobre los bytes y la
+petición se clasifica comparando sus primeros bytes con la firma "MÉTODO
+/ruta" de cada API. Las líneas que no encajan en ninguna firma se resuelven
+con mock_server.RouteTable (404/405 se cuentan como no reconocidas).
+
+Las fechas del log tienen resolución de segundos: las peticiones de un mismo
+segundo se reparten uniformemente dentro de él. La traza se reproduce con su
+ritmo original o acelerada ×speed, con el modelo predictivo (métricas por
+intervalo con la tasa observada) o con el generador HTTP real.
+"""
+import gzip
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from mock_server import RouteTable
+
+# Tamaño de cada bloque leído del log
+CHUNK_SIZE = 4 * 2 ** 20
+
+_MONTHS = [b"Jan", b"Feb", b"Mar", b"Apr", b"May", b"Jun", b"Jul", b"Aug", b"Sep", b"Oct", b"Nov", b"Dec"]
+_MONTH_CODES = np.array([(m[0] << 16) | (m[1] << 8) | m[2] for m in _MONTHS])
+_MONTH_ORDER = np.argsort(_MONTH_CODES)
+
+# Ventana tras el "[": "dd/Mon/yyyy:HH:MM:SS +zzzz] \"". En la plantilla, D es un dígito,
+# m una letra del mes y s el signo de la zona horaria; el resto son bytes fijos.
+_DATE_TEMPLATE = b'DD/mmm/DDDD:DD:DD:DD sDDDD] "'
+_DATE_WIDTH = len(_DATE_TEMPLATE)
+_DATE_LOW = np.array([{68: 48, 109: 65, 115: 43}.get(c, c) for c in _DATE_TEMPLATE], dtype=np.uint8)
+# Amplitud de cada rango: con aritmética uint8, byte - bajo <= amplitud equivale a bajo <= byte <= alto
+_DATE_SPAN = np.array([{68: 57, 109: 122, 115: 45}.get(c, c) for c in _DATE_TEMPLATE], dtype=np.uint8) - _DATE_LOW
+
+# Peso de cada dígito de la ventana en día, año, segundos del día y segundos de la zona
+_FIELD_WEIGHTS = np.zeros((_DATE_WIDTH, 4))
+for _column, _positions, _weights in ((0, (0, 1), (10, 1)), (1, (7, 8, 9, 10), (1000, 100, 10, 1)),
+                                      (2, (12, 13, 15, 16, 18, 19), (36000, 3600, 600, 60, 10, 1)),
+                                      (3, (22, 23, 24, 25), (36000, 3600, 600, 60))):
+    _FIELD_WEIGHTS[list(_positions), _column] = _weights
+
+def open_log(path):
+    """Abre el log en binario; los archivos gzip se detectan por su firma"""
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    return gzip.open(path, "rb") if compressed else open(path, "rb")
+
+
+def _days_from_civil(year, month, day):
+    """Días desde 1970-01-01 de fechas del calendario gregoriano (vectorizado)"""
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * np.where(month > 2, month - 3, month + 9) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+# Bytes nulos añadidos al bloque para que las ventanas nunca salgan del buffer
+_PADDING = 64
+
+# Bytes inspeccionados del parámetro de las rutas con plantilla (p. ej. {accountId})
+_PARAMETER_WIDTH = 32
+
+
+def _take(buf, starts, width):
+    """Ventanas de `width` bytes desde cada posición (copia de filas contiguas, sin índices por byte)"""
+    return sliding_window_view(buf, width)[np.minimum(starts, buf.size - width)]
+
+
+def _first_after(positions, starts, sentinel):
+    """Primera posición de `positions` en o después de cada inicio (sentinel si no hay)"""
+    found = np.searchsorted(positions, starts)
+    return np.append(positions, sentinel)[found]
+
+
+class AccessLogParser:
+    """Convierte bloques de un log de acceso en instantes y claves de API"""
+
+    def __init__(self, apis):
+        """
+        Args:
+            apis (dict): APIs del simulador (FinancialLoadTestSimulator.apis)
+        """
+        self.api_keys = list(apis)
+        self.routes = RouteTable(apis)
+        self._fallback = {}
+        # Firma de cada API: método, espacio y la parte literal de la ruta. Las rutas con
+        # plantilla sólo tienen firma si el parámetro es el último segmento.
+        self.signatures = []
+        for index, key in enumerate(self.api_keys):
+            method, path = apis[key]["method"], apis[key]["path"]
+            literal, brace, rest = path.partition("{")
+            if brace and rest.find("}") != len(rest) - 1:
+                continue
+            self.signatures.append((index, f"{method} {literal}".encode(), bool(brace)))
+        # Las firmas se comparan de 8 en 8 bytes como enteros de 64 bits
+        self.width = -(-(max(len(signature) for _, signature, _ in self.signatures) + 1) // 8) * 8
+        if self.width > _PADDING:
+            raise ValueError("Las rutas de las APIs son demasiado largas para el analizador")
+        self._words = []
+        for index, signature, templated in self.signatures:
+            words = -(-len(signature) // 8)
+            value = np.frombuffer(signature.ljust(words * 8, b"\0"), dtype="<u8")
+            mask = np.frombuffer((b"\xff" * len(signature)).ljust(words * 8, b"\0"), dtype="<u8")
+            self._words.append((value, mask))
+        self.lines = 0
+        self.matched = 0
+        self.unmatched = 0
+        self.malformed = 0
+
+    @property
+    def stats(self):
+        """Contadores de líneas leídas, reconocidas, no reconocidas y mal formadas"""
+        return {"lines": self.lines, "matched": self.matched, "unmatched": self.unmatched,
+                "malformed": self.malformed}
+
+    def parse(self, chunk):
+        """
+        Analiza un bloque de líneas completas
+
+        Args:
+            chunk (bytes): Líneas terminadas en salto de línea
+
+        Returns:
+            tuple: (segundos Unix como float64, índice de API como int8) de las líneas reconocidas
+        """
+        size = len(chunk)
+        buf = np.frombuffer(chunk + bytes(_PADDING), dtype=np.uint8)
+        ends = np.flatnonzero(buf[:size] == 10)
+        if not ends.size:
+            return np.empty(0), np.empty(0, dtype=np.int8)
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        self.lines += int(ends.size)
+
+        # Fecha entre corchetes
+        bracket = _first_after(np.flatnonzero(buf[:size] == ord("[")), starts, size)
+        date = _take(buf, bracket + 1, _DATE_WIDTH)
+        valid = (bracket + _DATE_WIDTH < ends) & ((date - _DATE_LOW) <= _DATE_SPAN).all(axis=1)
+        month_code = (date[:, 3].astype(np.int32) << 16) | (date[:, 4].astype(np.int32) << 8) | date[:, 5]
+        month = _MONTH_ORDER[np.minimum(np.searchsorted(_MONTH_CODES[_MONTH_ORDER], month_code), 11)]
+        valid &= _MONTH_CODES[month] == month_code
+
+        day, year, clock, zone = ((date - 48.0) @ _FIELD_WEIGHTS).astype(np.int64).T
+        sign = date[:, 21]
+        valid &= (sign == ord("+")) | (sign == ord("-"))
+        zone *= np.where(sign == ord("-"), -1, 1)
+        seconds = _days_from_civil(year, month + 1, day) * 86400 + clock - zone
+
+        # Petición tras la comilla que sigue a la fecha: se compara con la firma de cada API
+        quote = bracket + _DATE_WIDTH
+        request = _take(buf, quote + 1, self.width)
+        words = request.view("<u8")
+        api = np.full(ends.size, -1, dtype=np.int8)
+        for (index, signature, templated), (value, mask) in zip(self.signatures, self._words):
+            length = len(signature)
+            # Se compara primero la última palabra (la más distintiva) y el resto sólo en los candidatos
+            rows = np.flatnonzero((words[:, value.size - 1] & mask[-1]) == value[-1])
+            if value.size > 1:
+                rows = rows[((words[rows, :value.size - 1] & mask[:-1]) == value[:-1]).all(axis=1)]
+            rows = rows[valid[rows] & (api[rows] < 0)]
+            if templated:
+                # El parámetro no es vacío y termina en un espacio antes de cualquier "/" o "?"
+                parameter = _take(buf, quote[rows] + 1 + length, _PARAMETER_WIDTH)
+                space = parameter == ord(" ")
+                end = np.where(space.any(axis=1), space.argmax(axis=1), _PARAMETER_WIDTH)
+                stop = (parameter == ord("/")) | (parameter == ord("?"))
+                rows = rows[(end > 0) & (end < _PARAMETER_WIDTH) & (np.where(stop.any(axis=1), stop.argmax(axis=1),
+                                                                             _PARAMETER_WIDTH) > end)]
+            else:
+                following = request[rows, length]
+                rows = rows[(following == ord(" ")) | (following == ord("?"))]
+            api[rows] = index
+
+        # Líneas válidas sin firma: se resuelven con la tabla de rutas del servidor simulado
+        for line in np.flatnonzero(valid & (api < 0)).tolist():
+            api[line] = self._resolve(chunk[quote[line] + 1:ends[line]])
+
+        self.malformed += int((~valid).sum())
+        recognised = api >= 0
+        self.matched += int(recognised.sum())
+        self.unmatched += int((valid & ~recognised).sum())
+        return seconds[recognised].astype(np.float64), api[recognised]
+
+    def _resolve(self, request):
+        """Índice de API de una petición "MÉTODO ruta PROTOCOLO" (-1 si no se reconoce)"""
+        parts = request.split(b" ", 2)
+        if len(parts) < 2:
+            return -1
+        key = (parts[0], parts[1])
+        index = self._fallback.get(key)
+        if index is None:
+            api, status = self.routes.match(parts[0].decode("latin-1"), parts[1].decode("latin-1"))
+            index = self.api_keys.index(api) if status == 200 else -1
+            if len(self._fallback) < 65536:
+                self._fallback[key] = index
+        return index
+
+
+class TraceReader:
+    """
+    Itera sobre un log de acceso por bloques de memoria constante
+
+    Cada elemento es (segundos desde la primera petición, índice de API), con
+    las peticiones de un mismo segundo repartidas uniformemente dentro de él.
+    """
+
+    def __init__(self, path, apis, chunk_size=CHUNK_SIZE):
+        """
+        Args:
+            path (str): Log de acceso (texto o gzip)
+            apis (dict): APIs del simulador
+            chunk_size (int): Bytes leídos por bloque
+        """
+        self.path = path
+        self.parser = AccessLogParser(apis)
+        self.chunk_size = chunk_size
+        self.start = None
+
+    @property
+    def stats(self):
+        return self.parser.stats
+
+    def chunks(self):
+        """Bloques de líneas completas del log"""
+        with open_log(self.path) as f:
+            remainder = b""
+            while True:
+                data = f.read(self.chunk_size)
+                if not data:
+                    break
+                data = remainder + data
+                cut = data.rfind(b"\n") + 1
+                remainder = data[cut:]
+                if cut:
+                    yield data[:cut]
+            if remainder:
+                yield remainder + b"\n"
+
+    def __iter__(self):
+        pending = []
+        for chunk in self.chunks():
+            seconds, api = self.parser.parse(chunk)
+            if not seconds.size:
+                continue
+            if self.start is None:
+                self.start = float(seconds[0])
+            # El último segundo del bloque puede continuar en el siguiente: se retiene
+            if pending:
+                seconds = np.concatenate([pending[0], seconds])
+                api = np.concatenate([pending[1], api])
+            last = seconds[-1]
+            keep = seconds == last
+            if keep.all():
+                pending = [seconds, api]
+                continue
+            pending = [seconds[keep], api[keep]]
+            yield self._spread(seconds[~keep], api[~keep])
+        if pending:
+            yield self._spread(*pending)
+
+    def _spread(self, seconds, api):
+        """Reparte las peticiones de cada segundo uniformemente y las pasa a segundos relativos"""
+        change = np.flatnonzero(np.diff(seconds)) + 1
+        run_starts = np.concatenate(([0], change))
+        lengths = np.diff(np.concatenate((run_starts, [seconds.size])))
+        rank = np.arange(seconds.size) - np.repeat(run_starts, lengths)
+        offsets = seconds - self.start + rank / np.repeat(lengths, lengths)
+        # Líneas fuera de orden anteriores al inicio de la traza se envían al principio
+        return np.maximum(offsets, 0.0), api
+
+
+def replay_model(simulator, reader, speed=1.0, bucket=1.0, think_time=5.0, seed=None, chunk=3600,
+                 callback=None):
+    """
+    Evalúa el modelo intervalo a intervalo con la tasa y la mezcla de la traza
+
+    La tasa observada en cada intervalo se convierte en usuarios equivalentes
+    (tasa × tiempo de reflexión, como en el servidor simulado) y la mezcla de
+    peticiones en la distribución del intervalo. Los intervalos se evalúan por
+    bloques de `chunk` con el motor vectorizado.
+
+    Args:
+        simulator (FinancialLoadTestSimulator): Simulador con el modelo
+        reader (TraceReader): Traza a reproducir
+        speed (float): Factor de aceleración (×speed: más peticiones por segundo reproducido)
+        bucket (float): Anchura de cada intervalo en segundos reproducidos
+        think_time (float): Tiempo de reflexión para convertir tasa en usuarios
+        seed (int): Semilla de la variación aleatoria del modelo
+        chunk (int): Intervalos evaluados por bloque
+        callback (callable): Si se indica, se llama con cada intervalo además de entregarlo
+
+    Yields:
+        dict: Intervalo con su instante, peticiones por API, tasa, usuarios equivalentes y
+            las métricas del modelo
+    """
+    apis = list(simulator.apis)
+    rng = np.random.default_rng(seed)
+    counts = np.zeros((0, len(apis)), dtype=np.int64)
+    first = 0
+
+    def evaluate(rows, first):
+        totals = rows.sum(axis=1)
+        rate = totals / bucket
+        users = np.rint(rate * think_time).astype(np.int64)
+        # Intervalos sin peticiones: se evalúan con usuarios 0 y una mezcla uniforme
+        shares = np.where(totals[:, None] > 0, 100 * rows / np.maximum(totals, 1)[:, None], 100 / len(apis))
+        batch = simulator.calculate_results_batch(users, shares, seed=rng)
+        for i in range(rows.shape[0]):
+            item = {
+                "t": round((first + i) * bucket, 6),
+                "requests": dict(zip(apis, rows[i].tolist())),
+                "rate": float(rate[i]),
+                "users": int(users[i]),
+                "response_time": {api: float(batch["response_time"][api][i]) for api in apis},
+                "error_rate": {api: float(batch["error_rate"][api][i]) for api in apis},
+                "system_metrics": {"cpu": float(batch["cpu"][i]), "memory": float(batch["memory"][i])},
+                "avg_response_time": float(batch["avg_response_time"][i]),
+                "avg_error_rate": float(batch["avg_error_rate"][i]),
+            }
+            if callback is not None:
+                callback(item)
+            yield item
+
+    for offsets, api in reader:
+        # Líneas fuera de orden de intervalos ya entregados se suman al primero abierto
+        index = np.maximum((offsets / speed // bucket).astype(np.int64) - first, 0)
+        needed = int(index.max()) + 1
+        if needed > counts.shape[0]:
+            counts = np.concatenate([counts, np.zeros((needed - counts.shape[0], len(apis)), dtype=np.int64)])
+        np.add.at(counts, (index, api.astype(np.int64)), 1)
+        # Los intervalos anteriores al último están completos (la traza llega en orden)
+        done = min(counts.shape[0] - 1, chunk * ((counts.shape[0] - 1) // chunk))
+        if done:
+            yield from evaluate(counts[:done], first)
+            counts = counts[done:]
+            first += done
+
+    for start in range(0, counts.shape[0], chunk):
+        yield from evaluate(counts[start:start + chunk], first + start)
+
+
+def replay_http(apis, reader, base_url, speed=1.0, seed=None, **generator_options):
+    """
+    Reproduce la traza con peticiones HTTP reales en sus instantes originales (÷ speed)
+
+    Args:
+        apis (dict): APIs del simulador
+        reader (TraceReader): Traza a reproducir (se lee a medida que se envía)
+        base_url (str): URL base del servicio bajo prueba
+        speed (float): Factor de aceleración
+        seed (int): Semilla de las variantes de las rutas con parámetros
+        **generator_options: Parámetros de HttpLoadGenerator (connections, timeout...)
+
+    Returns:
+        dict: Resultados de HttpLoadGenerator con "engine": "replay" y los contadores de la traza
+    """
+    import asyncio
+
+    from load_generator import HttpLoadGenerator
+
+    generator = HttpLoadGenerator(apis, base_url, **generator_options)
+    results = asyncio.run(generator.replay(reader, speed=speed, seed=seed))
+    results["engine"] = "replay"
+    results["trace"] = {"file": reader.path, "speed": speed, **reader.stats}
+    return results
@@ -0,0 +1,232 @@
+"""
+Caché de resultados de simulación direccionada por contenido
+
+Una ejecución con semilla es determinista: el mismo modelo (tipo y
+parámetros), los mismos usuarios, la misma distribución, el mismo motor y la
+misma semilla dan siempre el mismo resultado. La clave de la caché es el
+SHA-256 de esos campos serializados en JSON canónico, junto con
+RESULTS_VERSION, que se incrementa cuando cambia el cálculo de los motores e
+invalida así todas las entradas anteriores.
+
+Las entradas viven en una LRU en memoria acotada en bytes y, si se indica un
+directorio, también en disco (<directorio>/<2 primeros caracteres>/<clave>),
+de modo que el menú interactivo, los paneles y los barridos de otras sesiones
+reutilizan los resultados ya calculados. Los resultados de una ejecución se
+guardan como JSON (.json) y las columnas de los barridos como arrays de NumPy
+sin comprimir (.npz), que se escriben y se leen casi a la velocidad del disco.
+Cada acierto devuelve una copia nueva que el llamante puede modificar sin
+alterar la caché.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+# Versión del cálculo de resultados incluida en todas las claves
+RESULTS_VERSION = 2
+
+# Bytes que ocupan como máximo las entradas en memoria por defecto
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+
+
+class ResultCache:
+    """
+    LRU en memoria acotada en bytes respaldada opcionalmente por un almacén en disco
+
+    Args:
+        directory (str): Directorio del almacén en disco; None → sólo memoria
+        max_bytes (int): Bytes máximos de las entradas en memoria (las menos usadas se
+            descartan; una entrada mayor que el límite sólo se guarda en disco)
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        if max_bytes < 0:
+            raise ValueError("El tamaño de la caché en memoria no puede ser negativo")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        # clave → (texto JSON o dict de arrays, bytes)
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.evictions = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(**fields):
+        """
+        Clave de contenido de una ejecución
+
+        Args:
+            **fields: Campos que determinan el resultado (modelo, usuarios,
+                distribución, semilla, motor...); deben ser serializables en JSON
+
+        Returns:
+            str: SHA-256 hexadecimal del JSON canónico de los campos
+        """
+        payload = json.dumps({"version": RESULTS_VERSION, **fields}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key, extension):
+        """Ruta del archivo de una clave en el almacén en disco"""
+        return os.path.join(self.directory, key[:2], key + extension)
+
+    def _remember(self, key, value, size):
+        """Inserta o refresca una entrada en la LRU en memoria y descarta las menos usadas"""
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous[1]
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+
+    def _lookup(self, key, extension, load):
+        """Busca en memoria y después en disco; load(ruta) lee el archivo y devuelve (valor, bytes)"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.memory_hits += 1
+            return entry[0]
+
+        if self.directory:
+            try:
+                value, size = load(self._path(key, extension))
+            except (OSError, ValueError, EOFError):
+                # Ausente o a medio escribir por otro proceso: se trata como un fallo
+                value = None
+            if value is not None:
+                self._remember(key, value, size)
+                self.hits += 1
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def _write(self, key, extension, write):
+        """Escritura atómica en disco: otro proceso nunca ve un archivo incompleto"""
+        if not self.directory:
+            return
+        path = self._path(key, extension)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(temporary, path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    def get(self, key):
+        """
+        Busca el resultado de una ejecución, primero en memoria y después en disco
+
+        Args:
+            key (str): Clave devuelta por ResultCache.key
+
+        Returns:
+            dict | None: Copia del resultado guardado, o None si no está
+        """
+        def load(path):
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            json.loads(text)
+            return text, len(text)
+
+        text = self._lookup(key, ".json", load)
+        return json.loads(text) if text is not None else None
+
+    def put(self, key, result):
+        """
+        Guarda el resultado de una ejecución en memoria y, si hay directorio, en disco
+
+        Args:
+            key (str): Clave devuelta por ResultCache.key
+            result (dict): Resultado serializable en JSON
+        """
+        text = json.dumps(result, ensure_ascii=False)
+        self._remember(key, text, len(text))
+        self._write(key, ".json", lambda f: f.write(text.encode("utf-8")))
+
+    def get_arrays(self, key):
+        """
+        Busca columnas de NumPy guardadas con put_arrays
+
+        Args:
+            key (str): Clave devuelta por ResultCache.key
+
+        Returns:
+            dict | None: Copias de los arrays por nombre, o None si no están
+        """
+        import numpy as np
+
+        def load(path):
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            return arrays, sum(array.nbytes for array in arrays.values())
+
+        arrays = self._lookup(key, ".npz", load)
+        return {name: array.copy() for name, array in arrays.items()} if arrays is not None else None
+
+    def put_arrays(self, key, arrays):
+        """
+        Guarda columnas de NumPy en memoria y, si hay directorio, en un .npz sin comprimir
+
+        Args:
+            key (str): Clave devuelta por ResultCache.key
+            arrays (dict): Arrays por nombre (los nombres deben ser válidos como archivo)
+        """
+        import numpy as np
+
+        stored = {name: np.array(array) for name, array in arrays.items()}
+        self._remember(key, stored, sum(array.nbytes for array in stored.values()))
+        self._write(key, ".npz", lambda f: np.savez(f, **stored))
+
+    def clear(self, disk=False):
+        """
+        Vacía la caché en memoria y reinicia las estadísticas
+
+        Args:
+            disk (bool): Si es True también borra las entradas del almacén en disco
+        """
+        self._entries.clear()
+        self.bytes = 0
+        self.hits = self.misses = self.memory_hits = self.disk_hits = self.evictions = 0
+        if disk and self.directory:
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith((".json", ".npz")):
+                        os.remove(os.path.join(root, name))
+
+    def stats(self):
+        """
+        Estadísticas de uso de la caché
+
+        Returns:
+            dict: hits, misses, memory_hits, disk_hits, evictions, size (entradas),
+                bytes, max_bytes y hit_rate (%)
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hit_rate": round(100 * self.hits / lookups, 2) if lookups else 0.0,
+        }
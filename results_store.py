@@ -0,0 +1,207 @@
+"""
+Histórico de resultados en formato columnar de NumPy
+
+Cada escritura en bloque crea un segmento nuevo (un .npy con un array
+estructurado, una fila por ejecución) y nunca se modifica uno existente. Las
+lecturas abren los segmentos con mmap_mode="r": los filtros se evalúan sobre
+las columnas mapeadas sin copiarlas y sólo se copian las filas que coinciden.
+
+Columnas: metadatos de la ejecución (run_id, timestamp, scenario, engine,
+seed, users), métricas globales y, por cada API, "<api>.share",
+"<api>.response_time", "<api>.error_rate", "<api>.p95" y "<api>.p99".
+"""
+import glob
+import operator
+import os
+import re
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+_OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le,
+              "==": operator.eq, "!=": operator.ne}
+
+_CLAUSE = re.compile(r"^\s*([\w.]+)\s*(>=|<=|==|!=|>|<)\s*(.+?)\s*$")
+
+_GLOBAL_FIELDS = [
+    ("run_id", "i8"),
+    ("timestamp", "datetime64[ms]"),
+    ("scenario", "U16"),
+    ("engine", "U12"),
+    ("seed", "i8"),
+    ("users", "i8"),
+    ("avg_response_time", "f8"),
+    ("avg_error_rate", "f8"),
+    ("cpu", "f8"),
+    ("memory", "f8"),
+    ("total_requests", "i8"),
+    ("throughput", "f8"),
+]
+
+_API_FIELDS = ("share", "response_time", "error_rate", "p95", "p99")
+
+
+def parse_since(text, now=None):
+    """
+    Convierte "7d", "24h", "30m" o una fecha ISO en un datetime
+
+    Args:
+        text (str): Antigüedad relativa o fecha absoluta
+        now (datetime): Instante de referencia para las antigüedades relativas
+    """
+    match = re.fullmatch(r"(\d+)([dhm])", text.strip())
+    if match:
+        amount, unit = int(match.group(1)), match.group(2)
+        delta = {"d": timedelta(days=amount), "h": timedelta(hours=amount), "m": timedelta(minutes=amount)}[unit]
+        return (now or datetime.now()) - delta
+    return datetime.fromisoformat(text)
+
+
+def parse_where(text):
+    """Convierte "p2p.error_rate > 10 and cpu >= 90" en una lista de condiciones (campo, operador, valor)"""
+    clauses = []
+    for part in re.split(r"\s+and\s+", text.strip(), flags=re.IGNORECASE):
+        match = _CLAUSE.match(part)
+        if not match:
+            raise ValueError(f"Condición no válida '{part}'. Use campo operador valor, por ejemplo p2p.error_rate > 10")
+        field, op, value = match.groups()
+        try:
+            value = float(value)
+        except ValueError:
+            value = value.strip("'\"")
+        clauses.append((field, op, value))
+    return clauses
+
+
+class ResultsStore:
+    """Almacén de resultados sólo de anexado, con lectura mapeada en memoria"""
+
+    def __init__(self, path, apis):
+        """
+        Args:
+            path (str): Directorio del almacén (se crea si no existe)
+            apis (iterable): Claves de las APIs (FinancialLoadTestSimulator.apis)
+        """
+        self.path = path
+        self.apis = list(apis)
+        self.dtype = np.dtype(_GLOBAL_FIELDS + [(f"{api}.{field}", "f8") for api in self.apis
+                                                for field in _API_FIELDS])
+        os.makedirs(path, exist_ok=True)
+
+    def append(self, runs, scenario=None, engine=None, seed=None, timestamp=None):
+        """
+        Escribe un lote de ejecuciones como un segmento nuevo
+
+        Args:
+            runs (iterable): Diccionarios de resultados; pueden incluir "scenario" y "seed"
+            scenario (str): Escenario por defecto de las ejecuciones
+            engine (str): Motor por defecto ("model" si los resultados no lo indican)
+            seed (int): Semilla por defecto
+            timestamp (datetime): Instante de la ejecución (por defecto, ahora)
+
+        Returns:
+            str: Ruta del segmento escrito (None si no había ejecuciones)
+        """
+        runs = list(runs)
+        if not runs:
+            return None
+
+        table = np.zeros(len(runs), dtype=self.dtype)
+        base_id = time.time_ns()
+        stamp = np.datetime64(timestamp or datetime.now(), "ms")
+
+        for i, results in enumerate(runs):
+            row = table[i]
+            row["run_id"] = base_id + i
+            row["timestamp"] = stamp
+            row["scenario"] = results.get("scenario", scenario) or "custom"
+            row["engine"] = results.get("engine", engine) or "model"
+            run_seed = results.get("seed", seed)
+            row["seed"] = -1 if run_seed is None else run_seed
+            row["users"] = results["total_users"]
+            row["avg_response_time"] = results["avg_response_time"]
+            row["avg_error_rate"] = results["avg_error_rate"]
+            row["cpu"] = results["system_metrics"]["cpu"]
+            row["memory"] = results["system_metrics"]["memory"]
+            row["total_requests"] = results.get("total_requests", 0)
+            row["throughput"] = results.get("throughput", np.nan)
+
+            percentiles = results.get("percentiles", {})
+            for api in self.apis:
+                row[f"{api}.share"] = results["distribution"].get(api, 0)
+                row[f"{api}.response_time"] = results["response_time"].get(api, np.nan)
+                row[f"{api}.error_rate"] = results["error_rate"].get(api, np.nan)
+                row[f"{api}.p95"] = percentiles.get(api, {}).get("p95", np.nan)
+                row[f"{api}.p99"] = percentiles.get(api, {}).get("p99", np.nan)
+
+        # Escritura atómica: un lector nunca ve un segmento a medio escribir
+        name = os.path.join(self.path, f"segment-{base_id}-{os.getpid()}.npy")
+        temporary = name + ".tmp"
+        with open(temporary, "wb") as f:
+            np.save(f, table)
+        os.replace(temporary, name)
+        return name
+
+    def segments(self):
+        """Segmentos del almacén abiertos con mmap (sin leerlos a memoria)"""
+        for name in sorted(glob.glob(os.path.join(self.path, "segment-*.npy"))):
+            yield np.load(name, mmap_mode="r")
+
+    def query(self, scenario=None, engine=None, since=None, until=None, where=None, columns=None):
+        """
+        Filtra las ejecuciones almacenadas
+
+        Args:
+            scenario (str): Sólo ejecuciones de este escenario
+            engine (str): Sólo ejecuciones de este motor
+            since (datetime | str): Desde esta fecha ("7d", "24h" o ISO)
+            until (datetime | str): Hasta esta fecha
+            where (str | list): Condiciones "campo op valor" unidas por "and" o lista de tuplas
+            columns (list): Columnas a devolver (por defecto todas)
+
+        Returns:
+            np.ndarray: Array estructurado con las filas que cumplen todos los filtros
+        """
+        if isinstance(since, str):
+            since = parse_since(since)
+        if isinstance(until, str):
+            until = parse_since(until)
+        clauses = parse_where(where) if isinstance(where, str) else list(where or [])
+        for field, op, _ in clauses:
+            if field not in self.dtype.names:
+                raise ValueError(f"Columna desconocida '{field}'")
+            if op not in _OPERATORS:
+                raise ValueError(f"Operador no válido '{op}'")
+
+        matches = []
+        for segment in self.segments():
+            names = segment.dtype.names
+            if any(field not in names for field, _, _ in clauses):
+                continue
+
+            mask = np.ones(segment.shape[0], dtype=bool)
+            if scenario is not None:
+                mask &= segment["scenario"] == scenario
+            if engine is not None:
+                mask &= segment["engine"] == engine
+            if since is not None:
+                mask &= segment["timestamp"] >= np.datetime64(since, "ms")
+            if until is not None:
+                mask &= segment["timestamp"] <= np.datetime64(until, "ms")
+            for field, op, value in clauses:
+                mask &= _OPERATORS[op](segment[field], value)
+
+            if mask.any():
+                rows = segment[mask]
+                matches.append(rows[columns] if columns else rows)
+
+        if not matches:
+            return np.zeros(0, dtype=self.dtype if not columns else self.dtype[columns])
+        # Segmentos con APIs distintas no comparten dtype: se unen por las columnas comunes
+        common = [name for name in matches[0].dtype.names if all(name in m.dtype.names for m in matches)]
+        return np.concatenate([np.asarray(m[common]).astype(matches[0].dtype[common]) for m in matches])
+
+    def count(self):
+        """Número total de ejecuciones almacenadas"""
+        return sum(segment.shape[0] for segment in self.segments())
@@ -0,0 +1,250 @@
+"""
+Barridos de parámetros en paralelo para planificación de capacidad
+
+La malla usuarios × distribución se divide en bloques que se evalúan con el
+motor vectorizado (calculate_results_batch) en un ProcessPoolExecutor. Cada
+bloque recibe su propia semilla derivada de np.random.SeedSequence, por lo que
+el resultado no depende del número de procesos ni del orden de finalización,
+y los resultados se agregan a medida que llegan para que la memoria no crezca
+con el tamaño de la malla.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from nequiTestAPI import FinancialLoadTestSimulator
+
+# Simuladores reutilizados por cada proceso trabajador, uno por modelo de rendimiento
+_SIMULATORS = {}
+
+
+def _get_simulator(model=None):
+    """
+    Devuelve el simulador del proceso actual para el modelo indicado, creándolo la primera vez
+
+    Args:
+        model (dict): Especificación del modelo (PerformanceModel.to_dict); None → modelo por defecto
+    """
+    key = json.dumps(model, sort_keys=True)
+    if key not in _SIMULATORS:
+        _SIMULATORS[key] = FinancialLoadTestSimulator(model=model)
+    return _SIMULATORS[key]
+
+
+def _metric_values(batch, api, metric):
+    """Extrae la métrica pedida de un resultado en columnas"""
+    if metric in ("response_time", "error_rate"):
+        return batch[metric][api]
+    return batch[metric]
+
+
+class SweepSummary:
+    """
+    Agregado incremental de un barrido
+
+    Por cada distribución guarda el número de puntos evaluados, la media y el
+    máximo de la métrica y el menor número de usuarios en el que la métrica
+    supera el límite. Ocupa lo mismo con 10 puntos que con 10 millones.
+    """
+
+    def __init__(self, names, api, metric, limit):
+        self.names = list(names)
+        self.api = api
+        self.metric = metric
+        self.limit = limit
+        size = len(self.names)
+        self.count = np.zeros(size, dtype=np.int64)
+        self.total = np.zeros(size)
+        self.maximum = np.full(size, -np.inf)
+        self.first_crossing = np.full(size, np.iinfo(np.int64).max, dtype=np.int64)
+
+    def update(self, partial):
+        """Incorpora el agregado parcial de un bloque"""
+        index = partial["distribution"]
+        self.count[index] += partial["count"]
+        self.total[index] += partial["total"]
+        self.maximum[index] = max(self.maximum[index], partial["maximum"])
+        self.first_crossing[index] = min(self.first_crossing[index], partial["first_crossing"])
+
+    def to_dict(self):
+        """Resumen por distribución listo para serializar"""
+        summary = {}
+        no_crossing = np.iinfo(np.int64).max
+        for i, name in enumerate(self.names):
+            summary[name] = {
+                "points": int(self.count[i]),
+                "mean": round(float(self.total[i] / self.count[i]), 3) if self.count[i] else None,
+                "max": round(float(self.maximum[i]), 3) if self.count[i] else None,
+                "first_crossing_users": int(self.first_crossing[i]) if self.first_crossing[i] != no_crossing else None,
+            }
+        return {"api": self.api, "metric": self.metric, "limit": self.limit, "distributions": summary}
+
+
+def _evaluate_chunk(task):
+    """Evalúa un bloque de la malla en un proceso trabajador"""
+    users, distribution, index, seed_seq, api, metric, limit, keep_columns, model = task
+    simulator = _get_simulator(model)
+    batch = simulator.calculate_results_batch(users, distribution, seed=np.random.default_rng(seed_seq))
+
+    values = _metric_values(batch, api, metric)
+    crossing = users[values > limit]
+    partial = {
+        "distribution": index,
+        "count": int(values.size),
+        "total": float(values.sum()),
+        "maximum": float(values.max()),
+        "first_crossing": int(crossing.min()) if crossing.size else np.iinfo(np.int64).max,
+    }
+    if keep_columns:
+        partial["columns"] = batch
+    return partial
+
+
+def _iter_tasks(users, distributions, seed, chunk_size, api, metric, limit, keep_columns, model):
+    """Genera los bloques de la malla de forma perezosa con su semilla independiente"""
+    users = np.asarray(users, dtype=np.int64)
+    n_chunks = -(-users.size // chunk_size)
+    root = np.random.SeedSequence(seed)
+    for index, distribution in enumerate(distributions.values()):
+        # Una semilla hija por (distribución, bloque): independiente del número de procesos
+        for chunk, seed_seq in enumerate(root.spawn(n_chunks)):
+            start = chunk * chunk_size
+            yield (users[start:start + chunk_size], distribution, index, seed_seq,
+                   api, metric, limit, keep_columns, model)
+
+
+def run_sweep(users, distributions, api="p2p", metric="error_rate", limit=15.0, seed=None,
+              workers=None, chunk_size=50000, on_chunk=None, model=None):
+    """
+    Evalúa la malla usuarios × distribución en paralelo
+
+    Args:
+        users (array-like): Números de usuarios a evaluar
+        distributions (dict): Nombre → distribución (dict de porcentajes por API)
+        api (str): API cuya métrica se agrega
+        metric (str): "error_rate", "response_time", "avg_error_rate", "avg_response_time", "cpu" o "memory"
+        limit (float): Umbral para detectar el primer número de usuarios que lo supera
+        seed (int): Semilla raíz del barrido
+        workers (int): Procesos trabajadores (1 evalúa en el proceso actual)
+        chunk_size (int): Puntos por bloque enviado a cada trabajador
+        on_chunk (callable): Si se indica, recibe (nombre_distribución, columnas) de cada
+            bloque al completarse, para volcarlo a disco o a otro agregador
+        model (dict): Especificación del modelo de rendimiento (PerformanceModel.to_dict)
+
+    Returns:
+        dict: Resumen agregado por distribución (SweepSummary.to_dict)
+    """
+    names = list(distributions)
+    summary = SweepSummary(names, api, metric, limit)
+    tasks = _iter_tasks(users, distributions, seed, chunk_size, api, metric, limit, on_chunk is not None, model)
+
+    def consume(partial):
+        columns = partial.pop("columns", None)
+        if on_chunk is not None:
+            on_chunk(names[partial["distribution"]], columns)
+        summary.update(partial)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for task in tasks:
+            consume(_evaluate_chunk(task))
+        return summary.to_dict()
+
+    # Como mucho 2 bloques en vuelo por trabajador: la memoria no depende del tamaño de la malla
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for task in tasks:
+            pending.add(executor.submit(_evaluate_chunk, task))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    consume(future.result())
+        for future in pending:
+            consume(future.result())
+
+    return summary.to_dict()
+
+
+def _expected_metric(users, distribution, api, metric, seed, replicates, model=None):
+    """Media de la métrica en un punto usando varias réplicas con semilla fija"""
+    simulator = _get_simulator(model)
+    rng = np.random.default_rng(np.random.SeedSequence([seed, int(users)]))
+    batch = simulator.calculate_results_batch(np.full(replicates, users), distribution, seed=rng)
+    return float(_metric_values(batch, api, metric).mean())
+
+
+def find_threshold(distribution, api="p2p", metric="error_rate", limit=15.0, low=1, high=1_000_000,
+                   seed=0, replicates=16, tolerance=1, model=None):
+    """
+    Busca por bisección el menor número de usuarios en el que la métrica supera el límite
+
+    El modelo es monótono en el número de usuarios salvo por la variación
+    aleatoria, que se suaviza promediando varias réplicas. Cada punto usa una
+    semilla derivada de (seed, usuarios), así que la búsqueda es reproducible.
+
+    Args:
+        distribution (dict): Distribución de peticiones por API
+        api (str): API a vigilar
+        metric (str): Métrica a comparar con el límite
+        limit (float): Umbral de saturación (por ejemplo 15% de errores)
+        low (int): Cota inferior de usuarios
+        high (int): Cota superior de usuarios
+        seed (int): Semilla de la búsqueda
+        replicates (int): Réplicas promediadas por evaluación
+        tolerance (int): Anchura del intervalo final en usuarios
+        model (dict): Especificación del modelo de rendimiento (PerformanceModel.to_dict)
+
+    Returns:
+        dict: Usuarios de saturación (None si no se alcanza en [low, high]),
+            valor de la métrica en ese punto y evaluaciones realizadas
+    """
+    evaluations = 0
+
+    def evaluate(users):
+        nonlocal evaluations
+        evaluations += 1
+        return _expected_metric(users, distribution, api, metric, seed, replicates, model)
+
+    if evaluate(high) <= limit:
+        return {"users": None, "value": None, "evaluations": evaluations}
+    low_value = evaluate(low)
+    if low_value > limit:
+        return {"users": low, "value": round(low_value, 3), "evaluations": evaluations}
+
+    while high - low > tolerance:
+        middle = (low + high) // 2
+        if evaluate(middle) > limit:
+            high = middle
+        else:
+            low = middle
+
+    return {"users": high, "value": round(evaluate(high), 3), "evaluations": evaluations}
+
+
+def _find_threshold_task(kwargs):
+    """Adaptador para ejecutar find_threshold en un proceso trabajador"""
+    return find_threshold(**kwargs)
+
+
+def find_thresholds(distributions, workers=None, **kwargs):
+    """
+    Ejecuta find_threshold para varias distribuciones en paralelo
+
+    Args:
+        distributions (dict): Nombre → distribución
+        workers (int): Procesos trabajadores
+        **kwargs: Parámetros de find_threshold
+
+    Returns:
+        dict: Nombre de la distribución → resultado de find_threshold
+    """
+    tasks = [{"distribution": distribution, **kwargs} for distribution in distributions.values()]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        results = [find_threshold(**task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_find_threshold_task, tasks))
+    return dict(zip(distributions, results))
@@ -0,0 +1,252 @@
+"""
+Flujos de transacciones de varios pasos con reintentos
+
+Un flujo es un grafo ponderado de pasos sobre las APIs del simulador, por
+ejemplo una transferencia P2P: auth → balance → p2p. Cada usuario virtual
+elige un flujo según su peso, recorre sus pasos uno tras otro y, si una
+petición falla con un código reintentable (429 o 504), la repite tras una
+espera exponencial con jitter. La latencia que ve el usuario es la del flujo
+completo, esperas de reintento incluidas.
+
+WorkflowEngine reutiliza el bucle de eventos de EventDrivenEngine (colas y
+servidores por API, 429/504/500 e histogramas) y sólo decide la API de cada
+llegada y qué hace el usuario tras cada respuesta. Además informa, por flujo,
+de los percentiles de latencia extremo a extremo y de la amplificación por
+reintentos (peticiones enviadas / peticiones lógicas), que mide cuánto
+multiplican la carga las tormentas de reintentos.
+
+Formato de un flujo:
+    {"name": "p2p_transfer", "weight": 40, "steps": ["auth", "balance", "p2p"]}
+o, con bifurcaciones, un grafo de nodos con pesos hacia el siguiente nodo
+("end" termina el flujo):
+    {"name": "p2p_transfer", "weight": 40, "start": "login", "nodes": {
+        "login": {"api": "auth", "next": {"check": 1}},
+        "check": {"api": "balance", "next": {"send": 0.8, "end": 0.2}},
+        "send": {"api": "p2p"}}}
+Ambos admiten "retry" para sustituir la política por defecto.
+"""
+import numpy as np
+
+from event_engine import _ARRIVAL, EventDrivenEngine, _stream
+from histogram import LatencyHistogram, LatencyRecorder
+
+# Política de reintentos por defecto: espera = backoff * multiplier^(intento - 1) * (1 ± jitter)
+DEFAULT_RETRY = {"max_retries": 3, "backoff": 0.5, "multiplier": 2.0, "jitter": 0.5, "retry_on": [429, 504]}
+
+# Flujo por API final; auth siempre va primero
+_FLOW_STEPS = {
+    "balance": ("balance_check", ["auth", "balance"]),
+    "p2p": ("p2p_transfer", ["auth", "balance", "p2p"]),
+    "qr": ("qr_payment", ["auth", "qr"]),
+    "withdrawal": ("withdrawal", ["auth", "balance", "withdrawal"]),
+}
+
+# Tipo de evento propio: inicio de un flujo (las llegadas y salidas son las de event_engine)
+_START = 2
+
+
+def flows_from_distribution(distribution):
+    """
+    Flujos por defecto de un escenario: uno por API de negocio, con el peso de su porcentaje
+
+    Args:
+        distribution (dict): Distribución de peticiones por API del escenario
+
+    Returns:
+        list: Definiciones de flujo (auth → ... → API)
+    """
+    flows = [{"name": name, "weight": distribution.get(api, 0), "steps": steps}
+             for api, (name, steps) in _FLOW_STEPS.items() if distribution.get(api, 0) > 0]
+    if not flows:
+        raise ValueError("La distribución no asigna tráfico a ninguna API de negocio")
+    return flows
+
+
+class _Flow:
+    """Flujo compilado: nodos con su API y el reparto hacia el siguiente nodo (-1 = fin)"""
+
+    def __init__(self, spec, api_index):
+        if not isinstance(spec, dict) or "name" not in spec:
+            raise ValueError(f"Cada flujo debe ser un objeto con 'name' y 'steps' o 'nodes', se recibió {spec!r}")
+        self.name = spec["name"]
+        try:
+            self.weight = float(spec.get("weight", 1))
+        except (TypeError, ValueError):
+            raise ValueError(f"El flujo '{self.name}' tiene un peso no numérico {spec.get('weight')!r}")
+        retry = spec.get("retry", {})
+        if not isinstance(retry, dict):
+            raise ValueError(f"La política 'retry' del flujo '{self.name}' debe ser un objeto")
+        self.retry = {**DEFAULT_RETRY, **retry}
+
+        if "steps" in spec:
+            steps = spec["steps"]
+            if not isinstance(steps, list) or not steps:
+                raise ValueError(f"Los pasos del flujo '{self.name}' deben ser una lista no vacía de APIs")
+            names = [f"{i}:{api}" for i, api in enumerate(steps)]
+            nodes = {name: {"api": api, "next": {names[i + 1]: 1} if i + 1 < len(names) else {}}
+                     for i, (name, api) in enumerate(zip(names, steps))}
+            start = names[0]
+        elif isinstance(spec.get("nodes"), dict) and spec["nodes"]:
+            nodes = spec["nodes"]
+            start = spec.get("start")
+        else:
+            raise ValueError(f"El flujo '{self.name}' necesita 'steps' o un objeto 'nodes' no vacío")
+
+        order = list(nodes)
+        position = {name: i for i, name in enumerate(order)}
+        if start not in position:
+            raise ValueError(f"El flujo '{self.name}' empieza en un nodo desconocido {start!r}")
+        self.start = position[start]
+        self.api = []
+        self.targets = []
+        self.cum_weights = []
+        for name in order:
+            node = nodes[name]
+            if not isinstance(node, dict) or "api" not in node:
+                raise ValueError(f"El nodo '{name}' del flujo '{self.name}' debe ser un objeto con 'api'")
+            if not isinstance(node["api"], str) or node["api"] not in api_index:
+                raise ValueError(f"El flujo '{self.name}' usa una API desconocida '{node['api']}'")
+            self.api.append(api_index[node["api"]])
+            following = node.get("next", {})
+            if not isinstance(following, dict):
+                raise ValueError(f"'next' del nodo '{name}' del flujo '{self.name}' debe ser un objeto nodo → peso")
+            for target, weight in following.items():
+                if target != "end" and target not in position:
+                    raise ValueError(f"El nodo '{name}' del flujo '{self.name}' apunta a un nodo desconocido "
+                                     f"'{target}'")
+                if not isinstance(weight, (int, float)) or weight < 0:
+                    raise ValueError(f"El peso de '{name}' → '{target}' del flujo '{self.name}' debe ser un "
+                                     f"número no negativo")
+            weights = np.array(list(following.values()), dtype=np.float64)
+            if weights.size and weights.sum() <= 0:
+                raise ValueError(f"El nodo '{name}' del flujo '{self.name}' no tiene ningún peso positivo en 'next'")
+            self.targets.append([-1 if target == "end" else position[target] for target in following])
+            self.cum_weights.append((np.cumsum(weights) / weights.sum()).tolist() if weights.size else [])
+
+
+class WorkflowEngine(EventDrivenEngine):
+    """Motor de eventos discretos en el que cada usuario ejecuta flujos de varios pasos"""
+
+    def run(self, users, flows, seed=None):
+        """
+        Ejecuta la simulación
+
+        Args:
+            users (int): Número de usuarios virtuales
+            flows (list): Definiciones de flujo (ver el docstring del módulo)
+            seed (int | np.random.Generator): Semilla del generador aleatorio
+
+        Returns:
+            dict: Resultados por API como EventDrivenEngine más "flows" (latencia extremo a
+                extremo, éxito y amplificación por flujo) y "retry_amplification" global
+        """
+        if not isinstance(flows, list) or not flows:
+            raise ValueError("Los flujos deben ser una lista no vacía de definiciones de flujo")
+        api_index = {api: i for i, api in enumerate(self.apis)}
+        compiled = [_Flow(spec, api_index) for spec in flows]
+        weights = np.array([flow.weight for flow in compiled])
+        if weights.sum() <= 0:
+            raise ValueError("Los flujos deben tener algún peso positivo")
+        cum_flow = np.cumsum(weights / weights.sum())
+        cum_flow[-1] = 1.0
+
+        rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+        n_flows = len(compiled)
+
+        think = _stream(lambda n: rng.exponential(self.think_time, n))
+        choose_flow = _stream(lambda n: np.searchsorted(cum_flow, rng.random(n), side="right"))
+        uniform = _stream(lambda n: rng.random(n))
+
+        # Latencia extremo a extremo de los flujos completados (esperas de reintento incluidas)
+        flow_latency = [LatencyRecorder(LatencyHistogram(self.timeout * 20, self.significant_digits))
+                        for _ in range(n_flows)]
+        started = [0] * n_flows
+        completed = [0] * n_flows
+        failed = [0] * n_flows
+        retries = [0] * n_flows
+        flow_requests = [0] * n_flows
+        logical_requests = [0] * n_flows
+
+        user_flow = [0] * users
+        user_node = [0] * users
+        attempt = [0] * users
+        flow_start = [0.0] * users
+
+        def arrive(user, now, kind):
+            """Inicia un flujo si toca y devuelve la API del paso actual del usuario"""
+            if kind == _START:
+                f = next(choose_flow)
+                user_flow[user] = f
+                user_node[user] = compiled[f].start
+                attempt[user] = 0
+                flow_start[user] = now
+                started[f] += 1
+            f = user_flow[user]
+            flow_requests[f] += 1
+            if attempt[user] == 0:
+                logical_requests[f] += 1
+            return compiled[f].api[user_node[user]]
+
+        def complete(user, now, code):
+            """Siguiente evento del usuario: reintento, siguiente paso o fin del flujo"""
+            f = user_flow[user]
+            flow = compiled[f]
+            if code != 200:
+                policy = flow.retry
+                if code in policy["retry_on"] and attempt[user] < policy["max_retries"]:
+                    attempt[user] += 1
+                    retries[f] += 1
+                    delay = policy["backoff"] * policy["multiplier"] ** (attempt[user] - 1)
+                    delay *= 1 + policy["jitter"] * (2 * next(uniform) - 1)
+                    return (now + delay, user, _ARRIVAL)
+                failed[f] += 1
+                return (now + next(think), user, _START)
+
+            node = user_node[user]
+            targets = flow.targets[node]
+            if targets:
+                draw = next(uniform)
+                cum = flow.cum_weights[node]
+                k = 0
+                while k < len(cum) - 1 and draw >= cum[k]:
+                    k += 1
+                target = targets[k]
+                if target >= 0:
+                    user_node[user] = target
+                    attempt[user] = 0
+                    return (now, user, _ARRIVAL)
+            completed[f] += 1
+            flow_latency[f].append(now - flow_start[user])
+            return (now + next(think), user, _START)
+
+        heap = [(t, u, _START) for u, t in enumerate(rng.uniform(0, self.think_time, users).tolist())]
+        requests, rejected, timeouts, failures, latencies, busy_time = self._simulate(users, heap, rng, arrive,
+                                                                                      complete)
+
+        # Distribución efectiva de peticiones por API (para los promedios por API)
+        total = sum(requests) or 1
+        distribution = {api: round(100 * requests[i] / total, 2) for i, api in enumerate(self.apis)}
+        results = self._build_results(users, distribution, requests, rejected, timeouts, failures,
+                                      latencies, busy_time)
+
+        report = {}
+        for f, flow in enumerate(compiled):
+            histogram = flow_latency[f].flush()
+            finished = completed[f] + failed[f]
+            report[flow.name] = {
+                "started": started[f],
+                "completed": completed[f],
+                "failed": failed[f],
+                "success_rate": round(100 * completed[f] / finished, 2) if finished else 0.0,
+                "retries": retries[f],
+                "retry_amplification": round(flow_requests[f] / logical_requests[f], 3) if logical_requests[f] else 1.0,
+                "mean": round(histogram.mean, 3),
+                "percentiles": histogram.summary(),
+                "histogram": histogram.to_dict(),
+            }
+
+        results["engine"] = "workflows"
+        results["flows"] = report
+        results["retry_amplification"] = round(sum(flow_requests) / sum(logical_requests), 3) \
+            if sum(logical_requests) else 1.0
+        return results